@@ -1,13 +1,20 @@
+from control_programs import CONTROL_PROGRAMS
 from flight_controller import FlightController
+from impact_predictor import ImpactPredictor
 from ksp_interface import KspInterface
-from ksp_types import VesselAttitude, VesselOrbitalParameters, VesselFlightControl, VesselFlightState
+from ksp_types import ExternalControlInput, ImpactPrediction, VesselAttitude, VesselOrbitalParameters, VesselFlightControl, VesselFlightState
+from latest_value_mailbox import LatestValueMailbox
 from mmap_interface import MemMapInterface
-from panel import KMiffedPanel
 from panel_control_program import PanelControlProgram
+from panel_history import PanelHistory
 from panel_orbital_parameters import PanelOrbitalParameters
 from panel_supplies import PanelSupplies
-import time, threading
-from datetime import datetime, timedelta
+from resource_forecast import ResourceForecaster
+from scheduler import MonotonicScheduler
+from telemetry_history import TelemetryHistory
+from telemetry_recorder import TelemetryRecorder
+from udp_telemetry import UdpTelemetryBroadcaster
+import threading
 
 from textual import events, work
 from textual.app import App, ComposeResult
@@ -26,18 +33,21 @@ class KmiffedApp(App):
     #
     # Constants
     #
-    __KRPC_MONITOR_THREAD_INTERVAL_S = 0.0333333 # 30 Hz
+    __CONNECTION_TASK_RATE_HZ = 10.0
+    __STATUS_TASK_RATE_HZ = 2.0
+    __CONTROL_TASK_RATE_HZ = 30.0
+    __ATTITUDE_EXPORT_TASK_RATE_HZ = 30.0
+    __ORBITAL_UI_TASK_RATE_HZ = 10.0
+    __RESOURCES_TASK_RATE_HZ = 2.0
+    __HISTORY_UI_TASK_RATE_HZ = 2.0
+    __HISTORY_LENGTH_S = 600.0
+    __STATUS_UI_REFRESH_RATE_HZ = 2.0
     __NUM_PANELS = 4
+    __CONTROL_PROGRAM_NAMES = frozenset(program_class.NAME for program_class in CONTROL_PROGRAMS)
 
     #
     # Types
     #
-    class SetKrpcStatusMsg(Message):
-        """Set KRPC status string message."""
-        def __init__(self, status_str: str) -> None:
-            self.status_str = status_str
-            super().__init__()
-
     class SetOrbitalParametersMsg(Message):
         """Set orbital parameters message."""
         def __init__(self, period: float, tta: float, ttp: float) -> None:
@@ -49,25 +59,64 @@ class KmiffedApp(App):
     #
     # Constructor
     #
-    def __init__(self, krpc: KspInterface, mem_map: MemMapInterface):
+    def __init__(self, krpc: KspInterface, mem_map: MemMapInterface, recorder: TelemetryRecorder = None,
+                 telemetry_broadcaster: UdpTelemetryBroadcaster = None, supplies_forecast_window_s: float = 3600.0):
         super().__init__()
-        # KSP interface via kRPC
+        # KSP interface via kRPC, or a KspReplay of a recording
         self.krpc = krpc
         self.is_krpc_terminated = False
 
         # External interface via shared memory
         self.mem_map = mem_map
 
+        # Telemetry recording, optional
+        self.recorder = recorder
+
+        # Telemetry to networked displays via UDP, optional
+        self.telemetry_broadcaster = telemetry_broadcaster
+
+        # kRPC status from the monitor thread, shown in the header
+        self.krpc_status_mailbox = LatestValueMailbox()
+
         # UI controls
         self.selected_panel_idx = 0
         self.selected_panel_idx_prev = -1
 
-        # Flight control members
-        self.flight_control = VesselFlightControl(False, 0.0, 0.0, 0.0)
-        self.flight_controller = FlightController()
+        # Flight control members. Every monitored vessel has its own flight controller and control
+        # program, keyed by vessel name; the UI shows and commands the selected vessel.
+        self.flight_control_invalid = VesselFlightControl(False, 0.0, 0.0, 0.0) # never written to
+        self.flight_control = self.flight_control_invalid
+        self.flight_controllers = {}
         self.flight_control_lock = threading.Lock()
-        self.flight_control_program = "manual"
-        self.flight_control_program_data = 0.0
+        self.flight_control_programs = {}
+        self.vessel_flight_state = VesselFlightState(False, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        self.vessel_flight_state_invalid = VesselFlightState(False, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        # External control input via shared memory, overrides the flight controller's output per axis
+        self.flight_control_output = VesselFlightControl(False, 0.0, 0.0, 0.0)
+        self.external_control_program = ("", 0.0)
+
+        # Flight history of the selected vessel, one sample per control tick
+        self.telemetry_history = TelemetryHistory(int(self.__HISTORY_LENGTH_S * self.__CONTROL_TASK_RATE_HZ))
+        self.telemetry_history_vessel_name = ""
+
+        # Impact and suicide burn prediction for the selected vessel, updated every control tick
+        self.impact_predictor = ImpactPredictor()
+        self.impact_prediction = ImpactPrediction(False, False, 0.0, 0.0, 0.0)
+
+        # Consumption rates of the selected vessel's supplies, from the resources already sampled
+        self.resource_forecaster = ResourceForecaster(self.krpc.tracked_resources, supplies_forecast_window_s)
+        self.resource_forecaster_vessel_name = ""
+
+        # kRPC monitor tasks, in priority order
+        self.scheduler = MonotonicScheduler()
+        self.scheduler.add_task("connection", self.__CONNECTION_TASK_RATE_HZ, self._connection_task)
+        self.scheduler.add_task("control", self.__CONTROL_TASK_RATE_HZ, self._control_task)
+        self.scheduler.add_task("attitude", self.__ATTITUDE_EXPORT_TASK_RATE_HZ, self._attitude_export_task)
+        self.scheduler.add_task("orbital", self.__ORBITAL_UI_TASK_RATE_HZ, self._orbital_ui_task)
+        self.scheduler.add_task("resources", self.__RESOURCES_TASK_RATE_HZ, self._resources_task)
+        self.scheduler.add_task("history", self.__HISTORY_UI_TASK_RATE_HZ, self._history_ui_task)
+        self.scheduler.add_task("status", self.__STATUS_TASK_RATE_HZ, self._status_task)
 
         # debugging tools
         self.debug_counter = 0
@@ -77,10 +126,10 @@ class KmiffedApp(App):
     #
     def compose(self) -> ComposeResult:
         with Container(id="main-container"):
-            yield PanelOrbitalParameters(classes="panel panel-format-table", id="panel-orbital")
-            yield PanelSupplies(classes="panel panel-format-table", id="panel-supplies")
+            yield PanelOrbitalParameters(classes="panel", id="panel-orbital")
+            yield PanelSupplies(self.krpc.tracked_resources, classes="panel", id="panel-supplies")
             yield PanelControlProgram(classes="panel panel-format-table", id="panel-program")
-            yield KMiffedPanel("PlaceHolder", classes="panel")
+            yield PanelHistory(classes="panel", id="panel-history")
 
             with Container(id="overlay-container"):
                 yield TextLog(id="info-log", highlight=True, markup=True, wrap=True)
@@ -103,11 +152,15 @@ class KmiffedApp(App):
         self.panel_orbital_parameters = self.query_one("#panel-orbital", PanelOrbitalParameters)
         self.panel_supplies = self.query_one("#panel-supplies", PanelSupplies)
         self.panel_control_program = self.query_one("#panel-program", PanelControlProgram)
+        self.panel_history = self.query_one("#panel-history", PanelHistory)
         self.panels = self.query("#main-container > .panel")
 
         # update selected panel style
         self._set_selected_panel()
 
+        # data from the monitor thread is pulled by the UI, at its own pace
+        self.set_interval(1.0 / self.__STATUS_UI_REFRESH_RATE_HZ, self._poll_krpc_status)
+
         # Start the KRPC Monitoring thread
         self._krpc_monitor_thread()
 
@@ -128,6 +181,26 @@ class KmiffedApp(App):
             self.debug_counter += 1
             self.info_log_widget.write("Test Counter: {0}".format(self.debug_counter))
 
+        elif event.key == 't':
+            self.info_log_widget.write(self.scheduler.get_task_stats_str())
+            self.info_log_widget.write("Orbital panel mailbox: {0}".format(self.panel_orbital_parameters.mailbox.get_stats_str()))
+            self.info_log_widget.write("Supplies panel mailbox: {0}".format(self.panel_supplies.mailbox.get_stats_str()))
+            self.info_log_widget.write("Impact predictor: {0}".format(self.impact_predictor.get_stats_str()))
+            flight_controller = self.flight_controllers.get(self.krpc.get_selected_vessel_name())
+            if flight_controller is not None:
+                self.info_log_widget.write(flight_controller.get_program_stats_str())
+            if self.telemetry_broadcaster is not None:
+                self.info_log_widget.write(self.telemetry_broadcaster.get_stats_str())
+
+        elif event.key == 'p':
+            if self.krpc.rpc_accounting is not None:
+                self.info_log_widget.write(self.krpc.rpc_accounting.get_report_str())
+            else:
+                self.info_log_widget.write("RPC accounting is disabled")
+
+        elif event.key == 'v':
+            self._select_next_vessel()
+
         elif event.key == 'a':
             self.selected_panel_idx_prev = self.selected_panel_idx
             self.selected_panel_idx -= 1
@@ -163,9 +236,6 @@ class KmiffedApp(App):
     #
     # Message Handlers
     #
-    def on_kmiffed_app_set_krpc_status_msg(self, message: SetKrpcStatusMsg) -> None:
-        self.sub_title = message.status_str
-
     def on_panel_control_program_set_control_program_msg(self, message: PanelControlProgram.SetControlProgramMsg) -> None:
         self.info_log_widget.write("Control Program Activated: {0} {1}".format(message.control_program, message.program_data))
         self._set_flight_control_program(message.control_program, message.program_data)
@@ -186,87 +256,190 @@ class KmiffedApp(App):
                 panel.on_panel_exit()
             panel_idx += 1
 
+    def _poll_krpc_status(self) -> None:
+        krpc_status_str = self.krpc_status_mailbox.take()
+        if krpc_status_str is not None:
+            self.sub_title = krpc_status_str
+
+    def _select_next_vessel(self) -> None:
+        vessel_names = self.krpc.get_vessel_names()
+        if not vessel_names:
+            self.info_log_widget.write("No vessel to select")
+            return
+        selected_vessel_name = self.krpc.get_selected_vessel_name()
+        vessel_idx = vessel_names.index(selected_vessel_name) + 1 if selected_vessel_name in vessel_names else 0
+        if vessel_idx >= len(vessel_names):
+            vessel_idx = 0
+        vessel_name = vessel_names[vessel_idx]
+        self.krpc.select_vessel(vessel_name)
+        (program, program_data) = self._get_flight_control_program(vessel_name)
+        self.info_log_widget.write("Vessel Selected: {0} ({1}/{2}), Control Program: {3} {4}".format(
+            vessel_name, vessel_idx + 1, len(vessel_names), program, program_data))
+
     def _set_flight_control_program(self, program: str, program_data: float) -> None:
+        """ Sets the control program of the selected vessel. """
+        vessel_name = self.krpc.get_selected_vessel_name()
         with self.flight_control_lock:
-            self.flight_control_program = program
-            self.flight_control_program_data = program_data
+            self.flight_control_programs[vessel_name] = (program, program_data)
 
-    def _get_flight_control_program(self) -> tuple:
-        flight_control_program = "manual"
-        flight_control_program_data = 0.0
+    def _get_flight_control_program(self, vessel_name: str) -> tuple:
         with self.flight_control_lock:
-            flight_control_program = self.flight_control_program
-            flight_control_program_data = self.flight_control_program_data
-        return (flight_control_program, flight_control_program_data)
+            return self.flight_control_programs.get(vessel_name, ("manual", 0.0))
+
+    def _get_flight_controller(self, vessel_name: str) -> FlightController:
+        flight_controller = self.flight_controllers.get(vessel_name)
+        if flight_controller is None:
+            flight_controller = FlightController()
+            self.flight_controllers[vessel_name] = flight_controller
+        return flight_controller
+
+    def _execute_flight_controller(self, vessel_idx: int, vessel_name: str, program: str, program_data: float,
+                                   vessel_flight_state: VesselFlightState) -> VesselFlightControl:
+        """ Runs the vessel's flight controller. On a program change, every control axis is sent again,
+            as the pilot may have moved them while the previous program didn't drive them. """
+        flight_controller = self._get_flight_controller(vessel_name)
+        if program != flight_controller.control_program:
+            self.krpc.invalidate_flight_controls(vessel_idx)
+        return flight_controller.execute(program, program_data, vessel_flight_state)
 
     @work(exclusive=True)
     def _krpc_monitor_thread(self) -> None:
         """Monitor our connection to the KRPC interface"""
-        low_freq_loop_interval_ms = 5000
-        low_freq_loop_time = datetime.now() - timedelta(milliseconds=low_freq_loop_interval_ms)
-
-        while not self.is_krpc_terminated:
-            current_timestamp = datetime.now()
-
-            # Establish KRPC Connection
-            self.krpc.setup_connection_if_needed()
-            self.krpc.setup_data_streams_if_needed()
-
-            # Get KRPC status info
-            krpc_status_str = self.krpc.get_krpc_status()
-            self.post_message(self.SetKrpcStatusMsg(krpc_status_str))
-
-            # Get low-frequency-polled data for the UI
-            if (current_timestamp - low_freq_loop_time) > timedelta(milliseconds=low_freq_loop_interval_ms):
-                low_freq_loop_time = current_timestamp
-                vessel_resources = self.krpc.get_vessel_resources()
-                if vessel_resources.bIsDataValid:
-                    self.panel_supplies.post_message(PanelSupplies.SetDataMsg(
-                        vessel_resources.fWater,
-                        vessel_resources.fWaterMax,
-                        vessel_resources.fFood,
-                        vessel_resources.fFoodMax,
-                        vessel_resources.fOxygen,
-                        vessel_resources.fOxygenMax,
-                        vessel_resources.fAtmo,
-                        vessel_resources.fAtmoMax,
-                        vessel_resources.fWasteAtmo,
-                        vessel_resources.fWasteAtmoMax))
-
-            # Get data for external interfaces
-            vessel_attitude = self.krpc.get_vessel_attitude()
-            self.mem_map.set_vessel_attitude(vessel_attitude)
-
-            # Execute flight controller
-            vessel_flight_state = self.krpc.get_vessel_flight_state()
-            (flight_ctrl_pgm, flight_ctrl_pgm_data) = self._get_flight_control_program()
-            if vessel_flight_state.bIsDataValid:
-                self.flight_control = self.flight_controller.execute(
-                    flight_ctrl_pgm,
-                    flight_ctrl_pgm_data,
-                    vessel_flight_state)
-            else:
-                self.flight_control.bIsInputValid = False
-            if self.flight_control.bIsInputValid:
-                self.krpc.set_flight_controls(self.flight_control)
-
-            # Get data to display on UI
-            orbital_params = self.krpc.get_vessel_orbital_parameters()
-            if orbital_params.bIsDataValid:
-                self.panel_orbital_parameters.post_message(PanelOrbitalParameters.SetDataMsg(
-                    orbital_params.sCelestialBodyName,
-                    orbital_params.fPeriod,
-                    orbital_params.fTimeToApoapsis,
-                    orbital_params.fTimeToPeriapsis,
-                    vessel_flight_state.fVerticalSpeed,
-                    vessel_flight_state.fForwardSpeed,
-                    vessel_flight_state.fLateralSpeed,
-                    vessel_flight_state.fPitchSpeed,
-                    vessel_flight_state.fPitchTorqueMax,
-                    vessel_flight_state.fPitchMomentOfInertia,
-                    vessel_flight_state.fYawSpeed,
-                    vessel_flight_state.fYawTorqueMax,
-                    vessel_flight_state.fYawMomentOfInertia))
-
-            # Sleep till next frame
-            time.sleep(self.__KRPC_MONITOR_THREAD_INTERVAL_S)
+        self.scheduler.run(lambda: self.is_krpc_terminated)
+
+    def _connection_task(self) -> None:
+        # Establish KRPC Connection
+        self.krpc.setup_connection_if_needed()
+        self.krpc.setup_data_streams_if_needed()
+
+    def _status_task(self) -> None:
+        # Check connection health and get KRPC status info
+        self.krpc.check_connection_health()
+        krpc_status_str = self.krpc.get_krpc_status()
+        vessel_names = self.krpc.get_vessel_names()
+        if len(vessel_names) > 1:
+            krpc_status_str = "{0}  [{1} of {2} vessels]".format(krpc_status_str, self.krpc.get_selected_vessel_name(), len(vessel_names))
+        self.krpc_status_mailbox.put(krpc_status_str)
+
+    def _resources_task(self) -> None:
+        # Get vessel resources, cheap to poll since they are streamed
+        vessel_resources = self.krpc.get_vessel_resources()
+        self.mem_map.set_vessel_resources(vessel_resources)
+        if vessel_resources.bIsDataValid:
+            vessel_name = self.krpc.get_selected_vessel_name()
+            if vessel_name != self.resource_forecaster_vessel_name:
+                self.resource_forecaster.reset()
+                self.resource_forecaster_vessel_name = vessel_name
+            self.resource_forecaster.add_sample(vessel_resources)
+            self.panel_supplies.mailbox.put((vessel_resources.lResources, self.resource_forecaster.get_forecasts()))
+
+    def _history_ui_task(self) -> None:
+        # Downsample the history to what the panel draws, here rather than on the UI thread
+        num_points = self.panel_history.get_num_points()
+        if (num_points > 0) and (self.telemetry_history.count > 0):
+            self.panel_history.mailbox.put(self.telemetry_history.get_downsampled(num_points))
+
+    def _attitude_export_task(self) -> None:
+        # Get data for external interfaces
+        vessel_attitude = self.krpc.get_vessel_attitude()
+        self.mem_map.set_vessel_attitude(vessel_attitude)
+        if self.recorder is not None:
+            self.recorder.set_vessel_attitude(vessel_attitude)
+        if self.telemetry_broadcaster is not None:
+            self.telemetry_broadcaster.publish_vessel_attitude(vessel_attitude)
+
+    def _control_task(self) -> None:
+        # RPCs are accounted per control tick, i.e. everything issued since the previous one
+        if self.krpc.rpc_accounting is not None:
+            self.krpc.rpc_accounting.end_tick()
+
+        # External control input, read straight from shared memory rather than through the UI.
+        # Program names that aren't in the registry are ignored.
+        external_input = self.mem_map.get_external_input()
+        if external_input.bIsInputValid and (external_input.sControlProgram in self.__CONTROL_PROGRAM_NAMES):
+            external_control_program = (external_input.sControlProgram, external_input.fControlProgramData)
+            if external_control_program != self.external_control_program:
+                self.external_control_program = external_control_program
+                self._set_flight_control_program(*external_control_program)
+
+        # Flight states of all monitored vessels, in one pass
+        fleet_flight_states = self.krpc.get_fleet_flight_states()
+        vessel_names = self.krpc.get_vessel_names()
+        selected_vessel_idx = self.krpc.selected_vessel_idx
+
+        # Execute the flight controllers of the vessels in the background
+        for (vessel_idx, vessel_flight_state) in enumerate(fleet_flight_states):
+            if vessel_idx == selected_vessel_idx:
+                continue
+            if not vessel_flight_state.bIsDataValid:
+                self.krpc.invalidate_flight_controls(vessel_idx)
+                continue
+            vessel_name = vessel_names[vessel_idx]
+            (flight_ctrl_pgm, flight_ctrl_pgm_data) = self._get_flight_control_program(vessel_name)
+            flight_control = self._execute_flight_controller(vessel_idx, vessel_name, flight_ctrl_pgm, flight_ctrl_pgm_data, vessel_flight_state)
+            self.krpc.set_vessel_flight_controls(vessel_idx, flight_control)
+
+        # Execute the flight controller of the selected vessel, which external input may override
+        if fleet_flight_states:
+            vessel_name = vessel_names[selected_vessel_idx]
+            vessel_flight_state = fleet_flight_states[selected_vessel_idx]
+        else:
+            vessel_name = ""
+            vessel_flight_state = self.vessel_flight_state_invalid
+        (flight_ctrl_pgm, flight_ctrl_pgm_data) = self._get_flight_control_program(vessel_name)
+        if vessel_flight_state.bIsDataValid:
+            self.flight_control = self._execute_flight_controller(selected_vessel_idx, vessel_name, flight_ctrl_pgm, flight_ctrl_pgm_data, vessel_flight_state)
+        else:
+            # the controller's output is the program's own control, which its next step may not rewrite
+            self.flight_control = self.flight_control_invalid
+        flight_control = self._apply_external_overrides(external_input, vessel_flight_state.bIsDataValid)
+        if fleet_flight_states:
+            self.krpc.set_vessel_flight_controls(selected_vessel_idx, flight_control)
+        self.vessel_flight_state = vessel_flight_state
+        if vessel_flight_state.bIsDataValid:
+            if vessel_name != self.telemetry_history_vessel_name:
+                self.telemetry_history.clear()
+                self.telemetry_history_vessel_name = vessel_name
+            self.telemetry_history.record(vessel_flight_state, flight_control)
+        self.impact_prediction = self.impact_predictor.predict(self.krpc.get_vessel_trajectory_state())
+        self.mem_map.set_vessel_flight_state(vessel_flight_state)
+        if self.telemetry_broadcaster is not None:
+            self.telemetry_broadcaster.publish_vessel_flight_state(vessel_flight_state)
+        if self.recorder is not None:
+            self.recorder.record_control_tick(flight_ctrl_pgm, flight_ctrl_pgm_data, vessel_flight_state, flight_control)
+
+    def _apply_external_overrides(self, external_input: ExternalControlInput, is_vessel_data_valid: bool) -> VesselFlightControl:
+        """ Returns the flight controller's output, with the axes overridden by the external input replaced.
+            Axes that are neither overridden nor driven by the control program are left neutral. """
+        if not (external_input.bIsInputValid and is_vessel_data_valid and
+                (external_input.bIsThrottleOverridden or external_input.bIsPitchOverridden or external_input.bIsYawOverridden)):
+            return self.flight_control
+
+        output = self.flight_control_output
+        if self.flight_control.bIsInputValid:
+            output.fThrottle = self.flight_control.fThrottle
+            output.fPitch = self.flight_control.fPitch
+            output.fYaw = self.flight_control.fYaw
+        else:
+            output.fThrottle = 0.0
+            output.fPitch = 0.0
+            output.fYaw = 0.0
+        if external_input.bIsThrottleOverridden:
+            output.fThrottle = min(max(external_input.fThrottle, 0.0), 1.0)
+        if external_input.bIsPitchOverridden:
+            output.fPitch = min(max(external_input.fPitch, -1.0), 1.0)
+        if external_input.bIsYawOverridden:
+            output.fYaw = min(max(external_input.fYaw, -1.0), 1.0)
+        output.bIsInputValid = True
+        return output
+
+    def _orbital_ui_task(self) -> None:
+        # Get data to display on UI
+        orbital_params = self.krpc.get_vessel_orbital_parameters()
+        vessel_flight_state = self.vessel_flight_state
+        impact_prediction = self.impact_prediction
+        if self.recorder is not None:
+            self.recorder.set_vessel_orbital_parameters(orbital_params)
+        self.mem_map.set_vessel_orbital_parameters(orbital_params)
+        if orbital_params.bIsDataValid:
+            self.panel_orbital_parameters.mailbox.put((orbital_params, vessel_flight_state, impact_prediction))
@@ -0,0 +1,54 @@
+""" Runs the FlightController over a telemetry recording as fast as possible, and compares
+    its output with the flight controls that were recorded.
+
+    Usage: python bench_flight_controller.py recording.bin
+"""
+from flight_controller import FlightController
+from telemetry_replay import KspReplay
+import argparse, time
+import numpy as np
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the FlightController over a telemetry recording.")
+    parser.add_argument("recording", help="telemetry recording, as written by main.py --record")
+    args = parser.parse_args()
+
+    replay = KspReplay(args.recording, speed=0.0)
+    replay.setup_connection_if_needed()
+    replay.setup_data_streams_if_needed()
+
+    flight_controller = FlightController()
+    control_errors = []
+    num_ticks = 0
+    execute_s = 0.0
+    while True:
+        state = replay.get_vessel_flight_state()
+        if replay.is_finished:
+            break
+        if not state.bIsDataValid:
+            continue
+        (program, program_data) = replay.get_recorded_control_program()
+
+        start_time = time.perf_counter()
+        control = flight_controller.execute(program, program_data, state)
+        execute_s += time.perf_counter() - start_time
+        num_ticks += 1
+
+        recorded_control = replay.get_recorded_flight_control()
+        if control.bIsInputValid and recorded_control.bIsInputValid:
+            control_errors.append((
+                control.fThrottle - recorded_control.fThrottle,
+                control.fPitch - recorded_control.fPitch,
+                control.fYaw - recorded_control.fYaw))
+
+    print("records           : {0}".format(len(replay.records)))
+    print("control ticks     : {0}  ({1} steps, {2} skipped)".format(
+        num_ticks, flight_controller.step_count, flight_controller.skipped_step_count))
+    if num_ticks > 0:
+        print("execute (per tick): {0:8.2f} us".format(execute_s / num_ticks * 1e6))
+    if control_errors:
+        max_errors = np.max(np.abs(np.array(control_errors)), axis=0)
+        print("max abs deviation : throttle={0:.3e} pitch={1:.3e} yaw={2:.3e}".format(*max_errors))
+
+if __name__ == "__main__":
+    main()
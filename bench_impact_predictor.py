@@ -0,0 +1,104 @@
+""" Runs the ImpactPredictor at control loop rate over a simulated descent to the Mun, and compares
+    its predictions with a fine step simulation: impact time and speed in free fall, and where a
+    full-thrust retrograde burn started at the predicted burn start comes to a stop.
+
+    Usage: python bench_impact_predictor.py [altitude_m] [horizontal_speed_m_s]
+"""
+from impact_predictor import ImpactPredictor
+from ksp_types import VesselTrajectoryState
+import math, sys, time
+import numpy as np
+
+#
+# Constants
+#
+MU = 6.5138398e10 # Mun
+GROUND_RADIUS = 200000.0
+THRUST_N = 60000.0
+MASS_KG = 4000.0
+CONTROL_RATE_HZ = 50.0
+REFERENCE_STEP_S = 0.002
+
+#
+# Functions
+#
+def reference_step(pos: np.ndarray, vel: np.ndarray, thrust_accel: float, dt: float) -> None:
+    """ One RK2 step in the plane of motion, thrusting retrograde at thrust_accel. """
+    def accel(p, v):
+        a = -MU * p / np.dot(p, p) ** 1.5
+        speed = math.sqrt(np.dot(v, v))
+        if (thrust_accel > 0.0) and (speed > 0.0):
+            a = a - thrust_accel * v / speed
+        return a
+    mid_pos = pos + 0.5 * dt * vel
+    mid_vel = vel + 0.5 * dt * accel(pos, vel)
+    pos += dt * mid_vel
+    vel += dt * accel(mid_pos, mid_vel)
+
+def trajectory_state(ut: float, pos: np.ndarray, vel: np.ndarray) -> VesselTrajectoryState:
+    radius = math.sqrt(np.dot(pos, pos))
+    return VesselTrajectoryState(True, ut, radius, float(np.dot(pos, vel)) / radius,
+                                 abs(float(pos[0] * vel[1] - pos[1] * vel[0])), GROUND_RADIUS, MU, MASS_KG, THRUST_N)
+
+def main() -> None:
+    altitude = float(sys.argv[1]) if len(sys.argv) > 1 else 10000.0
+    horizontal_speed = float(sys.argv[2]) if len(sys.argv) > 2 else 300.0
+    start_pos = np.array([GROUND_RADIUS + altitude, 0.0])
+    start_vel = np.array([0.0, horizontal_speed])
+
+    # Free fall, predicting every control tick
+    predictor = ImpactPredictor()
+    if not predictor.predict(trajectory_state(0.0, start_pos, start_vel)).bIsImpactPredicted:
+        print("no impact: the orbit doesn't meet the ground")
+        return
+    predictor = ImpactPredictor()
+    pos = start_pos.copy()
+    vel = start_vel.copy()
+    ut = 0.0
+    tick_s = 1.0 / CONTROL_RATE_HZ
+    steps_per_tick = int(round(tick_s / REFERENCE_STEP_S))
+    predictions = []
+    predict_times = []
+    while math.sqrt(np.dot(pos, pos)) > GROUND_RADIUS:
+        start_time = time.perf_counter()
+        prediction = predictor.predict(trajectory_state(ut, pos, vel))
+        predict_times.append(time.perf_counter() - start_time)
+        predictions.append((ut, prediction))
+        for _ in range(steps_per_tick):
+            reference_step(pos, vel, 0.0, REFERENCE_STEP_S)
+        ut += tick_s
+    impact_time = ut
+    impact_speed = math.sqrt(np.dot(vel, vel))
+
+    (_, first_prediction) = predictions[0]
+    time_errors = [abs(ut_predicted + prediction.fTimeToImpact - impact_time) for (ut_predicted, prediction) in predictions]
+    predict_times = np.array(predict_times) * 1e6
+    print("ticks              : {0}  ({1} integrations)".format(len(predictions), predictor.integration_count))
+    print("predict (per tick) : mean={0:8.2f} us  p99={1:8.2f} us  max={2:8.2f} us  first={3:8.2f} us".format(
+        predict_times.mean(), np.percentile(predict_times, 99), predict_times.max(), predict_times[0]))
+    print("impact time        : {0:8.2f} s  predicted {1:8.2f} s, max error over the descent {2:.3f} s".format(
+        impact_time, first_prediction.fTimeToImpact, max(time_errors)))
+    print("impact speed       : {0:8.2f} m/s  predicted {1:8.2f} m/s".format(impact_speed, first_prediction.fImpactSpeed))
+
+    # Powered descent, burning from the first predicted burn start
+    burn_start = first_prediction.fTimeToBurnStart
+    if math.isinf(burn_start):
+        print("burn start         : none, the thrust can't stop the vessel")
+        return
+    pos = start_pos.copy()
+    vel = start_vel.copy()
+    t = 0.0
+    thrust_accel = 0.0
+    while True:
+        if t >= burn_start:
+            thrust_accel = THRUST_N / MASS_KG
+        reference_step(pos, vel, thrust_accel, REFERENCE_STEP_S)
+        t += REFERENCE_STEP_S
+        altitude = math.sqrt(np.dot(pos, pos)) - GROUND_RADIUS
+        if (altitude <= 0.0) or (math.sqrt(np.dot(vel, vel)) <= thrust_accel * REFERENCE_STEP_S):
+            break
+    print("burn start         : {0:8.2f} s  {1} at {2:8.2f} m, {3:.2f} m/s".format(
+        burn_start, "landed" if altitude <= 0.0 else "stopped", altitude, math.sqrt(np.dot(vel, vel))))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+""" Micro-benchmark of the flight state kinematics: the previous pyquaternion/util path
+    against FrameKinematics, for single samples and for batches.
+
+    Usage: python bench_kinematics.py [num_samples]
+"""
+from kinematics import FrameKinematics, FORWARD_SPEED_IDX, LATERAL_SPEED_IDX, PITCH_RATE_IDX, YAW_RATE_IDX
+from pyquaternion import Quaternion
+from util import project_a_onto_b, project_vector_a_onto_plane_b, vector_normalize
+import math, sys, time
+import numpy as np
+
+def legacy_kinematics(vessel_pos, vessel_vel, vessel_rot, vessel_ang_vel) -> tuple:
+    """ The math previously done in KspInterface.get_vessel_flight_state. """
+    vessel_pos_vec = np.array([vessel_pos[0], vessel_pos[1], vessel_pos[2]])
+    vessel_pos_mag2 = np.dot(vessel_pos_vec, vessel_pos_vec)
+    vessel_pos_mag = math.sqrt(vessel_pos_mag2)
+    vessel_pos_unit = vessel_pos_vec / vessel_pos_mag
+    vessel_vel_vec = np.array([vessel_vel[0], vessel_vel[1], vessel_vel[2]])
+
+    vessel_rot_q = Quaternion(vessel_rot[3], vessel_rot[0], vessel_rot[1], vessel_rot[2])
+    vessel_fwd = vessel_rot_q.rotate(np.array([0.0, 0.0, 1.0]))
+    vessel_lat = vessel_rot_q.rotate(np.array([1.0, 0.0, 0.0]))
+
+    surface_vessel_fwd = project_vector_a_onto_plane_b(vessel_fwd, vessel_pos_unit)
+    surface_vessel_fwd = vector_normalize(surface_vessel_fwd)
+    surface_vessel_lat = project_vector_a_onto_plane_b(vessel_lat, vessel_pos_unit)
+    surface_vessel_lat = vector_normalize(surface_vessel_lat)
+
+    surface_vessel_vel_fwd = project_a_onto_b(vessel_vel_vec, surface_vessel_fwd)
+    surface_vessel_vel_lat = project_a_onto_b(vessel_vel_vec, surface_vessel_lat)
+
+    vessel_ang_vel_vec = np.array([vessel_ang_vel[0], vessel_ang_vel[1], vessel_ang_vel[2]])
+    vessel_ang_vel_pitch = project_a_onto_b(vessel_ang_vel_vec, vessel_lat)
+    vessel_ang_vel_yaw = project_a_onto_b(vessel_ang_vel_vec, vessel_fwd)
+
+    forward_speed = math.sqrt(np.dot(surface_vessel_vel_fwd, surface_vessel_vel_fwd)) * np.sign(np.dot(surface_vessel_vel_fwd, surface_vessel_fwd))
+    lateral_speed = math.sqrt(np.dot(surface_vessel_vel_lat, surface_vessel_vel_lat)) * np.sign(np.dot(surface_vessel_vel_lat, surface_vessel_lat))
+    pitch_rate = math.sqrt(np.dot(vessel_ang_vel_pitch, vessel_ang_vel_pitch)) * np.sign(np.dot(vessel_ang_vel_pitch, surface_vessel_lat))
+    yaw_rate = math.sqrt(np.dot(vessel_ang_vel_yaw, vessel_ang_vel_yaw)) * np.sign(np.dot(vessel_ang_vel_yaw, surface_vessel_fwd))
+    return (forward_speed, lateral_speed, pitch_rate, yaw_rate)
+
+def make_samples(num_samples: int) -> tuple:
+    rng = np.random.default_rng(0)
+    position = rng.normal(size=(num_samples, 3)) * 600000.0
+    velocity = rng.normal(size=(num_samples, 3)) * 50.0
+    rotation = rng.normal(size=(num_samples, 4))
+    rotation /= np.linalg.norm(rotation, axis=1, keepdims=True)
+    angular_velocity = rng.normal(size=(num_samples, 3))
+    return (position, velocity, rotation, angular_velocity)
+
+def main() -> None:
+    num_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    (position, velocity, rotation, angular_velocity) = make_samples(num_samples)
+
+    # kRPC streams hand out tuples, so feed both single-sample paths with tuples
+    samples = list(zip(
+        map(tuple, position.tolist()),
+        map(tuple, velocity.tolist()),
+        map(tuple, rotation.tolist()),
+        map(tuple, angular_velocity.tolist())))
+
+    start_time = time.perf_counter()
+    legacy = np.array([legacy_kinematics(*sample) for sample in samples])
+    legacy_s = time.perf_counter() - start_time
+
+    kinematics = FrameKinematics()
+    single = np.empty((num_samples, 4))
+    start_time = time.perf_counter()
+    for idx, sample in enumerate(samples):
+        kinematics.update(*sample)
+        single[idx, FORWARD_SPEED_IDX] = kinematics.forward_speed
+        single[idx, LATERAL_SPEED_IDX] = kinematics.lateral_speed
+        single[idx, PITCH_RATE_IDX] = kinematics.pitch_rate
+        single[idx, YAW_RATE_IDX] = kinematics.yaw_rate
+    single_s = time.perf_counter() - start_time
+
+    batch = np.empty((num_samples, 4))
+    start_time = time.perf_counter()
+    FrameKinematics.compute_batch(position, velocity, rotation, angular_velocity, out=batch)
+    batch_s = time.perf_counter() - start_time
+
+    print("samples           : {0}".format(num_samples))
+    print("legacy (per call) : {0:8.2f} us".format(legacy_s / num_samples * 1e6))
+    print("single (per call) : {0:8.2f} us   {1:5.1f}x".format(single_s / num_samples * 1e6, legacy_s / single_s))
+    print("batch (per sample): {0:8.3f} us   {1:5.1f}x".format(batch_s / num_samples * 1e6, legacy_s / batch_s))
+    print("max abs error     : single={0:.3e} batch={1:.3e}".format(
+        np.max(np.abs(single - legacy)), np.max(np.abs(batch - legacy))))
+
+if __name__ == "__main__":
+    main()
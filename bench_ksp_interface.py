@@ -0,0 +1,130 @@
+""" End-to-end benchmark of KspInterface against the local fake kRPC server.
+
+    Measures connection and stream setup time, the per-call cost of the read API
+    and of control writes, the latency of control writes while low-priority queries
+    are in flight, and the time to recover from a dropped connection.
+
+    With --vessels N, the other N-1 vessels of the fake server are tracked as well.
+
+    Usage: python bench_ksp_interface.py [--latency-ms N] [--calls N] [--pool-size N] [--vessels N]
+"""
+from config import TRACKED_RESOURCES
+from fake_krpc_server import FakeKrpcServer
+from ksp_interface import KspInterface
+from ksp_types import VesselFlightControl
+import argparse, itertools, threading, time
+import numpy as np
+
+#
+# Constants
+#
+BENCH_ADDRESS = "127.0.0.1"
+BENCH_RPC_PORT = 51000
+BENCH_STREAM_PORT = 51001
+
+def connect_and_stream(krpc: KspInterface, timeout_s: float, stale_connection=None) -> float:
+    """ Drives the connection the way the monitor loop does, and returns the time until flight state
+        is valid on a connection other than stale_connection. """
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < timeout_s:
+        krpc.check_connection_health()
+        krpc.setup_connection_if_needed()
+        krpc.setup_data_streams_if_needed()
+        is_reconnected = (stale_connection is None) or (krpc.krpc_connection is not stale_connection)
+        if is_reconnected and krpc.get_vessel_flight_state().bIsDataValid:
+            return time.perf_counter() - start_time
+        time.sleep(0.01)
+    raise TimeoutError("KspInterface did not recover within {0} s".format(timeout_s))
+
+def time_calls(fn, num_calls: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(num_calls):
+        fn()
+    return (time.perf_counter() - start_time) / num_calls
+
+def query_vessel_orbit(connection) -> float:
+    """ A low-priority query of a few round trips. """
+    return connection.space_center.active_vessel.orbit.period
+
+def vary_control(control: VesselFlightControl, call_idx: int) -> VesselFlightControl:
+    """ Moves every axis past the control write deadband, so that each call writes all of them. """
+    offset = 0.01 * (call_idx % 2)
+    control.fThrottle = 0.5 + offset
+    control.fPitch = offset
+    control.fYaw = -offset
+    return control
+
+def time_control_under_load(krpc: KspInterface, num_calls: int, num_loaders: int) -> np.ndarray:
+    """ Returns the latency of each control write while num_loaders threads keep low-priority
+        queries in flight, on the pool when there is one, or else on the main connection. """
+    control = VesselFlightControl(True, 0.5, 0.0, 0.0)
+    is_loading = True
+    def load():
+        while is_loading:
+            if krpc.pool is not None:
+                krpc.pool.submit(query_vessel_orbit).result()
+            else:
+                query_vessel_orbit(krpc.krpc_connection)
+    loaders = [threading.Thread(target=load, daemon=True) for _ in range(num_loaders)]
+    for loader in loaders:
+        loader.start()
+
+    latencies_s = np.empty(num_calls)
+    for idx in range(num_calls):
+        start_time = time.perf_counter()
+        krpc.set_flight_controls(vary_control(control, idx))
+        latencies_s[idx] = time.perf_counter() - start_time
+
+    is_loading = False
+    for loader in loaders:
+        loader.join()
+    return latencies_s
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark KspInterface against the fake kRPC server.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--vessels", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeKrpcServer(BENCH_ADDRESS, BENCH_RPC_PORT, BENCH_STREAM_PORT, latency_s=args.latency_ms / 1000.0,
+        num_vessels=args.vessels)
+    server.start()
+    krpc = KspInterface(BENCH_ADDRESS, BENCH_RPC_PORT, BENCH_STREAM_PORT, TRACKED_RESOURCES,
+        is_rpc_accounting_enabled=True, pool_size=args.pool_size,
+        tracked_vessel_names=[vessel.name for vessel in server.vessels[1:]])
+    try:
+        print("connect + stream setup : {0:8.1f} ms".format(connect_and_stream(krpc, 30.0) * 1000.0))
+
+        control = VesselFlightControl(True, 0.5, 0.0, 0.0)
+        call_counter = itertools.count()
+        for (name, fn) in (
+                ("get_vessel_flight_state", krpc.get_vessel_flight_state),
+                ("get_fleet_flight_states", krpc.get_fleet_flight_states),
+                ("get_vessel_attitude", krpc.get_vessel_attitude),
+                ("get_vessel_orbital_parameters", krpc.get_vessel_orbital_parameters),
+                ("get_vessel_resources", krpc.get_vessel_resources),
+                ("get_krpc_status", krpc.get_krpc_status),
+                ("set_flight_controls", lambda: krpc.set_flight_controls(vary_control(control, next(call_counter))))):
+            num_calls = args.calls if name != "set_flight_controls" else max(1, args.calls // 10)
+            per_call_s = time_calls(fn, num_calls)
+            print("{0:30s} : {1:8.1f} us/call".format(name, per_call_s * 1e6))
+
+        for (name, num_loaders) in (("set_flight_controls idle", 0), ("set_flight_controls loaded", 2)):
+            latencies_s = time_control_under_load(krpc, max(1, args.calls // 10), num_loaders)
+            print("{0:30s} : p50 {1:8.1f} us   p99 {2:8.1f} us".format(
+                name, np.percentile(latencies_s, 50) * 1e6, np.percentile(latencies_s, 99) * 1e6))
+
+        print("monitored vessels      : {0:8d}".format(len(krpc.get_vessel_names())))
+        stale_connection = krpc.krpc_connection
+        server.drop_clients()
+        print("reconnect after drop   : {0:8.1f} ms".format(connect_and_stream(krpc, 30.0, stale_connection) * 1000.0))
+        print()
+        print(krpc.rpc_accounting.get_report_str())
+    finally:
+        krpc.deinit_connection()
+        server.stop()
+
+if __name__ == "__main__":
+    main()
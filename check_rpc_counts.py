@@ -0,0 +1,95 @@
+""" Checks that KspInterface makes no RPC in a steady-state control tick, against the local fake
+    kRPC server. Everything a tick reads comes from streams and local propagation, and an unchanged
+    control isn't sent again, so any RPC counted here is a regression of the control path.
+
+    Ticks are run coasting, then thrusting, with a constant control. While thrusting, the orbit is
+    queried from the server on the connection pool, one query after the other; those queries are left
+    out, as is the heartbeat of the connection health monitor, which runs on its own schedule.
+    Exits with a non-zero status on failure.
+
+    Usage: python check_rpc_counts.py [--ticks N] [--vessels N]
+"""
+from bench_ksp_interface import BENCH_ADDRESS, BENCH_RPC_PORT, BENCH_STREAM_PORT, connect_and_stream
+from config import TRACKED_RESOURCES
+from fake_krpc_server import FakeKrpcServer
+from ksp_interface import KspInterface
+from ksp_types import VesselFlightControl
+import argparse, sys, time
+
+#
+# Constants
+#
+CONTROL_TICK_S = 1.0 / 30.0
+WARMUP_TIMEOUT_S = 10.0
+HEARTBEAT_METHOD_PREFIXES = ("connection_health.",)
+ORBIT_FALLBACK_METHOD_PREFIXES = ("ksp_interface.__query_orbit_fallback",)
+
+def control_tick(krpc: KspInterface, control: VesselFlightControl) -> None:
+    """ The KspInterface calls of one control tick of the app, for every monitored vessel. """
+    krpc.get_fleet_flight_states()
+    krpc.get_vessel_attitude()
+    krpc.get_vessel_trajectory_state()
+    krpc.get_vessel_orbital_parameters()
+    krpc.get_vessel_resources()
+    for vessel_idx in range(len(krpc.get_vessel_names())):
+        krpc.set_vessel_flight_controls(vessel_idx, control)
+
+def get_rpc_counts(krpc: KspInterface, excluded_method_prefixes: tuple) -> dict:
+    """ Returns the RPC count of each calling method, but the excluded ones. """
+    return {method_name: stats.count for (method_name, stats) in krpc.rpc_accounting.get_method_stats().items()
+            if (stats.count > 0) and (not method_name.startswith(excluded_method_prefixes))}
+
+def check_steady_state(krpc: KspInterface, phase_name: str, control: VesselFlightControl, num_ticks: int,
+                       excluded_method_prefixes: tuple) -> bool:
+    """ Runs control ticks until the orbital parameters are valid and the control has been written,
+        then checks that num_ticks more ticks make no RPC. """
+    deadline = time.monotonic() + WARMUP_TIMEOUT_S
+    control_tick(krpc, control)
+    while not krpc.get_vessel_orbital_parameters().bIsDataValid:
+        if time.monotonic() > deadline:
+            print("FAIL: {0}: no orbital parameters within {1} s".format(phase_name, WARMUP_TIMEOUT_S))
+            return False
+        control_tick(krpc, control)
+        time.sleep(CONTROL_TICK_S)
+    time.sleep(0.5) # let the throttle stream catch up with the last write
+    control_tick(krpc, control)
+    krpc.rpc_accounting.reset()
+
+    for _ in range(num_ticks):
+        control_tick(krpc, control)
+        time.sleep(CONTROL_TICK_S)
+
+    rpc_counts = get_rpc_counts(krpc, excluded_method_prefixes)
+    num_rpcs = sum(rpc_counts.values())
+    if num_rpcs > 0:
+        print("FAIL: {0}: {1} RPCs over {2} steady-state control ticks".format(phase_name, num_rpcs, num_ticks))
+        for (method_name, count) in sorted(rpc_counts.items(), key=lambda item: -item[1]):
+            print("  {0:48s} {1:8d}".format(method_name, count))
+        return False
+    print("OK: {0}: 0 RPCs over {1} steady-state control ticks".format(phase_name, num_ticks))
+    return True
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the RPC count of a steady-state control tick.")
+    parser.add_argument("--ticks", type=int, default=60)
+    parser.add_argument("--vessels", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeKrpcServer(BENCH_ADDRESS, BENCH_RPC_PORT, BENCH_STREAM_PORT, num_vessels=args.vessels)
+    server.start()
+    krpc = KspInterface(BENCH_ADDRESS, BENCH_RPC_PORT, BENCH_STREAM_PORT, TRACKED_RESOURCES,
+        is_rpc_accounting_enabled=True, pool_size=1,
+        tracked_vessel_names=[vessel.name for vessel in server.vessels[1:]])
+    try:
+        connect_and_stream(krpc, 30.0)
+        is_coasting_ok = check_steady_state(krpc, "coasting", VesselFlightControl(True, 0.0, 0.0, 0.0), args.ticks,
+            HEARTBEAT_METHOD_PREFIXES)
+        is_thrusting_ok = check_steady_state(krpc, "thrusting", VesselFlightControl(True, 0.5, 0.0, 0.0), args.ticks,
+            HEARTBEAT_METHOD_PREFIXES + ORBIT_FALLBACK_METHOD_PREFIXES)
+        return 0 if (is_coasting_ok and is_thrusting_ok) else 1
+    finally:
+        krpc.deinit_connection()
+        server.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os, sys, tempfile
+
 # Set these to match where the kRPC mod's server is listening to.
 # https://krpc.github.io/krpc/
 #
@@ -5,7 +7,57 @@ KRPC_IP_ADDRESS="127.0.0.1"
 KRPC_RPC_PORT=50000
 KRPC_STREAM_PORT=50001
 
-# For use with the `k-ball` program.
+# Extra kRPC connections serving low-priority queries (orbit refreshes), so that they
+# never queue behind control requests on the main connection. 0 runs them on the main one.
+#
+KRPC_POOL_SIZE=2
+
+# Shared-memory telemetry block, for use with the `k-ball` program.
 # https://github.com/Vivero/k-ball
+# On Linux, keep it under /dev/shm so that it never touches the disk.
+# Can be overridden with `--mmap-file`.
+#
+if sys.platform == "win32":
+    KBALL_MMAP_INTERFACE_FILE=r'C:\Users\Public\ksp_mmap.bin'
+elif os.path.isdir("/dev/shm"):
+    KBALL_MMAP_INTERFACE_FILE="/dev/shm/ksp_mmap.bin"
+else:
+    KBALL_MMAP_INTERFACE_FILE=os.path.join(tempfile.gettempdir(), "ksp_mmap.bin")
+
+# Resources totalled across the active vessel and shown in the Supplies panel.
+# Names must match the KSP resource names.
+#
+TRACKED_RESOURCES=["Water", "Food", "Oxygen", "Atmosphere", "WasteAtmosphere"]
+
+# Window of universal time over which the Supplies panel estimates consumption rates,
+# and from them the time until each resource runs out or fills up.
+#
+SUPPLIES_FORECAST_WINDOW_S=3600.0
+
+# Vessels monitored and controlled alongside the active vessel, by name. The 'v' key
+# cycles the vessel shown on the UI; each vessel runs its own control program.
+#
+TRACKED_VESSELS=[]
+
+# Control writes to the kRPC server. An axis is only sent when it has moved by more than
+# the deadband since it was last sent (or reaches an end or the center of its range), and
+# a vessel's controls are sent at most at the given rate, 0 for every control tick.
+#
+CONTROL_WRITE_DEADBAND=0.001
+CONTROL_WRITE_MAX_RATE_HZ=0.0
+
+# Count the RPC round trips made to the kRPC server, per calling method and per
+# control tick. The report is shown with the 'p' key, and written to the file
+# below on exit (leave empty to skip). Every RPC pays for the counting, so it's
+# off unless turned on here or with `--rpc-accounting`.
+#
+IS_RPC_ACCOUNTING_ENABLED=False
+RPC_ACCOUNTING_REPORT_FILE="rpc_report.txt"
+
+# UDP telemetry for networked cockpit displays. Leave the address empty to disable it.
+# Multicast addresses (224.0.0.0/4) are supported. Rates are per channel, 0 disables a channel.
+# The address can be overridden with `--udp-address`.
 #
-KBALL_MMAP_INTERFACE_FILE=r'C:\Users\Public\ksp_mmap.bin'
+UDP_TELEMETRY_ADDRESS=""
+UDP_TELEMETRY_PORT=50100
+UDP_TELEMETRY_RATES_HZ={"attitude": 30.0, "flight_state": 10.0}
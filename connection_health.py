@@ -0,0 +1,96 @@
+from collections import deque
+import threading, time
+import numpy as np
+
+class ConnectionHealth:
+    """ Measures the health of a kRPC connection from a low-rate heartbeat thread.
+        Nothing here issues RPCs from the caller's thread; the results are read from cached timestamps. """
+
+    #
+    # Constants
+    #
+    HEARTBEAT_INTERVAL_S = 1.0
+    DEAD_TIMEOUT_S = 3.0 # connection is flagged dead when no heartbeat has succeeded for this long
+    RTT_SAMPLE_COUNT = 120
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.rtt_samples_s = deque(maxlen=self.RTT_SAMPLE_COUNT)
+        self.rtt_lock = threading.Lock()
+        self.heartbeat_thread = None
+        self.heartbeat_stop = threading.Event()
+        self.heartbeat_fn = None
+        self.last_heartbeat_ok_time = time.monotonic()
+        self.last_stream_update_time = time.monotonic()
+        self.heartbeat_failure = None
+
+    #
+    # Public Methods
+    #
+    def start(self, heartbeat_fn) -> None:
+        """ Starts heartbeating with heartbeat_fn, a blocking callable that performs one round trip. """
+        self.stop()
+        with self.rtt_lock:
+            self.rtt_samples_s.clear()
+        now = time.monotonic()
+        self.last_heartbeat_ok_time = now
+        self.last_stream_update_time = now
+        self.heartbeat_failure = None
+        self.heartbeat_fn = heartbeat_fn
+        self.heartbeat_stop = threading.Event()
+        self.heartbeat_thread = threading.Thread(target=self._heartbeat_thread, args=(self.heartbeat_stop,), daemon=True)
+        self.heartbeat_thread.start()
+
+    def stop(self) -> None:
+        # the thread is not joined, as it may be blocked on a dead connection
+        self.heartbeat_stop.set()
+        self.heartbeat_thread = None
+
+    def on_stream_update(self) -> None:
+        """ Stream update callback, called from the kRPC stream thread. """
+        self.last_stream_update_time = time.monotonic()
+
+    def is_alive(self) -> bool:
+        if self.heartbeat_failure is not None:
+            return False
+        return (time.monotonic() - self.last_heartbeat_ok_time) < self.DEAD_TIMEOUT_S
+
+    def get_stream_lag_s(self) -> float:
+        """ Time elapsed since the last stream update was received. """
+        return time.monotonic() - self.last_stream_update_time
+
+    def get_rtt_stats_s(self) -> tuple:
+        """ Returns the round trip time statistics as a tuple: (min, avg, p99), or None without samples. """
+        with self.rtt_lock:
+            if not self.rtt_samples_s:
+                return None
+            samples = np.fromiter(self.rtt_samples_s, dtype=np.float64, count=len(self.rtt_samples_s))
+        return (float(samples.min()), float(samples.mean()), float(np.percentile(samples, 99)))
+
+    def get_health_str(self) -> str:
+        rtt_stats = self.get_rtt_stats_s()
+        if rtt_stats is None:
+            rtt_str = "RTT --"
+        else:
+            rtt_str = "RTT {0:.1f}/{1:.1f}/{2:.1f} ms".format(rtt_stats[0] * 1000.0, rtt_stats[1] * 1000.0, rtt_stats[2] * 1000.0)
+        return "{0}  lag {1:.0f} ms".format(rtt_str, self.get_stream_lag_s() * 1000.0)
+
+    #
+    # Private Methods
+    #
+    def _heartbeat_thread(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            start_time = time.perf_counter()
+            try:
+                self.heartbeat_fn()
+            except Exception as e:
+                if not stop.is_set():
+                    self.heartbeat_failure = e
+                return
+            rtt_s = time.perf_counter() - start_time
+            with self.rtt_lock:
+                self.rtt_samples_s.append(rtt_s)
+            self.last_heartbeat_ok_time = time.monotonic()
+            stop.wait(self.HEARTBEAT_INTERVAL_S)
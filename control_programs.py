@@ -0,0 +1,214 @@
+from ksp_types import VesselFlightControl, VesselFlightState
+from pid_bank import PidBank
+import dataclasses
+import numpy as np
+
+#
+# Constants
+#
+# PID loops of a FlightController's bank, in the order of the contiguous ranges the programs step
+VSPEED_LOOP = 0
+PITCH_LOOP = 1
+YAW_LOOP = 2
+FWD_LOOP = 3
+LAT_LOOP = 4
+NUM_LOOPS = 5
+LOOP_FIELDS = ("fVerticalSpeed", "fPitchSpeed", "fYawSpeed", "fForwardSpeed", "fLateralSpeed") # measured by each loop
+
+#
+# Types
+#
+class GainSchedule:
+    """ Gains of a loop scheduled on the ratio of two telemetry fields, the ultimate gain:
+        ku = factor * numerator / denominator, falling back to default_ku when the denominator isn't
+        positive. The gains are the ratios times ku, and are only written when ku changes. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, loop: int, numerator_field: str, denominator_field: str, factor: float,
+                 kp_ratio: float, ki_ratio: float, kd_ratio: float, default_ku: float = 0.0):
+        self.loop = loop
+        self.numerator_field = numerator_field
+        self.denominator_field = denominator_field
+        self.factor = factor
+        self.kp_ratio = kp_ratio
+        self.ki_ratio = ki_ratio
+        self.kd_ratio = kd_ratio
+        self.default_ku = default_ku
+        self.ku = None
+
+    #
+    # Public Methods
+    #
+    def invalidate(self) -> None:
+        """ Has the gains written on the next apply(), when another program may have changed them. """
+        self.ku = None
+
+    def apply(self, pid_bank: PidBank, state: VesselFlightState) -> None:
+        denominator = getattr(state, self.denominator_field)
+        ku = self.factor * getattr(state, self.numerator_field) / denominator if denominator > 0.0 else self.default_ku
+        if ku != self.ku:
+            self.ku = ku
+            pid_bank.kp[self.loop] = self.kp_ratio * ku
+            pid_bank.ki[self.loop] = self.ki_ratio * ku
+            pid_bank.kd[self.loop] = self.kd_ratio * ku
+
+class ControlProgram:
+    """ Base of the control programs run by FlightController, one instance per controller.
+
+        A program measures the loops from LOOPS[0] to LOOPS[1] (excluded) of the controller's bank,
+        schedules their gains with GAIN_SCHEDULES and writes its output into a control allocated once,
+        so that a step allocates neither arrays nor results. TELEMETRY_FIELDS lists the other fields of
+        VesselFlightState that the program reads. """
+
+    #
+    # Constants
+    #
+    NAME = "" # as selected by the UI, external input and recordings
+    TITLE = "" # as listed on the UI
+    LOOPS = (0, 0)
+    GAIN_SCHEDULES = ()
+    TELEMETRY_FIELDS = ()
+
+    #
+    # Constructor
+    #
+    def __init__(self, pid_bank: PidBank, measurements: np.ndarray):
+        self.pid_bank = pid_bank
+        self.measurements = measurements
+        self.measured_loops = tuple((loop, LOOP_FIELDS[loop]) for loop in range(*self.LOOPS))
+        self.gain_schedules = tuple(GainSchedule(*gain_schedule) for gain_schedule in self.GAIN_SCHEDULES)
+        self.control = VesselFlightControl(False, 0.0, 0.0, 0.0)
+
+        # execution time, measured by the controller
+        self.execute_count = 0
+        self.execute_time_s = 0.0
+
+    #
+    # Public Methods
+    #
+    @classmethod
+    def get_telemetry_fields(cls) -> tuple:
+        """ Returns every field of VesselFlightState that the program reads, measured or not. """
+        fields = [LOOP_FIELDS[loop] for loop in range(*cls.LOOPS)]
+        for gain_schedule in cls.GAIN_SCHEDULES:
+            fields.extend(gain_schedule[1:3])
+        fields.extend(cls.TELEMETRY_FIELDS)
+        return tuple(dict.fromkeys(fields))
+
+    def activate(self) -> None:
+        """ Called when the controller switches to this program. """
+        for gain_schedule in self.gain_schedules:
+            gain_schedule.invalidate()
+
+    def execute(self, state: VesselFlightState, program_data: float, timestamp: float) -> VesselFlightControl:
+        measurements = self.measurements
+        for (loop, field) in self.measured_loops:
+            measurements[loop] = getattr(state, field)
+        for gain_schedule in self.gain_schedules:
+            gain_schedule.apply(self.pid_bank, state)
+        self._step(state, program_data, timestamp)
+        return self.control
+
+    def get_stats_str(self) -> str:
+        mean_time_us = self.execute_time_s / self.execute_count * 1e6 if self.execute_count > 0 else 0.0
+        return "{0:>10}: steps={1:8d}  exec={2:8.2f} us".format(self.NAME, self.execute_count, mean_time_us)
+
+    #
+    # Private Methods
+    #
+    def _step(self, state: VesselFlightState, program_data: float, timestamp: float) -> None:
+        self.control.bIsInputValid = False
+
+class ManualProgram(ControlProgram):
+    NAME = "manual"
+    TITLE = "Manual"
+
+class VSpeedProgram(ControlProgram):
+    """ Holds the vertical speed at program_data with the throttle. """
+
+    NAME = "vspeed"
+    TITLE = "Maintain VSpeed"
+    LOOPS = (VSPEED_LOOP, VSPEED_LOOP + 1)
+    GAIN_SCHEDULES = (
+        # ultimate gain: weight over max thrust
+        (VSPEED_LOOP, "fWeight", "fThrustMax", 1.0, 0.70, 1.0 / 3.0, 1.0 / 50.0),
+    )
+    TELEMETRY_FIELDS = ("fThrustMax",)
+
+    def __init__(self, pid_bank: PidBank, measurements: np.ndarray):
+        super().__init__(pid_bank, measurements)
+        self.vspeed_loops = pid_bank.create_group(VSPEED_LOOP, VSPEED_LOOP + 1, measurements)
+
+    def _step(self, state: VesselFlightState, program_data: float, timestamp: float) -> None:
+        control = self.control
+        if state.fThrustMax > 0.0:
+            self.pid_bank.set_point[VSPEED_LOOP] = program_data
+            output = self.vspeed_loops.update(timestamp)
+            control.fThrottle = output[0]
+            control.bIsInputValid = True
+        else:
+            control.bIsInputValid = False
+
+class AttitudeProgram(ControlProgram):
+    """ Nulls out the forward and lateral speeds by pitch and yaw, the outer speed loops feeding the
+        set-points of the inner rate loops, and holds the vertical speed at program_data. """
+
+    NAME = "attitude"
+    TITLE = "Maintain Attitude"
+    LOOPS = (VSPEED_LOOP, NUM_LOOPS)
+    GAIN_SCHEDULES = (
+        (VSPEED_LOOP, "fWeight", "fThrustMax", 1.0, 0.70, 1.0 / 3.0, 1.0 / 50.0),
+        # ultimate gains of the rate loops: moment of inertia over max torque
+        (PITCH_LOOP, "fPitchMomentOfInertia", "fPitchTorqueMax", 10.0, 0.70, 0.0, 0.0, 1.0),
+        (YAW_LOOP, "fYawMomentOfInertia", "fYawTorqueMax", 10.0, 0.70, 0.0, 0.0, 1.0),
+    )
+    TELEMETRY_FIELDS = ("fThrustMax",)
+
+    def __init__(self, pid_bank: PidBank, measurements: np.ndarray):
+        super().__init__(pid_bank, measurements)
+        self.speed_loops = pid_bank.create_group(FWD_LOOP, LAT_LOOP + 1, measurements)
+        self.attitude_loops = pid_bank.create_group(PITCH_LOOP, YAW_LOOP + 1, measurements)
+        self.vspeed_attitude_loops = pid_bank.create_group(VSPEED_LOOP, YAW_LOOP + 1, measurements)
+
+    def _step(self, state: VesselFlightState, program_data: float, timestamp: float) -> None:
+        bank = self.pid_bank
+        control = self.control
+
+        # null out forward and lateral speed
+        self.speed_loops.update(timestamp)
+        bank.set_point[PITCH_LOOP] = bank.output[FWD_LOOP]
+        bank.set_point[YAW_LOOP] = -bank.output[LAT_LOOP]
+
+        if state.fThrustMax > 0.0:
+            # null out the vertical speed
+            bank.set_point[VSPEED_LOOP] = program_data
+            self.vspeed_attitude_loops.update(timestamp)
+            control.fThrottle = bank.output[VSPEED_LOOP]
+        else:
+            self.attitude_loops.update(timestamp)
+            control.fThrottle = 0.0
+        control.fPitch = -bank.output[PITCH_LOOP]
+        control.fYaw = -bank.output[YAW_LOOP]
+        control.bIsInputValid = True
+
+#
+# Functions
+#
+def check_control_program(program_class: type) -> type:
+    """ Checks that the fields the program declares exist in VesselFlightState. """
+    state_fields = {field.name for field in dataclasses.fields(VesselFlightState)}
+    for field in program_class.get_telemetry_fields():
+        assert field in state_fields, "{0}: no telemetry field {1}".format(program_class.__name__, field)
+    return program_class
+
+#
+# Registry
+#
+# Control programs, in the order they are listed on the UI
+CONTROL_PROGRAMS = tuple(check_control_program(program_class) for program_class in (
+    ManualProgram,
+    VSpeedProgram,
+    AttitudeProgram,
+))
@@ -0,0 +1,468 @@
+""" A local stand-in for the kRPC server, for integration and load testing without KSP.
+
+    Speaks the kRPC protobuf RPC and stream protocols and serves a scripted vessel on an elliptical
+    orbit around Kerbin, with the procedures that KspInterface uses. The python client's pre-generated
+    service stubs are used on the client side, so the services are only announced by name.
+
+    Usage: python fake_krpc_server.py [--latency-ms N] [--stream-rate-hz N] [--warp N]
+"""
+from config import KRPC_IP_ADDRESS, KRPC_RPC_PORT, KRPC_STREAM_PORT
+from orbit_propagator import solve_kepler_equation, true_anomaly_from_eccentric_anomaly
+import argparse, math, os, socket, threading, time, types
+
+from krpc.decoder import Decoder
+from krpc.encoder import Encoder
+from krpc.types import Types
+import krpc.schema.KRPC_pb2 as KRPC
+
+#
+# Protocol Types
+#
+_TYPES = Types()
+T_OBJECT = _TYPES.uint64_type
+T_UINT64 = _TYPES.uint64_type
+T_STRING = _TYPES.string_type
+T_FLOAT = _TYPES.float_type
+T_DOUBLE = _TYPES.double_type
+T_BOOL = _TYPES.bool_type
+T_CALL = _TYPES.procedure_call_type
+T_VEC3 = _TYPES.tuple_type(T_DOUBLE, T_DOUBLE, T_DOUBLE)
+T_QUAT = _TYPES.tuple_type(T_DOUBLE, T_DOUBLE, T_DOUBLE, T_DOUBLE)
+T_TORQUE = _TYPES.tuple_type(T_VEC3, T_VEC3)
+T_CLASS = _TYPES.class_type("SpaceCenter", "Vessel") # any class type, all are encoded as object ids
+T_CLASS_LIST = _TYPES.list_type(T_CLASS)
+T_ENUM = _TYPES.enumeration_type("SpaceCenter", "VesselSituation")
+T_STREAM = _TYPES.stream_type
+T_STATUS = _TYPES.status_type
+T_SERVICES = _TYPES.services_type
+
+class _RemoteRef:
+    """ Encodes as a remote object reference. """
+    def __init__(self, object_id: int):
+        self._object_id = object_id
+
+class FakeRpcError(Exception):
+    pass
+
+#
+# Scripted Vessel
+#
+class ScriptedVessel:
+    """ A vessel coasting on a Keplerian orbit, slowly rotating, and consuming life support resources. """
+
+    #
+    # Constants
+    #
+    CBODY_NAME = "Kerbin"
+    CBODY_MASS = 5.2915158e22
+    CBODY_GRAV_PARAM = 3.5316e12
+    CBODY_RADIUS = 600000.0
+    SITUATION_ORBITING = 1 # SpaceCenter.VesselSituation.orbiting
+    ROTATION_RATE = 0.05 # rad/s about the body's y axis
+
+    #
+    # Constructor
+    #
+    def __init__(self, name: str, semi_major_axis=700000.0, eccentricity=0.01, mean_anomaly_at_epoch=0.0, epoch=0.0):
+        self.name = name
+        self.semi_major_axis = semi_major_axis
+        self.eccentricity = eccentricity
+        self.mean_anomaly_at_epoch = mean_anomaly_at_epoch
+        self.epoch = epoch
+        self.mean_motion = math.sqrt(self.CBODY_GRAV_PARAM / semi_major_axis ** 3)
+        self.mass = 12000.0
+        self.max_thrust = 200000.0
+        self.available_torque = ((20000.0, 20000.0, 20000.0), (-20000.0, -20000.0, -20000.0))
+        self.moment_of_inertia = (15000.0, 3000.0, 15000.0)
+        self.throttle = 0.0
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.resources = {
+            # name: (initial amount, max, consumption rate per second of game time)
+            "Water": (400.0, 500.0, 0.002),
+            "Food": (300.0, 400.0, 0.001),
+            "Oxygen": (8000.0, 10000.0, 0.05),
+            "Atmosphere": (900.0, 1000.0, 0.0),
+            "WasteAtmosphere": (0.0, 200.0, -0.01),
+            "LiquidFuel": (3600.0, 3600.0, 0.0),
+            "Oxidizer": (4400.0, 4400.0, 0.0),
+        }
+
+    #
+    # Public Methods
+    #
+    def get_orbit_state(self, ut: float) -> tuple:
+        """ Returns (mean anomaly, true anomaly, position, velocity) in the body's reference frame. """
+        e = self.eccentricity
+        mean_anomaly = (self.mean_anomaly_at_epoch + self.mean_motion * (ut - self.epoch)) % (2.0 * math.pi)
+        true_anomaly = float(true_anomaly_from_eccentric_anomaly(solve_kepler_equation(mean_anomaly, e), e))
+        p = self.semi_major_axis * (1.0 - e * e)
+        r = p / (1.0 + e * math.cos(true_anomaly))
+        v_scale = math.sqrt(self.CBODY_GRAV_PARAM / p)
+        position = (r * math.cos(true_anomaly), 0.0, r * math.sin(true_anomaly))
+        velocity = (-v_scale * math.sin(true_anomaly), 0.0, v_scale * (e + math.cos(true_anomaly)))
+        return (mean_anomaly, true_anomaly, position, velocity)
+
+    def get_rotation(self, ut: float) -> tuple:
+        half_angle = 0.5 * self.ROTATION_RATE * ut
+        return (0.0, math.sin(half_angle), 0.0, math.cos(half_angle))
+
+    def get_vertical_speed(self, ut: float) -> float:
+        (_, _, position, velocity) = self.get_orbit_state(ut)
+        r = math.sqrt(sum(x * x for x in position))
+        return sum(p * v for p, v in zip(position, velocity)) / r
+
+    def get_resource(self, name: str, ut: float) -> tuple:
+        """ Returns (amount, max) of a resource, zero for resources the vessel doesn't carry. """
+        if name not in self.resources:
+            return (0.0, 0.0)
+        (initial, max_amount, rate) = self.resources[name]
+        return (min(max_amount, max(0.0, initial - rate * ut)), max_amount)
+
+#
+# Server
+#
+class FakeKrpcServer:
+    #
+    # Constants
+    #
+    VERSION = "0.5.3"
+    SURFACE_FRAME_ID = 1 # reference frame used when Vessel.Flight is called without one
+
+    #
+    # Constructor
+    #
+    def __init__(self, address=KRPC_IP_ADDRESS, rpc_port=KRPC_RPC_PORT, stream_port=KRPC_STREAM_PORT,
+                 latency_s=0.0, stream_rate_hz=50.0, time_warp=1.0, num_vessels=1):
+        self.address = address
+        self.rpc_port = rpc_port
+        self.stream_port = stream_port
+        self.latency_s = latency_s
+        self.stream_period_s = 1.0 / stream_rate_hz
+        self.time_warp = time_warp
+        self.start_time = time.monotonic()
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.clients = {}
+        self.sockets = []
+        self.rpc_count = 0
+
+        # remote objects, by id
+        self.objects = {}
+        self.object_ids = {}
+        self.cbody_frame_id = self._object_id(("frame", "cbody"))
+        self.vessels = []
+        for idx in range(num_vessels):
+            vessel = ScriptedVessel("Vessel {0}".format(idx + 1), mean_anomaly_at_epoch=0.2 * idx)
+            self.vessels.append(vessel)
+            self._object_id(("vessel", vessel))
+        self.active_vessel = self.vessels[0]
+
+        self.procedures = {
+            ("KRPC", "GetStatus"): ([], T_STATUS, self._get_status),
+            ("KRPC", "GetServices"): ([], T_SERVICES, self._get_services),
+            ("KRPC", "AddStream"): ([T_CALL, T_BOOL], T_STREAM, None),
+            ("KRPC", "StartStream"): ([T_UINT64], None, None),
+            ("KRPC", "RemoveStream"): ([T_UINT64], None, None),
+            ("KRPC", "SetStreamRate"): ([T_UINT64, T_FLOAT], None, None),
+            ("SpaceCenter", "get_UT"): ([], T_DOUBLE, lambda: self.get_ut()),
+            ("SpaceCenter", "get_G"): ([], T_DOUBLE, lambda: 6.674e-11),
+            ("SpaceCenter", "get_ActiveVessel"): ([], T_CLASS, lambda: self._ref("vessel", self.active_vessel)),
+            ("SpaceCenter", "get_Vessels"): ([], T_CLASS_LIST, lambda: [self._ref("vessel", v) for v in self.vessels]),
+            ("SpaceCenter", "Vessel_get_Name"): ([T_OBJECT], T_STRING, lambda v: v.name),
+            ("SpaceCenter", "Vessel_get_Orbit"): ([T_OBJECT], T_CLASS, lambda v: self._ref("orbit", v)),
+            ("SpaceCenter", "Vessel_get_Control"): ([T_OBJECT], T_CLASS, lambda v: self._ref("control", v)),
+            ("SpaceCenter", "Vessel_get_Resources"): ([T_OBJECT], T_CLASS, lambda v: self._ref("resources", v)),
+            ("SpaceCenter", "Vessel_Flight"): ([T_OBJECT, T_UINT64], T_CLASS, self._vessel_flight),
+            ("SpaceCenter", "Vessel_get_Situation"): ([T_OBJECT], T_ENUM, lambda v: types.SimpleNamespace(value=v.SITUATION_ORBITING)),
+            ("SpaceCenter", "Vessel_get_MaxThrust"): ([T_OBJECT], T_FLOAT, lambda v: v.max_thrust),
+            ("SpaceCenter", "Vessel_get_AvailableThrust"): ([T_OBJECT], T_FLOAT, lambda v: v.max_thrust),
+            ("SpaceCenter", "Vessel_get_Mass"): ([T_OBJECT], T_FLOAT, lambda v: v.mass),
+            ("SpaceCenter", "Vessel_get_AvailableTorque"): ([T_OBJECT], T_TORQUE, lambda v: v.available_torque),
+            ("SpaceCenter", "Vessel_get_MomentOfInertia"): ([T_OBJECT], T_VEC3, lambda v: v.moment_of_inertia),
+            ("SpaceCenter", "Vessel_Position"): ([T_OBJECT, T_UINT64], T_VEC3, lambda v, f: v.get_orbit_state(self.get_ut())[2]),
+            ("SpaceCenter", "Vessel_Velocity"): ([T_OBJECT, T_UINT64], T_VEC3, lambda v, f: v.get_orbit_state(self.get_ut())[3]),
+            ("SpaceCenter", "Vessel_Rotation"): ([T_OBJECT, T_UINT64], T_QUAT, lambda v, f: v.get_rotation(self.get_ut())),
+            ("SpaceCenter", "Vessel_AngularVelocity"): ([T_OBJECT, T_UINT64], T_VEC3, lambda v, f: (0.0, v.ROTATION_RATE, 0.0)),
+            ("SpaceCenter", "Flight_get_Heading"): ([T_OBJECT], T_FLOAT, lambda fl: math.degrees(fl[1].ROTATION_RATE * self.get_ut()) % 360.0),
+            ("SpaceCenter", "Flight_get_Pitch"): ([T_OBJECT], T_FLOAT, lambda fl: 0.0),
+            ("SpaceCenter", "Flight_get_Roll"): ([T_OBJECT], T_FLOAT, lambda fl: 0.0),
+            ("SpaceCenter", "Flight_get_VerticalSpeed"): ([T_OBJECT], T_DOUBLE, lambda fl: fl[1].get_vertical_speed(self.get_ut())),
+            ("SpaceCenter", "Flight_get_SurfaceAltitude"): ([T_OBJECT], T_DOUBLE, self._surface_altitude),
+            ("SpaceCenter", "Control_get_Throttle"): ([T_OBJECT], T_FLOAT, lambda c: c.throttle),
+            ("SpaceCenter", "Control_set_Throttle"): ([T_OBJECT, T_FLOAT], None, lambda c, x: setattr(c, "throttle", x)),
+            ("SpaceCenter", "Control_set_Pitch"): ([T_OBJECT, T_FLOAT], None, lambda c, x: setattr(c, "pitch", x)),
+            ("SpaceCenter", "Control_set_Yaw"): ([T_OBJECT, T_FLOAT], None, lambda c, x: setattr(c, "yaw", x)),
+            ("SpaceCenter", "Resources_Amount"): ([T_OBJECT, T_STRING], T_FLOAT, lambda r, name: r.get_resource(name, self.get_ut())[0]),
+            ("SpaceCenter", "Resources_Max"): ([T_OBJECT, T_STRING], T_FLOAT, lambda r, name: r.get_resource(name, self.get_ut())[1]),
+            ("SpaceCenter", "Orbit_get_Body"): ([T_OBJECT], T_CLASS, lambda o: self._ref("cbody", "Kerbin")),
+            ("SpaceCenter", "Orbit_get_SemiMajorAxis"): ([T_OBJECT], T_DOUBLE, lambda o: o.semi_major_axis),
+            ("SpaceCenter", "Orbit_get_Eccentricity"): ([T_OBJECT], T_DOUBLE, lambda o: o.eccentricity),
+            ("SpaceCenter", "Orbit_get_MeanAnomalyAtEpoch"): ([T_OBJECT], T_DOUBLE, lambda o: o.mean_anomaly_at_epoch),
+            ("SpaceCenter", "Orbit_get_Epoch"): ([T_OBJECT], T_DOUBLE, lambda o: o.epoch),
+            ("SpaceCenter", "Orbit_get_Period"): ([T_OBJECT], T_DOUBLE, lambda o: 2.0 * math.pi / o.mean_motion),
+            ("SpaceCenter", "Orbit_get_TimeToApoapsis"): ([T_OBJECT], T_DOUBLE, self._time_to_apoapsis),
+            ("SpaceCenter", "Orbit_get_TimeToPeriapsis"): ([T_OBJECT], T_DOUBLE, self._time_to_periapsis),
+            ("SpaceCenter", "Orbit_get_TrueAnomaly"): ([T_OBJECT], T_DOUBLE, lambda o: o.get_orbit_state(self.get_ut())[1]),
+            ("SpaceCenter", "CelestialBody_get_Name"): ([T_OBJECT], T_STRING, lambda b: ScriptedVessel.CBODY_NAME),
+            ("SpaceCenter", "CelestialBody_get_Mass"): ([T_OBJECT], T_FLOAT, lambda b: ScriptedVessel.CBODY_MASS),
+            ("SpaceCenter", "CelestialBody_get_GravitationalParameter"): ([T_OBJECT], T_FLOAT, lambda b: ScriptedVessel.CBODY_GRAV_PARAM),
+            ("SpaceCenter", "CelestialBody_get_EquatorialRadius"): ([T_OBJECT], T_FLOAT, lambda b: ScriptedVessel.CBODY_RADIUS),
+            ("SpaceCenter", "CelestialBody_get_ReferenceFrame"): ([T_OBJECT], T_CLASS, lambda b: _RemoteRef(self.cbody_frame_id)),
+        }
+
+    #
+    # Public Methods
+    #
+    def start(self) -> None:
+        self.is_running = True
+        for (port, handler) in ((self.rpc_port, self._rpc_connection_thread), (self.stream_port, self._stream_connection_thread)):
+            listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listen_socket.bind((self.address, port))
+            listen_socket.listen()
+            self.sockets.append(listen_socket)
+            threading.Thread(target=self._accept_thread, args=(listen_socket, handler), daemon=True).start()
+
+    def stop(self) -> None:
+        self.is_running = False
+        for listen_socket in self.sockets:
+            listen_socket.close()
+        self.sockets = []
+        self.drop_clients()
+
+    def drop_clients(self) -> None:
+        """ Closes every client connection, to exercise the reconnect paths. """
+        with self.lock:
+            clients = list(self.clients.values())
+            self.clients = {}
+        for client in clients:
+            client["is_connected"] = False
+            for client_socket in (client["rpc_socket"], client["stream_socket"]):
+                if client_socket is not None:
+                    try:
+                        client_socket.shutdown(socket.SHUT_RDWR)
+                        client_socket.close()
+                    except OSError:
+                        pass
+
+    def get_ut(self) -> float:
+        return (time.monotonic() - self.start_time) * self.time_warp
+
+    #
+    # Private Methods: connections
+    #
+    def _accept_thread(self, listen_socket: socket.socket, handler) -> None:
+        while self.is_running:
+            try:
+                (client_socket, _) = listen_socket.accept()
+            except OSError:
+                return
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=handler, args=(client_socket,), daemon=True).start()
+
+    def _rpc_connection_thread(self, client_socket: socket.socket) -> None:
+        try:
+            request = _receive_message(client_socket, KRPC.ConnectionRequest)
+            if request.type != KRPC.ConnectionRequest.RPC:
+                _send_message(client_socket, KRPC.ConnectionResponse(status=KRPC.ConnectionResponse.WRONG_TYPE))
+                return
+            client_identifier = os.urandom(16)
+            client = {
+                "name": request.client_name,
+                "is_connected": True,
+                "rpc_socket": client_socket,
+                "stream_socket": None,
+                "streams": {},
+                "stream_ids": {},
+            }
+            with self.lock:
+                self.clients[client_identifier] = client
+            _send_message(client_socket, KRPC.ConnectionResponse(
+                status=KRPC.ConnectionResponse.OK, client_identifier=client_identifier))
+
+            while self.is_running and client["is_connected"]:
+                request = _receive_message(client_socket, KRPC.Request)
+                response = KRPC.Response()
+                for call in request.calls:
+                    response.results.append(self._execute_call(client, call))
+                if self.latency_s > 0.0:
+                    time.sleep(self.latency_s)
+                _send_message(client_socket, response)
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            client_socket.close()
+
+    def _stream_connection_thread(self, client_socket: socket.socket) -> None:
+        try:
+            request = _receive_message(client_socket, KRPC.ConnectionRequest)
+            with self.lock:
+                client = self.clients.get(request.client_identifier)
+            if (request.type != KRPC.ConnectionRequest.STREAM) or (client is None):
+                _send_message(client_socket, KRPC.ConnectionResponse(status=KRPC.ConnectionResponse.MALFORMED_MESSAGE))
+                return
+            client["stream_socket"] = client_socket
+            _send_message(client_socket, KRPC.ConnectionResponse(status=KRPC.ConnectionResponse.OK))
+
+            next_update_time = time.monotonic()
+            while self.is_running and client["is_connected"]:
+                update = KRPC.StreamUpdate()
+                for (stream_id, stream) in list(client["streams"].items()):
+                    if not stream["is_started"]:
+                        continue
+                    result = self._execute_call(client, stream["call"])
+                    if result.SerializeToString() != stream["last_result"]:
+                        stream["last_result"] = result.SerializeToString()
+                        update.results.append(KRPC.StreamResult(id=stream_id, result=result))
+                if update.results:
+                    if self.latency_s > 0.0:
+                        time.sleep(self.latency_s)
+                    _send_message(client_socket, update)
+                next_update_time += self.stream_period_s
+                time.sleep(max(0.0, next_update_time - time.monotonic()))
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            client_socket.close()
+
+    #
+    # Private Methods: procedures
+    #
+    def _execute_call(self, client: dict, call: KRPC.ProcedureCall) -> KRPC.ProcedureResult:
+        result = KRPC.ProcedureResult()
+        self.rpc_count += 1
+        try:
+            key = (call.service, call.procedure)
+            if key not in self.procedures:
+                raise FakeRpcError("Procedure not available on the fake server: {0}.{1}".format(*key))
+            (param_types, return_type, handler) = self.procedures[key]
+
+            args = [None] * len(param_types)
+            for argument in call.arguments:
+                typ = param_types[argument.position]
+                if typ is T_CALL:
+                    args[argument.position] = Decoder.decode_message(argument.value, KRPC.ProcedureCall)
+                else:
+                    args[argument.position] = Decoder._decode_value(argument.value, typ)
+            if param_types and (param_types[0] is T_OBJECT) and (call.service == "SpaceCenter"):
+                args[0] = self.objects[args[0]][1]
+
+            if call.service == "KRPC" and call.procedure in ("AddStream", "StartStream", "RemoveStream", "SetStreamRate"):
+                value = self._stream_procedure(client, call.procedure, args)
+            else:
+                value = handler(*args)
+            if return_type is not None:
+                result.value = Encoder.encode(value, return_type)
+        except Exception as e:
+            result.error.description = "{0}: {1}".format(type(e).__name__, str(e))
+        return result
+
+    def _stream_procedure(self, client: dict, procedure: str, args: list):
+        if procedure == "AddStream":
+            call_key = args[0].SerializeToString()
+            stream_id = client["stream_ids"].get(call_key)
+            if stream_id is None:
+                stream_id = self._object_id(("stream", call_key))
+                client["stream_ids"][call_key] = stream_id
+                client["streams"][stream_id] = {"call": args[0], "is_started": False, "last_result": None}
+            if args[1]:
+                client["streams"][stream_id]["is_started"] = True
+            return KRPC.Stream(id=stream_id)
+        stream = client["streams"].get(args[0])
+        if stream is None:
+            raise FakeRpcError("No such stream: {0}".format(args[0]))
+        if procedure == "StartStream":
+            stream["is_started"] = True
+        elif procedure == "RemoveStream":
+            del client["streams"][args[0]]
+            client["stream_ids"] = {k: v for k, v in client["stream_ids"].items() if v != args[0]}
+        return None
+
+    def _get_status(self) -> KRPC.Status:
+        return KRPC.Status(version=self.VERSION, rpcs_executed=self.rpc_count)
+
+    def _get_services(self) -> KRPC.Services:
+        services = KRPC.Services()
+        for name in ("KRPC", "SpaceCenter"):
+            services.services.add(name=name)
+        return services
+
+    def _vessel_flight(self, vessel: ScriptedVessel, frame_id: int):
+        if frame_id is None:
+            frame_id = self.SURFACE_FRAME_ID
+        return self._ref("flight", (frame_id, vessel))
+
+    def _surface_altitude(self, flight: tuple) -> float:
+        (_, _, position, _) = flight[1].get_orbit_state(self.get_ut())
+        return math.sqrt(sum(x * x for x in position)) - ScriptedVessel.CBODY_RADIUS
+
+    def _time_to_apoapsis(self, vessel: ScriptedVessel) -> float:
+        mean_anomaly = vessel.get_orbit_state(self.get_ut())[0]
+        return ((math.pi - mean_anomaly) % (2.0 * math.pi)) / vessel.mean_motion
+
+    def _time_to_periapsis(self, vessel: ScriptedVessel) -> float:
+        mean_anomaly = vessel.get_orbit_state(self.get_ut())[0]
+        return (-mean_anomaly % (2.0 * math.pi)) / vessel.mean_motion
+
+    def _object_id(self, key: tuple) -> int:
+        with self.lock:
+            if key not in self.object_ids:
+                object_id = len(self.object_ids) + 2 # 0 is null, 1 is the surface reference frame
+                self.object_ids[key] = object_id
+                self.objects[object_id] = key
+            return self.object_ids[key]
+
+    def _ref(self, kind: str, target) -> _RemoteRef:
+        """ Returns a reference to the remote object of the given kind. Orbits, controls, flights and resources
+            resolve to the vessel they belong to, which implements their procedures. """
+        return _RemoteRef(self._object_id((kind, target)))
+
+#
+# Message framing
+#
+def _send_message(client_socket: socket.socket, message) -> None:
+    client_socket.sendall(Encoder.encode_message_with_size(message))
+
+def _receive_message(client_socket: socket.socket, typ):
+    data = b''
+    while True:
+        byte = client_socket.recv(1)
+        if not byte:
+            raise ConnectionError("Connection closed")
+        data += byte
+        if not (byte[0] & 0x80):
+            break
+    size = Decoder.decode_message_size(data)
+    data = b''
+    while len(data) < size:
+        chunk = client_socket.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return Decoder.decode_message(data, typ)
+
+#
+# Entry Point Routine
+#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake kRPC server serving a scripted vessel.")
+    parser.add_argument("--address", default=KRPC_IP_ADDRESS)
+    parser.add_argument("--rpc-port", type=int, default=KRPC_RPC_PORT)
+    parser.add_argument("--stream-port", type=int, default=KRPC_STREAM_PORT)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every RPC response and stream update")
+    parser.add_argument("--stream-rate-hz", type=float, default=50.0)
+    parser.add_argument("--warp", type=float, default=1.0, help="game time rate")
+    parser.add_argument("--vessels", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeKrpcServer(args.address, args.rpc_port, args.stream_port,
+                            latency_s=args.latency_ms / 1000.0, stream_rate_hz=args.stream_rate_hz,
+                            time_warp=args.warp, num_vessels=args.vessels)
+    server.start()
+    print("Fake kRPC server listening on {0}:{1}/{2}".format(args.address, args.rpc_port, args.stream_port))
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,99 +1,96 @@
-from datetime import datetime, timedelta
+from control_programs import CONTROL_PROGRAMS, FWD_LOOP, LAT_LOOP, NUM_LOOPS, PITCH_LOOP, VSPEED_LOOP, YAW_LOOP, ManualProgram
 from ksp_types import VesselFlightControl, VesselFlightState
-from pid_controller import PidController
+from pid_bank import PidBank
+import numpy as np
+import time
 
 class FlightController:
+    """ Runs the control program selected by name, among an instance of each program of the registry
+        sharing the controller's bank of PID loops. """
+
     #
     # Constants
     #
+    FIXED_STEP_S = 1.0 / 30.0 # control step, in game time
+    MAX_SUBSTEPS = 4 # steps run in one tick when late or under physics warp, older steps are skipped
 
     #
     # Constructor
     #
-    def __init__(self):
-        self.vertical_speed_ctrl = PidController(kp=0.181, ki=0.09, kd=0.005, output_min=0.001, output_max=1.0, set_point=0.0)
-        # self.altitude_ctrl = PidController(kp=0.2, ki=0.005, kd=0.005, output_min=-5.0, output_max=5.0, set_point=85.0)
-        self.pitch_ctrl = PidController(kp=0.1, ki=0.0, kd=0.0, output_min=-1.0, output_max=1.0, set_point=0.0)
-        self.yaw_ctrl = PidController(kp=0.1, ki=0.0, kd=0.0, output_min=-1.0, output_max=1.0, set_point=0.0)
-        self.fwd_ctrl = PidController(kp=1, ki=0.0, kd=0.0, output_min=-1.1, output_max=1.1, set_point=0.0)
-        self.lat_ctrl = PidController(kp=1, ki=0.0, kd=0.0, output_min=-1.1, output_max=1.1, set_point=0.0)
+    def __init__(self, is_game_time_driven=True):
+        self.is_game_time_driven = is_game_time_driven
+        self.step_ut = None
+        self.step_count = 0
+        self.skipped_step_count = 0
+
+        self.pid_bank = PidBank(NUM_LOOPS)
+        self.pid_bank.configure_loop(VSPEED_LOOP, kp=0.181, ki=0.09, kd=0.005, output_min=0.001, output_max=1.0, set_point=0.0)
+        # self.pid_bank.configure_loop(ALTITUDE_LOOP, kp=0.2, ki=0.005, kd=0.005, output_min=-5.0, output_max=5.0, set_point=85.0)
+        self.pid_bank.configure_loop(PITCH_LOOP, kp=0.1, ki=0.0, kd=0.0, output_min=-1.0, output_max=1.0, set_point=0.0)
+        self.pid_bank.configure_loop(YAW_LOOP, kp=0.1, ki=0.0, kd=0.0, output_min=-1.0, output_max=1.0, set_point=0.0)
+
+        # null out forward and lateral speed
+        ku = 0.01
+        self.pid_bank.configure_loop(FWD_LOOP, kp=ku * 0.70, ki=0.0, kd=0.0, output_min=-1.1, output_max=1.1, set_point=0.0)
+        self.pid_bank.configure_loop(LAT_LOOP, kp=ku * 7.70, ki=0.0, kd=0.0, output_min=-1.1, output_max=1.1, set_point=0.0)
+        self.measurements = np.zeros(NUM_LOOPS)
 
-        self.print_counter = 0
+        # programs by name, switched to by a dictionary lookup when the selected name changes
+        self.programs = {program_class.NAME: program_class(self.pid_bank, self.measurements) for program_class in CONTROL_PROGRAMS}
+        self.manual_program = self.programs[ManualProgram.NAME]
+        self.program = self.manual_program
+        self.control_program = None
+        self.control = self.program.control
 
     #
     # Public Methods
     #
     def execute(self, control_program: str, program_data: float, state: VesselFlightState) -> VesselFlightControl:
-        control = VesselFlightControl(False, 0.0, 0.0, 0.0)
-        if control_program == "vspeed":
-            if state.fThrustMax > 0.0:
-                # set control gains
-                ku = state.fWeight / state.fThrustMax
-                self.vertical_speed_ctrl.kp = ku * 0.70
-                self.vertical_speed_ctrl.ki = ku / 3.0
-                self.vertical_speed_ctrl.kd = ku / 50.0
-
-                self.vertical_speed_ctrl.set_point = program_data
-                control.fThrottle = self.vertical_speed_ctrl.update(state.fVerticalSpeed)
-                control.bIsInputValid = True
-
-        elif control_program == "attitude":
-        #else:
-            if state.fThrustMax > 0.0:
-                # set control gains
-                ku = state.fWeight / state.fThrustMax
-                self.vertical_speed_ctrl.kp = ku * 0.70
-                self.vertical_speed_ctrl.ki = ku / 3.0
-                self.vertical_speed_ctrl.kd = ku / 50.0
+        """ Runs the control program, manual if unknown. When driven by game time, the program steps at
+            FIXED_STEP_S of universal time: several steps are run if the tick is late or the game is under
+            physics warp, and the last output is held if no step is due, e.g. while the game is paused. """
+        if control_program != self.control_program:
+            self.control_program = control_program
+            self.program = self.programs.get(control_program, self.manual_program)
+            self.program.activate()
+            if self.step_ut is not None:
+                # loops of the previous program haven't stepped, don't let that idle time count as one step
+                self.pid_bank.set_time(self.step_ut)
 
-                # null out the vertical speed
-                self.vertical_speed_ctrl.set_point = program_data
-                control.fThrottle = self.vertical_speed_ctrl.update(state.fVerticalSpeed)
-                control.bIsInputValid = True
+        if not self.is_game_time_driven:
+            self.control = self._execute_step(program_data, state, time.time())
+            return self.control
 
-            # null out forward speed
-            self.fwd_ctrl.set_point = 0.0
-            ku = 0.01
-            self.fwd_ctrl.kp = ku * 0.70
-            self.fwd_ctrl.ki = 0
-            self.fwd_ctrl.kd = 0
-            target_pitch_speed = self.fwd_ctrl.update(state.fForwardSpeed)
+        ut = state.fUniversalTime
+        if (self.step_ut is None) or (ut < self.step_ut):
+            # first tick, or game time went backwards (revert, quickload)
+            self.step_ut = ut - self.FIXED_STEP_S
+            self.pid_bank.reset(self.step_ut)
 
-            # null out lateral speed
-            self.lat_ctrl.set_point = 0.0
-            self.lat_ctrl.kp = ku * 7.70
-            self.lat_ctrl.ki = 0
-            self.lat_ctrl.kd = 0
-            target_yaw_speed = -self.lat_ctrl.update(state.fLateralSpeed)
+        num_steps = int((ut - self.step_ut + 1e-9) // self.FIXED_STEP_S) # tolerate rounding of whole steps
+        if num_steps > self.MAX_SUBSTEPS:
+            self.skipped_step_count += num_steps - self.MAX_SUBSTEPS
+            self.step_ut += (num_steps - self.MAX_SUBSTEPS) * self.FIXED_STEP_S
+            self.pid_bank.set_time(self.step_ut)
+            num_steps = self.MAX_SUBSTEPS
 
-            # self.pitch_ctrl.set_point = 0.0
-            self.pitch_ctrl.set_point = target_pitch_speed
-            # self.pitch_ctrl.set_point = program_data
-            ku = state.fPitchMomentOfInertia / state.fPitchTorqueMax * 10 if state.fPitchTorqueMax > 0.0 else 1.0
-            self.pitch_ctrl.kp = ku * 0.70
-            self.pitch_ctrl.ki = 0 # ku / 3.0
-            self.pitch_ctrl.kd = 0 # ku / 50.0
-            control.fPitch = -self.pitch_ctrl.update(state.fPitchSpeed)
+        for _ in range(num_steps):
+            self.step_ut += self.FIXED_STEP_S
+            self.control = self._execute_step(program_data, state, self.step_ut)
+            self.step_count += 1
+        return self.control
 
-            # self.yaw_ctrl.set_point = 0.0
-            self.yaw_ctrl.set_point = target_yaw_speed
-            ku = state.fYawMomentOfInertia / state.fYawTorqueMax * 10 if state.fYawTorqueMax > 0.0 else 1.0
-            self.yaw_ctrl.kp = ku * 0.70
-            self.yaw_ctrl.ki = 0 # ku / 3.0
-            self.yaw_ctrl.kd = 0 # ku / 50.0
-            control.fYaw = -self.yaw_ctrl.update(state.fYawSpeed)
-
-            self.print_counter += 1
-            if self.print_counter > 4:
-                # print("Controls: Pitch={0:7.3f}   Yaw={1:7.3f}".format(control.fPitch, control.fYaw))
-                print("Controls: Pitch={0:7.3f}   TgtPitchSpd={1:7.3f}   Yaw={2:7.3f}   TgtYawSpd={3:7.3f}".format(
-                    control.fPitch, target_pitch_speed, control.fYaw, target_yaw_speed))
-                self.print_counter = 0
-
-            control.bIsInputValid = True
-
-        return control
+    def get_program_stats_str(self) -> str:
+        """ Returns the steps and mean execution time of each program, one line per program. """
+        return "\n".join(program.get_stats_str() for program in self.programs.values())
 
     #
     # Private Methods
     #
+    def _execute_step(self, program_data: float, state: VesselFlightState, timestamp: float) -> VesselFlightControl:
+        program = self.program
+        start_time = time.perf_counter()
+        control = program.execute(state, program_data, timestamp)
+        program.execute_time_s += time.perf_counter() - start_time
+        program.execute_count += 1
+        return control
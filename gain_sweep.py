@@ -0,0 +1,264 @@
+""" Sweeps the PID gains of the vspeed and attitude control programs offline, over a simplified plant,
+    and reports the Pareto-best gain sets for settling time, overshoot and control effort.
+
+    Gain sets are sampled log-uniformly within GAIN_RANGES, the current gains included. Each chunk of
+    gain sets is simulated against every scenario at once, one PidBank loop per gain set and scenario,
+    so the loops follow the PidController semantics and step at the controller's fixed step. Chunks
+    are spread across a process pool.
+
+    The plant is a hovering vessel of constant mass:
+      vspeed   : vertical speed driven by the throttle, at the thrust-to-weight ratio of the scenario
+      attitude : forward speed driven by the pitch angle, the pitch rate by the pitch input at the
+                 angular acceleration of the scenario (max torque over moment of inertia); the tilt
+                 is limited to what the thrust-to-weight ratio can hover at. The yaw and lateral
+                 loops share the same plant.
+
+    Usage: python gain_sweep.py [--program vspeed|attitude] [--num-gain-sets N] [--workers N]
+                                [--seed N] [--top N]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from control_programs import FWD_LOOP, PITCH_LOOP, VSPEED_LOOP, AttitudeProgram, VSpeedProgram
+from flight_controller import FlightController
+from pid_bank import PidBank
+import argparse, math, os
+import numpy as np
+
+#
+# Constants
+#
+GRAVITY = 9.81
+STEP_S = FlightController.FIXED_STEP_S
+SETTLING_BAND_RATIO = 0.05 # of the step, that the response has to stay within to be settled
+CHUNKS_PER_WORKER = 4
+
+# Scenarios: (thrust-to-weight ratio, initial vertical speed, target vertical speed)
+VSPEED_SCENARIOS = (
+    (1.5, -10.0, 0.0),
+    (3.0, -10.0, 0.0),
+    (1.5, 0.0, 5.0),
+    (3.0, 0.0, 5.0),
+)
+VSPEED_DURATION_S = 20.0
+
+# Scenarios: (thrust-to-weight ratio, pitch angular acceleration at full input, initial forward speed)
+ATTITUDE_SCENARIOS = (
+    (1.5, 0.5, 10.0),
+    (3.0, 2.0, 10.0),
+    (3.0, 8.0, 3.0),
+)
+ATTITUDE_DURATION_S = 60.0
+
+# Swept gains: (name, low, high), sampled log-uniformly
+GAIN_RANGES = {
+    "vspeed": (
+        ("kp_ratio", 0.05, 5.0),
+        ("ki_ratio", 0.01, 2.0),
+        ("kd_ratio", 0.001, 0.2),
+    ),
+    "attitude": (
+        ("fwd_kp", 0.0005, 0.1),
+        ("fwd_ki", 0.00001, 0.01),
+        ("fwd_kd", 0.0001, 1.0),
+        ("pitch_kp_ratio", 0.05, 5.0),
+    ),
+}
+SCORE_NAMES = ("settling_s", "overshoot", "effort")
+
+#
+# Types
+#
+class StepResponseScores:
+    """ Scores of a batch of step responses, updated at every simulation step: the time the response last
+        was out of the settling band, its largest overshoot past the target relative to the step, and the
+        total variation of the control input. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, initial: np.ndarray, target: np.ndarray):
+        step = target - initial
+        self.target = target
+        self.direction = np.sign(step)
+        self.step_size = np.maximum(np.abs(step), 1e-9)
+        self.band = SETTLING_BAND_RATIO * self.step_size
+        self.last_outside_time = np.zeros(len(target))
+        self.is_outside = np.ones(len(target), dtype=bool)
+        self.overshoot = np.zeros(len(target))
+        self.effort = np.zeros(len(target))
+        self.prev_control = None
+
+    #
+    # Public Methods
+    #
+    def update(self, t: float, response: np.ndarray, control: np.ndarray) -> None:
+        error = response - self.target
+        np.greater(np.abs(error), self.band, out=self.is_outside)
+        self.last_outside_time[self.is_outside] = t
+        np.maximum(self.overshoot, error * self.direction / self.step_size, out=self.overshoot)
+        if self.prev_control is not None:
+            self.effort += np.abs(control - self.prev_control)
+        self.prev_control = control.copy()
+
+    def get_scores(self, num_scenarios: int) -> np.ndarray:
+        """ Returns the scores of each gain set over all scenarios, one row per gain set: the worst
+            settling time (inf if unsettled) and overshoot, and the mean effort. """
+        settling_time = np.where(self.is_outside, math.inf, self.last_outside_time).reshape(num_scenarios, -1)
+        overshoot = self.overshoot.reshape(num_scenarios, -1)
+        effort = self.effort.reshape(num_scenarios, -1)
+        return np.column_stack((settling_time.max(axis=0), overshoot.max(axis=0), effort.mean(axis=0)))
+
+#
+# Functions
+#
+def get_current_gains(program: str) -> np.ndarray:
+    """ Returns the gains the flight controller runs the program with, in GAIN_RANGES order. """
+    if program == "vspeed":
+        (_, _, _, _, kp_ratio, ki_ratio, kd_ratio) = VSpeedProgram.GAIN_SCHEDULES[0]
+        return np.array([kp_ratio, ki_ratio, kd_ratio])
+    bank = FlightController().pid_bank
+    pitch_schedule = next(schedule for schedule in AttitudeProgram.GAIN_SCHEDULES if schedule[0] == PITCH_LOOP)
+    return np.array([bank.kp[FWD_LOOP], bank.ki[FWD_LOOP], bank.kd[FWD_LOOP], pitch_schedule[4]])
+
+def sample_gains(program: str, num_gain_sets: int, seed: int) -> np.ndarray:
+    """ Returns num_gain_sets gain sets, one per row, the current gains first. """
+    gain_ranges = GAIN_RANGES[program]
+    rng = np.random.default_rng(seed)
+    low = np.log([gain_range[1] for gain_range in gain_ranges])
+    high = np.log([gain_range[2] for gain_range in gain_ranges])
+    gains = np.exp(rng.uniform(low, high, size=(num_gain_sets, len(gain_ranges))))
+    gains[0] = get_current_gains(program)
+    return gains
+
+def create_bank(loop: int, num_loops: int) -> PidBank:
+    """ Returns a bank of num_loops loops, clamped like the given loop of the flight controller. """
+    flight_controller_bank = FlightController().pid_bank
+    return PidBank(num_loops, output_min=flight_controller_bank.output_min[loop], output_max=flight_controller_bank.output_max[loop])
+
+def simulate_vspeed(gains: np.ndarray) -> np.ndarray:
+    """ Simulates every vspeed gain set (one row each) against every scenario, and returns their scores. """
+    num_gain_sets = len(gains)
+    (twr, initial, target) = (np.repeat(np.array(column), num_gain_sets) for column in zip(*VSPEED_SCENARIOS))
+    num_loops = len(twr)
+
+    # gain schedule of the vspeed program, the ultimate gain being weight over max thrust
+    ku = 1.0 / twr
+    bank = create_bank(VSPEED_LOOP, num_loops)
+    bank.kp[:] = np.tile(gains[:, 0], len(VSPEED_SCENARIOS)) * ku
+    bank.ki[:] = np.tile(gains[:, 1], len(VSPEED_SCENARIOS)) * ku
+    bank.kd[:] = np.tile(gains[:, 2], len(VSPEED_SCENARIOS)) * ku
+    bank.set_point[:] = target
+
+    vspeed = initial.copy()
+    scores = StepResponseScores(initial, target)
+    accel = np.zeros(num_loops)
+    t = 0.0
+    bank.reset(t)
+    bank.update(vspeed, t) # as if the program had been measuring already
+    for _ in range(int(VSPEED_DURATION_S / STEP_S)):
+        t += STEP_S
+        throttle = bank.update(vspeed, t)
+        np.multiply(throttle, twr, out=accel)
+        accel -= 1.0
+        accel *= GRAVITY * STEP_S
+        vspeed += accel
+        scores.update(t, vspeed, throttle)
+    return scores.get_scores(len(VSPEED_SCENARIOS))
+
+def simulate_attitude(gains: np.ndarray) -> np.ndarray:
+    """ Simulates every attitude gain set (one row each) against every scenario, and returns their scores. """
+    num_gain_sets = len(gains)
+    (twr, angular_accel, initial) = (np.repeat(np.array(column), num_gain_sets) for column in zip(*ATTITUDE_SCENARIOS))
+    num_loops = len(twr)
+    max_tilt = np.arccos(1.0 / twr)
+
+    # the forward speed loop feeds the set-point of the pitch rate loop
+    fwd_bank = create_bank(FWD_LOOP, num_loops)
+    fwd_bank.kp[:] = np.tile(gains[:, 0], len(ATTITUDE_SCENARIOS))
+    fwd_bank.ki[:] = np.tile(gains[:, 1], len(ATTITUDE_SCENARIOS))
+    fwd_bank.kd[:] = np.tile(gains[:, 2], len(ATTITUDE_SCENARIOS))
+    pitch_bank = create_bank(PITCH_LOOP, num_loops)
+    # gain schedule of the attitude program, the ultimate gain being 10 times moment of inertia over max torque
+    pitch_bank.kp[:] = np.tile(gains[:, 3], len(ATTITUDE_SCENARIOS)) * 10.0 / angular_accel
+
+    fwd_speed = initial.copy()
+    pitch = np.zeros(num_loops)
+    pitch_rate = np.zeros(num_loops)
+    pitch_input = np.zeros(num_loops)
+    scores = StepResponseScores(initial, np.zeros(num_loops))
+    t = 0.0
+    fwd_bank.reset(t)
+    pitch_bank.reset(t)
+    fwd_bank.update(fwd_speed, t)
+    pitch_bank.update(pitch_rate, t)
+    for _ in range(int(ATTITUDE_DURATION_S / STEP_S)):
+        t += STEP_S
+        pitch_bank.set_point[:] = fwd_bank.update(fwd_speed, t)
+        output = pitch_bank.update(pitch_rate, t)
+        np.negative(output, out=pitch_input) # as the attitude program sets the pitch input
+
+        # the pitch input accelerates the pitch rate the other way round
+        pitch_rate -= pitch_input * angular_accel * STEP_S
+        pitch += pitch_rate * STEP_S
+        np.clip(pitch, -max_tilt, max_tilt, out=pitch)
+        fwd_speed += GRAVITY * np.tan(pitch) * STEP_S
+        scores.update(t, fwd_speed, pitch_input)
+    return scores.get_scores(len(ATTITUDE_SCENARIOS))
+
+def find_pareto_front(scores: np.ndarray, chunk_size: int = 1024) -> np.ndarray:
+    """ Returns the mask of the rows of scores that no other row dominates, all scores being minimized.
+        Rows with a non-finite score are left out. """
+    is_finite = np.all(np.isfinite(scores), axis=1)
+    candidates = scores[is_finite]
+    is_dominated = np.zeros(len(candidates), dtype=bool)
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size, np.newaxis, :]
+        # [row of the chunk, other row]
+        is_no_worse = np.all(candidates[np.newaxis, :, :] <= chunk, axis=2)
+        is_better = np.any(candidates[np.newaxis, :, :] < chunk, axis=2)
+        is_dominated[start:start + chunk_size] = np.any(is_no_worse & is_better, axis=1)
+    is_pareto = np.zeros(len(scores), dtype=bool)
+    is_pareto[np.flatnonzero(is_finite)[~is_dominated]] = True
+    return is_pareto
+
+def sweep(program: str, gains: np.ndarray, num_workers: int) -> np.ndarray:
+    """ Returns the scores of the gain sets, simulated in chunks across num_workers processes. """
+    simulate = simulate_vspeed if program == "vspeed" else simulate_attitude
+    if num_workers <= 1:
+        return simulate(gains)
+    chunks = np.array_split(gains, num_workers * CHUNKS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return np.concatenate(list(executor.map(simulate, chunks)))
+
+def format_row(label: str, gains: np.ndarray, scores: np.ndarray) -> str:
+    (settling_time, overshoot, effort) = scores
+    return "{0:>8} {1}  {2:10.2f} {3:9.1f}% {4:10.3f}".format(
+        label, " ".join("{0:14.5g}".format(gain) for gain in gains), settling_time, overshoot * 100.0, effort)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep the PID gains of the control programs over a simulated plant.")
+    parser.add_argument("--program", choices=tuple(GAIN_RANGES), action="append")
+    parser.add_argument("--num-gain-sets", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for program in (args.program or tuple(GAIN_RANGES)):
+        gains = sample_gains(program, args.num_gain_sets, args.seed)
+        scores = sweep(program, gains, args.workers)
+        is_pareto = find_pareto_front(scores)
+
+        # Pareto-best gain sets, fastest settling first
+        pareto_idx = np.flatnonzero(is_pareto)
+        pareto_idx = pareto_idx[np.lexsort((scores[pareto_idx, 2], scores[pareto_idx, 1], scores[pareto_idx, 0]))]
+        print("{0}: {1} gain sets, {2} settled, {3} Pareto-best".format(
+            program, len(gains), np.count_nonzero(np.isfinite(scores[:, 0])), len(pareto_idx)))
+        print("{0:>8} {1}  {2:>10} {3:>10} {4:>10}".format(
+            "", " ".join("{0:>14}".format(gain_range[0]) for gain_range in GAIN_RANGES[program]), *SCORE_NAMES))
+        print(format_row("current", gains[0], scores[0]))
+        for (rank, idx) in enumerate(pareto_idx[:args.top]):
+            print(format_row("#{0}".format(rank + 1), gains[idx], scores[idx]))
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+from ksp_types import ImpactPrediction, VesselTrajectoryState
+import math
+import numpy as np
+
+class ImpactPredictor:
+    """ Predicts when and how fast a vessel in free fall hits the ground, and the latest time to start
+        a full-thrust retrograde burn that stops it at the ground (the suicide burn).
+
+        The trajectory is integrated with a fixed step in the plane of motion around the body's center,
+        where only the radius changes under gravity at a constant angular momentum, and is kept: each
+        predict() checks the current state against the kept trajectory, and integrates again only when
+        they have diverged beyond tolerance or when the trajectory runs out. The impact is then found
+        over the kept samples in one vectorized pass. The burn start is bracketed by stopping distance
+        estimates over the kept samples, also vectorized, and found within the bracket by simulating
+        burns. It is kept along with the trajectory, while the thrust and the ground stay within
+        tolerance.
+
+        The state is taken relative to the surface, leaving out the centrifugal and Coriolis terms of
+        the rotating frame, and the ground is taken at the height of the terrain under the vessel. """
+
+    #
+    # Constants
+    #
+    NUM_STEPS = 500
+    MIN_STEP_S = 0.02
+    HORIZON_FACTOR = 1.5 # integrated time over the constant gravity estimate of the fall time
+    MIN_GRAVITY_RATIO = 0.1 # lower bound of the net radial gravity in the fall time estimate
+    GROUND_MARGIN_RATIO = 0.1 # of the altitude, integrated below the ground for lower terrain ahead
+    MIN_GROUND_MARGIN_M = 10.0
+    RADIUS_TOLERANCE_RATIO = 0.002 # of the altitude
+    MIN_RADIUS_TOLERANCE_M = 1.0
+    SPEED_TOLERANCE_M_S = 0.5 # radial, and tangential through the angular momentum
+    THRUST_TOLERANCE_RATIO = 0.01
+    NUM_BURN_STEPS = 60
+    BURN_HORIZON_FACTOR = 1.2 # simulated burn time over the longest stopping time estimate
+    BURN_TIME_TOLERANCE_S = 0.01
+    MAX_BURN_ITERATIONS = 8
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        # Kept trajectory, times relative to start_time
+        self.times = np.zeros(self.NUM_STEPS + 1)
+        self.radii = np.zeros(self.NUM_STEPS + 1)
+        self.radial_speeds = np.zeros(self.NUM_STEPS + 1)
+        self.sample_count = 0
+        self.start_time = 0.0
+        self.step_s = 0.0
+        self.gravitational_parameter = 0.0
+        self.angular_momentum = 0.0
+        self.is_ending_below_ground = False
+
+        # Kept burn start, relative to start_time, and what it was found for
+        self.burn_start_time = 0.0
+        self.burn_thrust_accel = -1.0
+        self.burn_ground_radius = 0.0
+
+        self.prediction_count = 0
+        self.integration_count = 0
+
+    #
+    # Public Methods
+    #
+    def reset(self) -> None:
+        self.sample_count = 0
+
+    def predict(self, state: VesselTrajectoryState) -> ImpactPrediction:
+        prediction = ImpactPrediction(False, False, math.inf, 0.0, math.inf)
+        if (not state.bIsDataValid) or (state.fRadius <= 0.0) or (state.fGravitationalParameter <= 0.0):
+            self.sample_count = 0
+            return prediction
+        prediction.bIsDataValid = True
+        self.prediction_count += 1
+        if self.__get_periapsis_radius(state) > state.fGroundRadius:
+            # the orbit doesn't meet the ground
+            self.sample_count = 0
+            return prediction
+
+        elapsed = state.fUniversalTime - self.start_time
+        if not self.__is_trajectory_valid(state, elapsed):
+            self.__integrate(state)
+            elapsed = 0.0
+        self.__find_impact(state, elapsed, prediction)
+        return prediction
+
+    def get_stats_str(self) -> str:
+        return "predictions={0} integrations={1}".format(self.prediction_count, self.integration_count)
+
+    #
+    # Private Methods
+    #
+    def __get_periapsis_radius(self, state: VesselTrajectoryState) -> float:
+        mu = state.fGravitationalParameter
+        r = state.fRadius
+        h = state.fAngularMomentum
+        energy = 0.5 * (state.fRadialSpeed * state.fRadialSpeed + (h / r) * (h / r)) - mu / r
+        eccentricity = math.sqrt(max(1.0 + 2.0 * energy * h * h / (mu * mu), 0.0))
+        return (h * h / mu) / (1.0 + eccentricity)
+
+    def __is_trajectory_valid(self, state: VesselTrajectoryState, elapsed: float) -> bool:
+        n = self.sample_count
+        if (n < 2) or (state.fGravitationalParameter != self.gravitational_parameter):
+            return False
+        if (elapsed < 0.0) or (elapsed > self.times[n - 1]):
+            # game time went backwards, or past the end of the trajectory
+            return False
+        if self.is_ending_below_ground and (self.radii[n - 1] > state.fGroundRadius):
+            # the terrain under the vessel is now lower than the end of the trajectory
+            return False
+
+        # state predicted for now, interpolated between samples
+        idx = min(int(elapsed / self.step_s), n - 2)
+        frac = (elapsed - self.times[idx]) / self.step_s
+        radius = self.radii[idx] + frac * (self.radii[idx + 1] - self.radii[idx])
+        radial_speed = self.radial_speeds[idx] + frac * (self.radial_speeds[idx + 1] - self.radial_speeds[idx])
+
+        altitude = state.fRadius - state.fGroundRadius
+        radius_tolerance = max(self.RADIUS_TOLERANCE_RATIO * altitude, self.MIN_RADIUS_TOLERANCE_M)
+        return ((abs(radius - state.fRadius) <= radius_tolerance) and
+                (abs(radial_speed - state.fRadialSpeed) <= self.SPEED_TOLERANCE_M_S) and
+                (abs(state.fAngularMomentum - self.angular_momentum) <= self.SPEED_TOLERANCE_M_S * state.fRadius))
+
+    def __integrate(self, state: VesselTrajectoryState) -> None:
+        """ Integrates r'' = h^2 / r^3 - mu / r^2 with velocity Verlet, down to below the ground or over
+            the estimated fall time. Stepped in plain floats: a step is too little arithmetic to gain
+            anything from numpy, whose per-call overhead would dominate. """
+        self.integration_count += 1
+        mu = state.fGravitationalParameter
+        h = state.fAngularMomentum
+        h2 = h * h
+        r = state.fRadius
+        vr = state.fRadialSpeed
+
+        # step sized to cover the fall in NUM_STEPS
+        gravity = mu / (r * r)
+        net_gravity = max(gravity - h2 / (r * r * r), self.MIN_GRAVITY_RATIO * gravity)
+        altitude = max(r - state.fGroundRadius, 0.0)
+        fall_time = (vr + math.sqrt(vr * vr + 2.0 * net_gravity * altitude)) / net_gravity
+        step = max(self.HORIZON_FACTOR * fall_time / self.NUM_STEPS, self.MIN_STEP_S)
+        end_radius = state.fGroundRadius - max(self.GROUND_MARGIN_RATIO * altitude, self.MIN_GROUND_MARGIN_M)
+
+        times = self.times
+        radii = self.radii
+        radial_speeds = self.radial_speeds
+        times[0] = 0.0
+        radii[0] = r
+        radial_speeds[0] = vr
+        accel = h2 / (r * r * r) - gravity
+        n = 1
+        is_ending_below_ground = False
+        while n <= self.NUM_STEPS:
+            r += step * (vr + 0.5 * accel * step)
+            if r <= 0.0:
+                is_ending_below_ground = True
+                break
+            accel_next = h2 / (r * r * r) - mu / (r * r)
+            vr += 0.5 * (accel + accel_next) * step
+            accel = accel_next
+            times[n] = n * step
+            radii[n] = r
+            radial_speeds[n] = vr
+            n += 1
+            if r < end_radius:
+                is_ending_below_ground = True
+                break
+
+        self.sample_count = n
+        self.start_time = state.fUniversalTime
+        self.step_s = step
+        self.gravitational_parameter = mu
+        self.angular_momentum = h
+        self.is_ending_below_ground = is_ending_below_ground
+        self.burn_thrust_accel = -1.0
+
+    def __find_impact(self, state: VesselTrajectoryState, elapsed: float, prediction: ImpactPrediction) -> None:
+        # samples from the one just before now
+        first_idx = min(int(elapsed / self.step_s), self.sample_count - 1)
+        times = self.times[first_idx:self.sample_count]
+        radii = self.radii[first_idx:self.sample_count]
+        radial_speeds = self.radial_speeds[first_idx:self.sample_count]
+        ground_radius = state.fGroundRadius
+
+        below_ground = radii <= ground_radius
+        impact_idx = int(np.argmax(below_ground))
+        if not below_ground[impact_idx]:
+            # no impact within the trajectory
+            return
+        if impact_idx == 0:
+            impact_time = elapsed
+            impact_radial_speed = state.fRadialSpeed
+        else:
+            frac = (radii[impact_idx - 1] - ground_radius) / (radii[impact_idx - 1] - radii[impact_idx])
+            impact_time = times[impact_idx - 1] + frac * self.step_s
+            impact_radial_speed = radial_speeds[impact_idx - 1] + frac * (radial_speeds[impact_idx] - radial_speeds[impact_idx - 1])
+        impact_tangential_speed = self.angular_momentum / ground_radius
+        prediction.bIsImpactPredicted = True
+        prediction.fTimeToImpact = max(impact_time - elapsed, 0.0)
+        prediction.fImpactSpeed = math.sqrt(impact_radial_speed * impact_radial_speed + impact_tangential_speed * impact_tangential_speed)
+
+        thrust_accel = state.fThrustMax / state.fMass if state.fMass > 0.0 else 0.0
+        radius_tolerance = max(self.RADIUS_TOLERANCE_RATIO * (state.fRadius - ground_radius), self.MIN_RADIUS_TOLERANCE_M)
+        if ((abs(thrust_accel - self.burn_thrust_accel) > self.THRUST_TOLERANCE_RATIO * thrust_accel) or
+                (abs(ground_radius - self.burn_ground_radius) > radius_tolerance)):
+            self.burn_start_time = self.__find_burn_start(times[:impact_idx + 1], radii[:impact_idx + 1],
+                                                          radial_speeds[:impact_idx + 1], ground_radius, thrust_accel)
+            self.burn_thrust_accel = thrust_accel
+            self.burn_ground_radius = ground_radius
+        prediction.fTimeToBurnStart = max(self.burn_start_time - elapsed, 0.0)
+
+    def __find_burn_start(self, times: np.ndarray, radii: np.ndarray, radial_speeds: np.ndarray,
+                          ground_radius: float, thrust_accel: float) -> float:
+        """ Returns the latest time along the trajectory samples to start a retrograde burn at thrust_accel
+            that stops the vessel above ground_radius, or infinity if the thrust never overcomes gravity. """
+        mu = self.gravitational_parameter
+        h = self.angular_momentum
+        tangential_speeds = h / radii
+        speeds = np.sqrt(radial_speeds * radial_speeds + tangential_speeds * tangential_speeds)
+        descent_speeds = np.maximum(-radial_speeds, 0.0)
+        gravities = mu / (radii * radii)
+        altitudes = radii - ground_radius
+
+        # Bracket: killing the speed at the thrust less the whole gravity is the longest way to stop,
+        # and the descent at most that long; keeping the flight path angle, it covers its vertical
+        # share of the way at the thrust less the gravity along the velocity, an optimistic estimate as
+        # gravity steepens the path while braking.
+        net_decelerations = thrust_accel - gravities
+        is_stoppable = net_decelerations > 0.0
+        stopping_distances = speeds * speeds / (2.0 * np.where(is_stoppable, net_decelerations, 1.0))
+        early_margins = np.where(is_stoppable, altitudes - stopping_distances, -math.inf)
+        if not is_stoppable.any():
+            # no engines, or too weak to ever brake
+            return math.inf
+        path_decelerations = thrust_accel - gravities * descent_speeds / np.maximum(speeds, 1e-9)
+        is_stoppable = path_decelerations > 0.0
+        stopping_heights = descent_speeds * speeds / (2.0 * np.where(is_stoppable, path_decelerations, 1.0))
+        late_margins = np.where(is_stoppable, altitudes - stopping_heights, -math.inf)
+        early_time = self.__find_zero_crossing(times, early_margins)
+        late_time = self.__find_zero_crossing(times, late_margins)
+        if (late_time - early_time) <= self.BURN_TIME_TOLERANCE_S:
+            return late_time
+
+        # Within the bracket, the lowest altitude of a simulated burn falls steadily with a later start:
+        # its zero is found with the Illinois variant of regula falsi.
+        late_altitude = self.__simulate_burn(late_time, ground_radius, thrust_accel)
+        if late_altitude >= 0.0:
+            return late_time
+        early_altitude = self.__simulate_burn(early_time, ground_radius, thrust_accel)
+        if early_altitude <= 0.0:
+            return early_time
+        side = 0
+        for _ in range(self.MAX_BURN_ITERATIONS):
+            burn_time = (early_time * late_altitude - late_time * early_altitude) / (late_altitude - early_altitude)
+            altitude = self.__simulate_burn(burn_time, ground_radius, thrust_accel)
+            if altitude >= 0.0:
+                (early_time, early_altitude) = (burn_time, altitude)
+                if side == 1:
+                    late_altitude *= 0.5
+                side = 1
+            else:
+                (late_time, late_altitude) = (burn_time, altitude)
+                if side == -1:
+                    early_altitude *= 0.5
+                side = -1
+            if (abs(altitude) <= self.MIN_RADIUS_TOLERANCE_M) or ((late_time - early_time) <= self.BURN_TIME_TOLERANCE_S):
+                break
+        return early_time
+
+    def __simulate_burn(self, start_time: float, ground_radius: float, thrust_accel: float) -> float:
+        """ Returns the lowest altitude of a retrograde burn at thrust_accel started at start_time on the
+            kept trajectory, stepped with the midpoint method until the vessel stops. The burn goes on
+            through the ground, so that the lowest altitude varies smoothly with the start time. """
+        mu = self.gravitational_parameter
+        idx = min(int(start_time / self.step_s), self.sample_count - 2)
+        frac = (start_time - self.times[idx]) / self.step_s
+        r = float(self.radii[idx] + frac * (self.radii[idx + 1] - self.radii[idx]))
+        vr = float(self.radial_speeds[idx] + frac * (self.radial_speeds[idx + 1] - self.radial_speeds[idx]))
+        vt = self.angular_momentum / r
+
+        # the speed drops at least at the thrust less the gravity
+        speed = math.sqrt(vr * vr + vt * vt)
+        gravity = mu / (r * r)
+        stopping_time = speed / max(thrust_accel - gravity, self.MIN_GRAVITY_RATIO * thrust_accel)
+        step = max(self.BURN_HORIZON_FACTOR * stopping_time / self.NUM_BURN_STEPS, self.MIN_STEP_S)
+        half_step = 0.5 * step
+        stopped_speed = thrust_accel * step
+
+        lowest_radius = r
+        for _ in range(self.NUM_BURN_STEPS):
+            if speed <= stopped_speed:
+                break
+            # polar accelerations: radial r'' - vt^2 / r, tangential (r vt)' / r, thrust against the velocity
+            thrust_per_speed = thrust_accel / speed
+            inv_r = 1.0 / r
+            ar = vt * vt * inv_r - mu * inv_r * inv_r - thrust_per_speed * vr
+            at = -(vr * inv_r + thrust_per_speed) * vt
+            r_mid = r + half_step * vr
+            vr_mid = vr + half_step * ar
+            vt_mid = vt + half_step * at
+            thrust_per_speed = thrust_accel / math.sqrt(vr_mid * vr_mid + vt_mid * vt_mid)
+            inv_r = 1.0 / r_mid
+            ar = vt_mid * vt_mid * inv_r - mu * inv_r * inv_r - thrust_per_speed * vr_mid
+            at = -(vr_mid * inv_r + thrust_per_speed) * vt_mid
+            r += step * vr_mid
+            vr += step * ar
+            vt += step * at
+            speed = math.sqrt(vr * vr + vt * vt)
+            if r < lowest_radius:
+                lowest_radius = r
+        return lowest_radius - ground_radius
+
+    def __find_zero_crossing(self, times: np.ndarray, margins: np.ndarray) -> float:
+        """ Returns the time the margins first go down to zero, interpolated, or the last time if they don't. """
+        is_late = margins <= 0.0
+        idx = int(np.argmax(is_late))
+        if not is_late[idx]:
+            return float(times[-1])
+        if idx == 0:
+            return float(times[0])
+        margin_prev = margins[idx - 1]
+        margin = margins[idx]
+        frac = margin_prev / (margin_prev - margin) if math.isfinite(margin) else 1.0
+        return float(times[idx - 1] + frac * (times[idx] - times[idx - 1]))
@@ -0,0 +1,129 @@
+import math
+import numpy as np
+
+#
+# Constants
+#
+FORWARD_SPEED_IDX = 0
+LATERAL_SPEED_IDX = 1
+PITCH_RATE_IDX = 2
+YAW_RATE_IDX = 3
+NUM_OUTPUTS = 4
+
+#
+# Types
+#
+class FrameKinematics:
+    """ Computes the surface-relative kinematics of a vessel from its position, velocity, rotation
+        (quaternion x, y, z, w) and angular velocity, all given in the celestial body reference frame.
+
+        The vessel's forward and lateral axes are taken straight from the columns of the rotation matrix,
+        then projected onto the local horizontal plane. Single samples are computed with scalar math into
+        preallocated buffers; batches of samples are computed with vectorized NumPy math. """
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.forward_speed = 0.0
+        self.lateral_speed = 0.0
+        self.pitch_rate = 0.0
+        self.yaw_rate = 0.0
+
+        # unit vectors of the last update, in the celestial body reference frame
+        self.up = np.zeros(3)
+        self.surface_forward = np.zeros(3)
+        self.surface_lateral = np.zeros(3)
+
+    #
+    # Public Methods
+    #
+    def update(self, position, velocity, rotation, angular_velocity) -> None:
+        """ Updates the kinematics from a single sample of 3-tuples (and a 4-tuple rotation quaternion). """
+        (px, py, pz) = position
+        (vx, vy, vz) = velocity
+        (qx, qy, qz, qw) = rotation
+        (wx, wy, wz) = angular_velocity
+
+        # local vertical
+        inv_r = 1.0 / math.sqrt(px * px + py * py + pz * pz)
+        ux = px * inv_r
+        uy = py * inv_r
+        uz = pz * inv_r
+
+        # vessel lateral (x) and forward (z) axes, the first and third columns of the rotation matrix
+        lx = 1.0 - 2.0 * (qy * qy + qz * qz)
+        ly = 2.0 * (qx * qy + qw * qz)
+        lz = 2.0 * (qx * qz - qw * qy)
+        fx = 2.0 * (qx * qz + qw * qy)
+        fy = 2.0 * (qy * qz - qw * qx)
+        fz = 1.0 - 2.0 * (qx * qx + qy * qy)
+
+        # project the axes onto the local horizontal plane
+        d = fx * ux + fy * uy + fz * uz
+        sfx = fx - ux * d
+        sfy = fy - uy * d
+        sfz = fz - uz * d
+        inv_n = 1.0 / math.sqrt(sfx * sfx + sfy * sfy + sfz * sfz)
+        sfx *= inv_n
+        sfy *= inv_n
+        sfz *= inv_n
+        d = lx * ux + ly * uy + lz * uz
+        slx = lx - ux * d
+        sly = ly - uy * d
+        slz = lz - uz * d
+        inv_n = 1.0 / math.sqrt(slx * slx + sly * sly + slz * slz)
+        slx *= inv_n
+        sly *= inv_n
+        slz *= inv_n
+
+        # signed speeds along the horizontal axes, and rates about the vessel's own axes
+        self.forward_speed = vx * sfx + vy * sfy + vz * sfz
+        self.lateral_speed = vx * slx + vy * sly + vz * slz
+        self.pitch_rate = wx * lx + wy * ly + wz * lz
+        self.yaw_rate = wx * fx + wy * fy + wz * fz
+
+        self.up[0] = ux
+        self.up[1] = uy
+        self.up[2] = uz
+        self.surface_forward[0] = sfx
+        self.surface_forward[1] = sfy
+        self.surface_forward[2] = sfz
+        self.surface_lateral[0] = slx
+        self.surface_lateral[1] = sly
+        self.surface_lateral[2] = slz
+
+    @staticmethod
+    def compute_batch(position: np.ndarray, velocity: np.ndarray, rotation: np.ndarray,
+                      angular_velocity: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ Computes the kinematics of N samples at once, given (N, 3) arrays and an (N, 4) rotation array.
+            Returns an (N, NUM_OUTPUTS) array indexed by the *_IDX constants, written into out if given. """
+        n = position.shape[0]
+        if out is None:
+            out = np.empty((n, NUM_OUTPUTS))
+
+        up = position / np.linalg.norm(position, axis=1, keepdims=True)
+
+        qx = rotation[:, 0]
+        qy = rotation[:, 1]
+        qz = rotation[:, 2]
+        qw = rotation[:, 3]
+        lateral = np.empty((n, 3))
+        lateral[:, 0] = 1.0 - 2.0 * (qy * qy + qz * qz)
+        lateral[:, 1] = 2.0 * (qx * qy + qw * qz)
+        lateral[:, 2] = 2.0 * (qx * qz - qw * qy)
+        forward = np.empty((n, 3))
+        forward[:, 0] = 2.0 * (qx * qz + qw * qy)
+        forward[:, 1] = 2.0 * (qy * qz - qw * qx)
+        forward[:, 2] = 1.0 - 2.0 * (qx * qx + qy * qy)
+
+        surface_forward = forward - up * np.sum(forward * up, axis=1, keepdims=True)
+        surface_forward /= np.linalg.norm(surface_forward, axis=1, keepdims=True)
+        surface_lateral = lateral - up * np.sum(lateral * up, axis=1, keepdims=True)
+        surface_lateral /= np.linalg.norm(surface_lateral, axis=1, keepdims=True)
+
+        out[:, FORWARD_SPEED_IDX] = np.sum(velocity * surface_forward, axis=1)
+        out[:, LATERAL_SPEED_IDX] = np.sum(velocity * surface_lateral, axis=1)
+        out[:, PITCH_RATE_IDX] = np.sum(angular_velocity * lateral, axis=1)
+        out[:, YAW_RATE_IDX] = np.sum(angular_velocity * forward, axis=1)
+        return out
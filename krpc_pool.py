@@ -0,0 +1,78 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import krpc
+import queue, threading
+
+class KrpcConnectionPool:
+    """ A set of worker kRPC connections for low-priority queries, served by a thread pool with one
+        connection per thread. Queries submitted here run concurrently with each other, and never
+        queue behind the requests of the control connection.
+
+        Tasks are callables taking the worker's connection as their first argument. Remote objects
+        obtained from another connection must be rebound to it with rebind() before use. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, ip_address, rpc_port, num_connections: int, rpc_accounting=None):
+        self.ip_address = ip_address
+        self.rpc_port = rpc_port
+        self.num_connections = num_connections
+        self.rpc_accounting = rpc_accounting
+        self.connections = []
+        self.executor = None
+        self.thread_state = threading.local()
+
+    #
+    # Public Methods
+    #
+    def connect(self) -> None:
+        """ Opens the worker connections, without stream connections. Raises if any of them fails. """
+        idle_connections = queue.Queue()
+        try:
+            for idx in range(self.num_connections):
+                connection = krpc.connect(
+                    name="Kockpit worker {0}".format(idx),
+                    address=self.ip_address,
+                    rpc_port=self.rpc_port,
+                    stream_port=None)
+                if self.rpc_accounting is not None:
+                    self.rpc_accounting.attach(connection)
+                self.connections.append(connection)
+                idle_connections.put(connection)
+        except Exception:
+            self.close()
+            raise
+
+        def bind_connection():
+            self.thread_state.connection = idle_connections.get_nowait()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.num_connections,
+            thread_name_prefix="krpc-pool",
+            initializer=bind_connection)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for connection in self.connections:
+            try:
+                # also unblocks a worker waiting on a reply
+                connection.close()
+            except Exception:
+                pass
+        self.connections = []
+
+    def submit(self, fn, *args) -> Future:
+        """ Runs fn(connection, *args) on the next free worker connection. """
+        return self.executor.submit(self.__run_task, fn, *args)
+
+    @staticmethod
+    def rebind(remote_object, connection):
+        """ Returns a proxy of remote_object bound to connection. Object ids are global to the server. """
+        return type(remote_object)(connection, remote_object._object_id)
+
+    #
+    # Private Methods
+    #
+    def __run_task(self, fn, *args):
+        return fn(self.thread_state.connection, *args)
@@ -1,28 +1,77 @@
 from datetime import datetime, timedelta
-import krpc, math
+import krpc
+import math
+from connection_health import ConnectionHealth
 import numpy as np
-from ksp_types import VesselAttitude, VesselFlightControl, VesselFlightState, VesselOrbitalParameters, VesselResources
-from pyquaternion import Quaternion
-from util import project_a_onto_b, project_vector_a_onto_plane_b, vector_normalize
+from ksp_types import ResourceAmount, VesselAttitude, VesselFlightControl, VesselFlightState, VesselOrbitalParameters, VesselResources, VesselTrajectoryState
+from kinematics import FrameKinematics, FORWARD_SPEED_IDX, LATERAL_SPEED_IDX, PITCH_RATE_IDX, YAW_RATE_IDX, NUM_OUTPUTS
+from krpc_pool import KrpcConnectionPool
+from concurrent.futures import Future
+from orbit_propagator import OrbitPropagator
+from rpc_accounting import RpcAccounting
+from vessel_streams import VesselStreams
+import time
 
 class KspInterface:
     #
     # Constants
     #
     MAX_RETRY_INTERVAL_MS = 5000
+    IS_DRAWING_DEBUG_MARKERS = False # each marker update costs two RPCs per tick
+    ORBIT_ELEMENTS_REFRESH_INTERVAL_MS = 10000 # bounds the drift from drag and physics-frame integration
+    STREAM_FIRST_UPDATE_TIMEOUT_S = 5.0
 
     #
     # Constructor
     #
-    def __init__(self, ip_address, rpc_port, stream_port):
+    def __init__(self, ip_address, rpc_port, stream_port, tracked_resources, is_rpc_accounting_enabled=False, pool_size=0,
+                 tracked_vessel_names=(), control_write_deadband=0.0, control_write_max_rate_hz=0.0):
         self.ip_address = ip_address
         self.rpc_port = rpc_port
         self.stream_port = stream_port
+        self.tracked_resources = list(tracked_resources)
+        self.tracked_vessel_names = list(tracked_vessel_names)
         self.is_connected = False
         self.is_data_streaming = False
         self.last_connect_time = datetime.now()
         self.last_data_setup_time = datetime.now()
         self.retry_interval_ms = 100
+        self.krpc_version = ""
+        self.health = ConnectionHealth()
+        self.rpc_accounting = RpcAccounting() if is_rpc_accounting_enabled else None
+
+        # Worker connections for low-priority queries, the main connection is kept for control
+        self.pool_size = pool_size
+        self.pool = None
+
+        # Monitored vessels: the active vessel first, then the tracked vessels found by name.
+        # The selected vessel is the one shown on the UI; its selection is requested by name
+        # from the UI thread, and applied by the monitor thread.
+        self.vessels = []
+        self.selected_vessel_idx = 0
+        self.requested_vessel_name = None
+
+        # Control writes: only the axes that moved past the deadband are sent, at most at the capped rate
+        self.control_write_deadband = control_write_deadband
+        self.control_write_min_interval_s = 1.0 / control_write_max_rate_hz if control_write_max_rate_hz > 0.0 else 0.0
+
+        # Buffers of the batched flight state computation, one row per vessel
+        self.batch_position = np.zeros((0, 3))
+        self.batch_velocity = np.zeros((0, 3))
+        self.batch_rotation = np.zeros((0, 4))
+        self.batch_angular_velocity = np.zeros((0, 3))
+        self.batch_kinematics = np.zeros((0, NUM_OUTPUTS))
+
+        # Local orbit propagation of the selected vessel, re-seeded after each burn, SOI change or vessel switch
+        self.orbit_propagator = OrbitPropagator()
+        self.last_orbit_elements_time = datetime.now()
+        self.orbit_generation = 0 # bumped whenever the orbit changes, to discard queries started before
+        self.orbit_elements_query = None
+        self.orbit_fallback_query = None
+        self.orbit_fallback = None # (period, time to Ap, time to Pe, true anomaly) from the server
+
+        # Surface-relative kinematics of the selected vessel, for the debug markers
+        self.kinematics = FrameKinematics()
 
     #
     # Public Methods
@@ -39,6 +88,14 @@ class KspInterface:
                 address=self.ip_address,
                 rpc_port=self.rpc_port,
                 stream_port=self.stream_port)
+            if self.rpc_accounting is not None:
+                self.rpc_accounting.attach(self.krpc_connection)
+            self.krpc_version = self.krpc_connection.krpc.get_status().version
+            self.krpc_connection.add_stream_update_callback(self.health.on_stream_update)
+            self.health.start(self.krpc_connection.krpc.get_status)
+            if self.pool_size > 0:
+                self.pool = KrpcConnectionPool(self.ip_address, self.rpc_port, self.pool_size, self.rpc_accounting)
+                self.pool.connect()
             self.is_connected = True
             self.retry_interval_ms = 100
 
@@ -46,6 +103,7 @@ class KspInterface:
 
         except Exception as e:
             self.is_connected = False
+            self.__close_pool()
             print("Failed to connect KRPC interface")
             print("Exception type    : ", type(e).__name__)
             print("Exception message : ", str(e))
@@ -58,6 +116,8 @@ class KspInterface:
     def deinit_connection(self) -> None:
         if not self.is_connected:
             return
+        self.health.stop()
+        self.__close_pool()
         self.krpc_connection.close()
 
     def setup_connection_if_needed(self) -> None:
@@ -84,37 +144,45 @@ class KspInterface:
             print("Setting up KRPC data streams...")
             self.last_data_setup_time = datetime.now()
 
-            self.gravitational_constant = self.krpc_connection.space_center.g
-            vessel = self.krpc_connection.space_center.active_vessel
-            self.stream_vessel_orbit = self.krpc_connection.add_stream(getattr, vessel, 'orbit')
-            vessel_flight = vessel.flight() # surface reference frame
-
-            # Vessel attitude
-            self.stream_heading = self.krpc_connection.add_stream(getattr, vessel_flight, 'heading')
-            self.stream_pitch = self.krpc_connection.add_stream(getattr, vessel_flight, 'pitch')
-            self.stream_roll = self.krpc_connection.add_stream(getattr, vessel_flight, 'roll')
-
-            # Vessel flight state
-            self.stream_situation = self.krpc_connection.add_stream(getattr, vessel, 'situation')
-            self.stream_max_thrust = self.krpc_connection.add_stream(getattr, vessel, 'max_thrust')
-            self.stream_mass = self.krpc_connection.add_stream(getattr, vessel, 'mass')
-            self.stream_max_torque = self.krpc_connection.add_stream(getattr, vessel, 'available_torque')
-            self.stream_moi = self.krpc_connection.add_stream(getattr, vessel, 'moment_of_inertia')
-
-            # Vessel's orbital parameters
-            # self.stream_orbital_period = self.krpc_connection.add_stream(getattr, vessel.orbit, 'period')
-            # self.stream_time_to_apoapsis = self.krpc_connection.add_stream(getattr, vessel.orbit, 'time_to_apoapsis')
-            # self.stream_time_to_periapsis = self.krpc_connection.add_stream(getattr, vessel.orbit, 'time_to_periapsis')
-
-            # Visual debugging markers
-            self.draw_vessel_pos_unit = self.krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), self.stream_vessel_orbit().body.reference_frame)
-            self.draw_vessel_pos_unit.color = (0.0, 1.0, 0.0)
-            self.draw_vessel_vel_unit = self.krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), self.stream_vessel_orbit().body.reference_frame)
-            self.draw_vessel_vel_unit.color = (0.0, 0.0, 1.0)
-            self.draw_vessel_srfvel_unit = self.krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), self.stream_vessel_orbit().body.reference_frame)
-            self.draw_vessel_srfvel_unit.color = (1.0, 0.0, 0.0)
-            self.draw_vessel_fwd_unit = self.krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), self.stream_vessel_orbit().body.reference_frame)
-            self.draw_vessel_fwd_unit.color = (1.0, 0.6, 0.1)
+            # Game time
+            space_center = self.krpc_connection.space_center
+            self.stream_ut = self.krpc_connection.add_stream(getattr, space_center, 'ut')
+
+            # Monitored vessels, and their streams
+            active_vessel = space_center.active_vessel
+            vessels_to_monitor = [(active_vessel, active_vessel.name)]
+            if self.tracked_vessel_names:
+                for vessel in space_center.vessels:
+                    if vessel == active_vessel:
+                        continue
+                    vessel_name = vessel.name
+                    if vessel_name in self.tracked_vessel_names:
+                        vessels_to_monitor.append((vessel, vessel_name))
+            vessels = []
+            for (vessel, vessel_name) in vessels_to_monitor:
+                vessel_streams = VesselStreams(self.krpc_connection, vessel, vessel_name, self.tracked_resources, self.IS_DRAWING_DEBUG_MARKERS)
+                vessel_streams.setup()
+                vessels.append(vessel_streams)
+
+            # Start all streams at once; started one by one on their first reads, each one would wait
+            # a physics frame for its first update
+            self.__start_streams([self.stream_ut] + [stream for vessel_streams in vessels for stream in vessel_streams.get_streams()])
+
+            num_vessels = len(vessels)
+            self.batch_position = np.zeros((num_vessels, 3))
+            self.batch_velocity = np.zeros((num_vessels, 3))
+            self.batch_rotation = np.zeros((num_vessels, 4))
+            self.batch_angular_velocity = np.zeros((num_vessels, 3))
+            self.batch_kinematics = np.zeros((num_vessels, NUM_OUTPUTS))
+
+            # Keep the selected vessel across setups, if it's still monitored. The index is reset before
+            # the list is swapped, so that the UI thread never sees an index past the end of the list.
+            self.selected_vessel_idx = 0
+            self.vessels = vessels
+            self.__apply_vessel_selection()
+
+            # Selected vessel's orbital parameters are propagated locally from the orbital elements
+            self.__reset_orbit()
 
             self.is_data_streaming = True
             self.retry_interval_ms = 100
@@ -127,30 +195,52 @@ class KspInterface:
             self.is_data_streaming = False
             self.__increase_retry_interval()
 
-    def get_krpc_status(self) -> str:
-        krpc_status = "no connection"
-
+    def check_connection_health(self) -> bool:
+        """ Resets the connection if the heartbeat has failed or stalled. Issues no RPCs. """
         if not self.is_connected:
-            return krpc_status
-
-        try:
-            krpc_status = self.krpc_connection.krpc.get_status().version
+            return False
 
-        except ConnectionAbortedError as e:
+        if not self.health.is_alive():
             # Client connection has failed, reset connection status
-            krpc_status = "no connection"
+            print("KRPC connection failure")
+            e = self.health.heartbeat_failure
+            if e is not None:
+                print("Exception type    : ", type(e).__name__)
+                print("Exception message : ", str(e))
+            else:
+                print("No heartbeat for {0:.1f} s".format(self.health.DEAD_TIMEOUT_S))
+            self.health.stop()
+            self.__close_pool()
             self.is_connected = False
             self.is_data_streaming = False
-            print("KRPC connection failure")
-            print("Exception type    : ", type(e).__name__)
-            print("Exception message : ", str(e))
+            try:
+                self.krpc_connection.close()
+            except Exception:
+                pass
 
-        except Exception as e:
-            print("Failed to get KRPC status")
-            print("Exception type    : ", type(e).__name__)
-            print("Exception message : ", str(e))
+        return self.is_connected
+
+    def get_krpc_status(self) -> str:
+        """ Returns the server version and connection health. Issues no RPCs. """
+        if not self.is_connected:
+            return "no connection"
+        return "{0}  {1}".format(self.krpc_version, self.health.get_health_str())
 
-        return krpc_status
+    def get_vessel_names(self) -> list:
+        """ Returns the names of the monitored vessels, the active vessel first. """
+        return [vessel_streams.name for vessel_streams in self.vessels]
+
+    def get_selected_vessel_name(self) -> str:
+        """ Safe to call from any thread, while the vessels are set up again. """
+        vessels = self.vessels
+        selected_vessel_idx = self.selected_vessel_idx
+        if selected_vessel_idx >= len(vessels):
+            return ""
+        return vessels[selected_vessel_idx].name
+
+    def select_vessel(self, vessel_name: str) -> None:
+        """ Requests the vessel shown on the UI to be switched. Safe to call from any thread. """
+        self.requested_vessel_name = vessel_name
 
     def get_vessel_attitude(self) -> VesselAttitude:
         is_valid = False
@@ -159,9 +249,10 @@ class KspInterface:
         roll = 0
         if self.is_connected and self.is_data_streaming:
             try:
-                heading = self.stream_heading()
-                pitch = self.stream_pitch()
-                roll = self.stream_roll()
+                vessel_streams = self.__get_selected_vessel()
+                heading = vessel_streams.stream_heading()
+                pitch = vessel_streams.stream_pitch()
+                roll = vessel_streams.stream_roll()
                 is_valid = True
             except Exception as e:
                 print("Failed to get KRPC vessel attitude")
@@ -171,86 +262,132 @@ class KspInterface:
         return VesselAttitude(is_valid, heading, pitch, roll)
 
     def get_vessel_flight_state(self) -> VesselFlightState:
-        data = VesselFlightState(False, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        """ Returns the selected vessel's flight state. No RPCs are issued here. """
+        flight_states = self.get_fleet_flight_states()
+        if not flight_states:
+            return VesselFlightState(False, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return flight_states[self.selected_vessel_idx]
+
+    def get_fleet_flight_states(self) -> list:
+        """ Computes the flight state of every monitored vessel, in get_vessel_names() order, from cached
+            stream values only. The kinematics of all vessels are computed in one vectorized pass. """
+        vessels = self.vessels
+        flight_states = [VesselFlightState(False, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0) for _ in vessels]
         if self.is_connected and self.is_data_streaming:
             try:
-                vessel = self.krpc_connection.space_center.active_vessel
-                vessel_mass = self.stream_mass()
-                vessel_cbody_refframe = self.stream_vessel_orbit().body.reference_frame
-                vessel_pos = vessel.position(vessel_cbody_refframe)
-                vessel_pos_vec = np.array([vessel_pos[0], vessel_pos[1], vessel_pos[2]])
-                vessel_pos_mag2 = np.dot(vessel_pos_vec, vessel_pos_vec)
-                vessel_pos_mag = math.sqrt(vessel_pos_mag2)
-                vessel_pos_unit = vessel_pos_vec / vessel_pos_mag
-                vessel_vel = vessel.velocity(vessel_cbody_refframe)
-                vessel_vel_vec = np.array([vessel_vel[0], vessel_vel[1], vessel_vel[2]])
-                vessel_vel_mag2 = np.dot(vessel_vel_vec, vessel_vel_vec)
-                vessel_vel_mag = math.sqrt(vessel_vel_mag2)
-                vessel_vel_unit = np.array([vessel_vel[0] / vessel_vel_mag, vessel_vel[1] / vessel_vel_mag, vessel_vel[2] / vessel_vel_mag])
-                cbody_gravity = self.gravitational_constant * vessel.orbit.body.mass / vessel_pos_mag2
-
-                vessel_srfvel_vec = project_vector_a_onto_plane_b(vessel_vel_vec, vessel_pos_unit)
-                vessel_srfvel_mag2 = np.dot(vessel_srfvel_vec, vessel_srfvel_vec)
-                vessel_srfvel_mag = math.sqrt(vessel_srfvel_mag2)
-                vessel_srfvel_unit = vessel_srfvel_vec / vessel_srfvel_mag
-
-                vessel_rot = vessel.rotation(vessel_cbody_refframe)
-                vessel_rot_q = Quaternion(vessel_rot[3], vessel_rot[0], vessel_rot[1], vessel_rot[2])
-                vessel_fwd = vessel_rot_q.rotate(np.array([0.0, 0.0, 1.0]))
-                vessel_lat = vessel_rot_q.rotate(np.array([1.0, 0.0, 0.0]))
-
-                surface_vessel_fwd = project_vector_a_onto_plane_b(vessel_fwd, vessel_pos_unit)
-                surface_vessel_fwd = vector_normalize(surface_vessel_fwd)
-                surface_vessel_lat = project_vector_a_onto_plane_b(vessel_lat, vessel_pos_unit)
-                surface_vessel_lat = vector_normalize(surface_vessel_lat)
-
-                surface_vessel_vel_fwd = project_a_onto_b(vessel_vel_vec, surface_vessel_fwd)
-                surface_vessel_vel_lat = project_a_onto_b(vessel_vel_vec, surface_vessel_lat)
-
-                vessel_ang_vel = vessel.angular_velocity(vessel_cbody_refframe)
-                vessel_ang_vel_vec = np.array([vessel_ang_vel[0], vessel_ang_vel[1], vessel_ang_vel[2]])
-                vessel_ang_vel_pitch = project_a_onto_b(vessel_ang_vel_vec, vessel_lat)
-                vessel_ang_vel_yaw = project_a_onto_b(vessel_ang_vel_vec, vessel_fwd)
-
-                self.draw_vessel_pos_unit.start = vessel_pos
-                self.draw_vessel_pos_unit.end = vessel_pos_vec + (vessel_pos_unit * 10.0)
-                self.draw_vessel_vel_unit.start = vessel_pos
-                self.draw_vessel_vel_unit.end = vessel_pos + (vessel_vel_unit * 10.0)
-                self.draw_vessel_srfvel_unit.start = vessel_pos
-                self.draw_vessel_srfvel_unit.end = vessel_pos + (vessel_srfvel_unit * 10.0)
-                self.draw_vessel_fwd_unit.start = vessel_pos
-                self.draw_vessel_fwd_unit.end = vessel_pos + (surface_vessel_vel_lat * 10.0)
-
-                data.iSituation = self.stream_situation()
-                data.fWeight = cbody_gravity * vessel_mass
-                data.fThrustMax = self.stream_max_thrust()
-                data.fVerticalSpeed = vessel.flight(self.stream_vessel_orbit().body.reference_frame).vertical_speed
-                data.fForwardSpeed = math.sqrt(np.dot(surface_vessel_vel_fwd, surface_vessel_vel_fwd)) * np.sign(np.dot(surface_vessel_vel_fwd, surface_vessel_fwd))
-                data.fLateralSpeed = math.sqrt(np.dot(surface_vessel_vel_lat, surface_vessel_vel_lat)) * np.sign(np.dot(surface_vessel_vel_lat, surface_vessel_lat))
-                data.fPitchSpeed = math.sqrt(np.dot(vessel_ang_vel_pitch, vessel_ang_vel_pitch)) * np.sign(np.dot(vessel_ang_vel_pitch, surface_vessel_lat))
-                data.fPitchTorqueMax = self.stream_max_torque()[0][0]
-                data.fPitchMomentOfInertia = self.stream_moi()[0]
-                data.fYawSpeed = math.sqrt(np.dot(vessel_ang_vel_yaw, vessel_ang_vel_yaw)) * np.sign(np.dot(vessel_ang_vel_yaw, surface_vessel_fwd))
-                data.fYawTorqueMax = self.stream_max_torque()[0][1]
-                data.fYawMomentOfInertia = self.stream_moi()[1]
-                data.bIsDataValid = True
+                self.__apply_vessel_selection()
+                for (idx, vessel_streams) in enumerate(vessels):
+                    self.__update_cbody_cache_if_needed(idx)
+                    self.batch_position[idx] = vessel_streams.stream_position()
+                    self.batch_velocity[idx] = vessel_streams.stream_velocity()
+                    self.batch_rotation[idx] = vessel_streams.stream_rotation()
+                    self.batch_angular_velocity[idx] = vessel_streams.stream_angular_velocity()
+                FrameKinematics.compute_batch(self.batch_position, self.batch_velocity, self.batch_rotation,
+                                              self.batch_angular_velocity, out=self.batch_kinematics)
+
+                ut = self.stream_ut()
+                for (idx, vessel_streams) in enumerate(vessels):
+                    data = flight_states[idx]
+                    vessel_pos = self.batch_position[idx]
+                    vessel_pos_mag2 = vessel_pos[0] * vessel_pos[0] + vessel_pos[1] * vessel_pos[1] + vessel_pos[2] * vessel_pos[2]
+                    cbody_gravity = vessel_streams.cbody.fGravitationalParameter / vessel_pos_mag2
+                    kinematics = self.batch_kinematics[idx]
+                    max_torque = vessel_streams.stream_max_torque()
+                    moi = vessel_streams.stream_moi()
+                    data.fUniversalTime = ut
+                    data.iSituation = vessel_streams.stream_situation().value
+                    data.fWeight = cbody_gravity * vessel_streams.stream_mass()
+                    data.fThrustMax = vessel_streams.stream_max_thrust()
+                    data.fVerticalSpeed = vessel_streams.stream_vertical_speed()
+                    data.fForwardSpeed = float(kinematics[FORWARD_SPEED_IDX])
+                    data.fLateralSpeed = float(kinematics[LATERAL_SPEED_IDX])
+                    data.fPitchSpeed = float(kinematics[PITCH_RATE_IDX])
+                    data.fPitchTorqueMax = max_torque[0][0]
+                    data.fPitchMomentOfInertia = moi[0]
+                    data.fYawSpeed = float(kinematics[YAW_RATE_IDX])
+                    data.fYawTorqueMax = max_torque[0][1]
+                    data.fYawMomentOfInertia = moi[1]
+                    data.bIsDataValid = True
+
+                if self.IS_DRAWING_DEBUG_MARKERS:
+                    self.__draw_debug_markers(vessels[self.selected_vessel_idx])
             except Exception as e:
                 print("Failed to get KRPC vessel flight state")
                 print("Exception type    : ", type(e).__name__)
                 print("Exception message : ", str(e))
                 self.is_data_streaming = False
+                for data in flight_states:
+                    data.bIsDataValid = False
+        return flight_states
+
+    def get_vessel_trajectory_state(self) -> VesselTrajectoryState:
+        """ Returns the selected vessel's state in the plane of its trajectory, from cached stream values only. """
+        data = VesselTrajectoryState(False, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        if self.is_connected and self.is_data_streaming:
+            try:
+                vessel_streams = self.__get_selected_vessel()
+                (px, py, pz) = vessel_streams.stream_position()
+                (vx, vy, vz) = vessel_streams.stream_velocity()
+                radius = math.sqrt(px * px + py * py + pz * pz)
+                # |r x v|
+                hx = py * vz - pz * vy
+                hy = pz * vx - px * vz
+                hz = px * vy - py * vx
+                data.fUniversalTime = self.stream_ut()
+                data.fRadius = radius
+                data.fRadialSpeed = (px * vx + py * vy + pz * vz) / radius
+                data.fAngularMomentum = math.sqrt(hx * hx + hy * hy + hz * hz)
+                data.fGroundRadius = radius - vessel_streams.stream_surface_altitude()
+                data.fGravitationalParameter = vessel_streams.cbody.fGravitationalParameter
+                data.fMass = vessel_streams.stream_mass()
+                data.fThrustMax = vessel_streams.stream_max_thrust()
+                data.bIsDataValid = True
+            except Exception as e:
+                print("Failed to get KRPC vessel trajectory state")
+                print("Exception type    : ", type(e).__name__)
+                print("Exception message : ", str(e))
+                self.is_data_streaming = False
         return data
 
     def get_vessel_orbital_parameters(self) -> VesselOrbitalParameters:
-        data = VesselOrbitalParameters(False, "", 0.0, 0.0, 0.0, 0.0)
+        """ Propagates the orbit locally while coasting. Falls back to the server values
+            while the engines are thrusting, or when the orbit is not elliptical. Server queries
+            run on the connection pool when there is one, and are never waited for: the results
+            of the latest completed queries are used. """
+        data = VesselOrbitalParameters(False, "", 0.0, 0.0, 0.0, 0.0, 0.0)
         if self.is_connected and self.is_data_streaming:
             try:
-                data.sCelestialBodyName = self.stream_vessel_orbit().body.name
-                data.fCelestialBodyMass = self.stream_vessel_orbit().body.mass
-                data.fPeriod = self.stream_vessel_orbit().period
-                data.fTimeToApoapsis = self.stream_vessel_orbit().time_to_apoapsis
-                data.fTimeToPeriapsis = self.stream_vessel_orbit().time_to_periapsis
-                data.bIsDataValid = True
+                vessel_streams = self.__get_selected_vessel()
+                self.__update_cbody_cache_if_needed(self.selected_vessel_idx)
+                data.sCelestialBodyName = vessel_streams.cbody.sName
+                data.fCelestialBodyMass = vessel_streams.cbody.fMass
+
+                is_thrusting = (vessel_streams.stream_throttle() * vessel_streams.stream_max_thrust()) > 0.0
+                if is_thrusting:
+                    self.__invalidate_orbit()
+                else:
+                    self.__collect_orbital_elements()
+                    time_since_last_elements = datetime.now() - self.last_orbit_elements_time
+                    if (self.orbit_elements_query is None) and \
+                       ((not self.orbit_propagator.has_elements) or
+                        (time_since_last_elements > timedelta(milliseconds=self.ORBIT_ELEMENTS_REFRESH_INTERVAL_MS))):
+                        self.last_orbit_elements_time = datetime.now()
+                        self.orbit_elements_query = (self.orbit_generation, self.__submit_query(
+                            self.__query_orbital_elements, vessel_streams.stream_vessel_orbit(), vessel_streams.cbody.fGravitationalParameter))
+                        self.__collect_orbital_elements()
+
+                if self.orbit_propagator.is_elliptical:
+                    (data.fPeriod, data.fTimeToApoapsis, data.fTimeToPeriapsis, data.fTrueAnomaly) = \
+                        self.orbit_propagator.propagate(self.stream_ut())
+                    data.bIsDataValid = True
+                else:
+                    self.__collect_orbit_fallback()
+                    if self.orbit_fallback_query is None:
+                        self.orbit_fallback_query = self.__submit_query(self.__query_orbit_fallback, vessel_streams.stream_vessel_orbit())
+                        self.__collect_orbit_fallback()
+                    if self.orbit_fallback is not None:
+                        (data.fPeriod, data.fTimeToApoapsis, data.fTimeToPeriapsis, data.fTrueAnomaly) = self.orbit_fallback
+                        data.bIsDataValid = True
             except Exception as e:
                 print("Failed to get KRPC vessel orbit")
                 print("Exception type    : ", type(e).__name__)
@@ -259,40 +396,187 @@ class KspInterface:
         return data
 
     def get_vessel_resources(self) -> VesselResources:
-        data = VesselResources(False, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
-        if self.is_connected:
+        data = VesselResources(False, 0.0, [])
+        if self.is_connected and self.is_data_streaming:
             try:
-                (data.fWater, data.fWaterMax) = self.get_total_resource("Water")
-                (data.fFood, data.fFoodMax) = self.get_total_resource("Food")
-                (data.fOxygen, data.fOxygenMax) = self.get_total_resource("Oxygen")
-                (data.fAtmo, data.fAtmoMax) = self.get_total_resource("Atmosphere")
-                (data.fWasteAtmo, data.fWasteAtmoMax) = self.get_total_resource("WasteAtmosphere")
+                vessel_streams = self.__get_selected_vessel()
+                data.fUniversalTime = self.stream_ut()
+                for resource_name in self.tracked_resources:
+                    (amount, max) = vessel_streams.get_total_resource(resource_name)
+                    data.lResources.append(ResourceAmount(resource_name, amount, max))
                 data.bIsDataValid = True
             except Exception as e:
                 print("Failed to get KRPC vessel resources")
                 print("Exception type    : ", type(e).__name__)
                 print("Exception message : ", str(e))
+                self.is_data_streaming = False
         return data
 
     def get_total_resource(self, resource_name: str) -> tuple:
-        """ Returns the total amount of resource in the active vessel as a tuple: (amount, max)"""
-        amount = 0
-        max = 0
-        all_resources = self.krpc_connection.space_center.active_vessel.resources.with_resource(resource_name)
-        for r in all_resources:
-            amount += r.amount
-            max += r.max
-        return (amount, max)
+        """ Returns the total amount of a tracked resource in the selected vessel as a tuple: (amount, max)"""
+        return self.__get_selected_vessel().get_total_resource(resource_name)
 
     def set_flight_controls(self, control: VesselFlightControl) -> None:
+        """ Sets the flight controls of the selected vessel. """
+        self.set_vessel_flight_controls(self.selected_vessel_idx, control)
+
+    def set_vessel_flight_controls(self, vessel_idx: int, control: VesselFlightControl) -> None:
+        """ Sets the flight controls of a monitored vessel, by its index in get_vessel_names(). Only the
+            axes that changed are sent; see VesselStreams.write_controls(). An invalid control sends
+            nothing, and has every axis sent by the next valid one, as the pilot may move them meanwhile. """
         if control.bIsInputValid:
-            self.krpc_connection.space_center.active_vessel.control.throttle = control.fThrottle
-            self.krpc_connection.space_center.active_vessel.control.pitch = control.fPitch
-            self.krpc_connection.space_center.active_vessel.control.yaw = control.fYaw
+            self.vessels[vessel_idx].write_controls(control, self.control_write_deadband, self.control_write_min_interval_s)
+        else:
+            self.vessels[vessel_idx].invalidate_written_controls()
+
+    def invalidate_flight_controls(self, vessel_idx: int) -> None:
+        """ Has every axis of a monitored vessel sent by the next set_vessel_flight_controls(), e.g. when
+            its control program changes. """
+        self.vessels[vessel_idx].invalidate_written_controls()
 
     #
     # Private Methods
     #
+    def __get_selected_vessel(self) -> VesselStreams:
+        self.__apply_vessel_selection()
+        return self.vessels[self.selected_vessel_idx]
+
+    def __apply_vessel_selection(self) -> None:
+        """ Switches to the vessel requested by select_vessel(), if it is monitored. """
+        requested_vessel_name = self.requested_vessel_name
+        if (requested_vessel_name is None) or (requested_vessel_name == self.vessels[self.selected_vessel_idx].name):
+            return
+        for (idx, vessel_streams) in enumerate(self.vessels):
+            if vessel_streams.name == requested_vessel_name:
+                self.selected_vessel_idx = idx
+                vessel_streams.invalidate_written_controls()
+                self.__reset_orbit()
+                return
+
+    def __update_cbody_cache_if_needed(self, vessel_idx: int) -> None:
+        """ Refreshes the vessel's celestial body cache on SOI changes, which also invalidates the
+            orbit of the selected vessel. """
+        if self.vessels[vessel_idx].update_cbody_cache_if_needed() and (vessel_idx == self.selected_vessel_idx):
+            self.__invalidate_orbit()
+            self.orbit_fallback = None
+
+    def __reset_orbit(self) -> None:
+        """ Forgets everything known about the orbit of the selected vessel. """
+        self.__invalidate_orbit()
+        self.orbit_elements_query = None
+        self.orbit_fallback_query = None
+        self.orbit_fallback = None
+
+    def __start_streams(self, streams: list) -> None:
+        """ Starts the streams without waiting, then waits for their first updates. """
+        for stream in streams:
+            stream.start(wait=False)
+        deadline = time.monotonic() + self.STREAM_FIRST_UPDATE_TIMEOUT_S
+        for stream in streams:
+            with stream.condition:
+                while True:
+                    try:
+                        stream()
+                        break
+                    except krpc.error.StreamError:
+                        remaining_s = deadline - time.monotonic()
+                        if remaining_s <= 0.0:
+                            raise
+                        stream.wait(remaining_s)
+
+    def __invalidate_orbit(self) -> None:
+        self.orbit_generation += 1
+        self.orbit_propagator.invalidate()
+
+    def __collect_orbital_elements(self) -> None:
+        """ Seeds the orbit propagator with the result of the orbital elements query once it's done,
+            unless the orbit has changed since the query was started. """
+        if (self.orbit_elements_query is None) or (not self.orbit_elements_query[1].done()):
+            return
+        (generation, query) = self.orbit_elements_query
+        self.orbit_elements_query = None
+        elements = self.__get_query_result(query, "orbital elements")
+        if (elements is not None) and (generation == self.orbit_generation):
+            self.orbit_propagator.set_elements(*elements)
+
+    def __collect_orbit_fallback(self) -> None:
+        if (self.orbit_fallback_query is None) or (not self.orbit_fallback_query.done()):
+            return
+        query = self.orbit_fallback_query
+        self.orbit_fallback_query = None
+        orbit_fallback = self.__get_query_result(query, "vessel orbit")
+        if orbit_fallback is not None:
+            self.orbit_fallback = orbit_fallback
+
+    def __submit_query(self, fn, *args) -> Future:
+        """ Runs fn(connection, *args) on the connection pool, or right away on the main connection
+            if there is no pool. """
+        if self.pool is not None:
+            return self.pool.submit(fn, *args)
+        query = Future()
+        try:
+            query.set_result(fn(self.krpc_connection, *args))
+        except Exception as e:
+            query.set_exception(e)
+        return query
+
+    def __get_query_result(self, query: Future, query_name: str):
+        """ Returns the result of a finished query, or None if it failed. """
+        try:
+            return query.result()
+        except Exception as e:
+            print("Failed to query KRPC {0}".format(query_name))
+            print("Exception type    : ", type(e).__name__)
+            print("Exception message : ", str(e))
+            return None
+
+    def __close_pool(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    @staticmethod
+    def __query_orbital_elements(connection, vessel_orbit, gravitational_parameter: float) -> tuple:
+        """ Returns the arguments of OrbitPropagator.set_elements() for the vessel's current orbit. """
+        vessel_orbit = KrpcConnectionPool.rebind(vessel_orbit, connection)
+        return (
+            vessel_orbit.semi_major_axis,
+            vessel_orbit.eccentricity,
+            vessel_orbit.mean_anomaly_at_epoch,
+            vessel_orbit.epoch,
+            gravitational_parameter)
+
+    @staticmethod
+    def __query_orbit_fallback(connection, vessel_orbit) -> tuple:
+        """ Returns the server's values of the vessel's orbit as a tuple: (period, tta, ttp, true anomaly) """
+        vessel_orbit = KrpcConnectionPool.rebind(vessel_orbit, connection)
+        return (
+            vessel_orbit.period,
+            vessel_orbit.time_to_apoapsis,
+            vessel_orbit.time_to_periapsis,
+            vessel_orbit.true_anomaly)
+
+    def __draw_debug_markers(self, vessel_streams: VesselStreams) -> None:
+        vessel_pos = vessel_streams.stream_position()
+        vessel_vel = vessel_streams.stream_velocity()
+        self.kinematics.update(vessel_pos, vessel_vel, vessel_streams.stream_rotation(), vessel_streams.stream_angular_velocity())
+        vessel_pos_vec = np.array(vessel_pos)
+        vessel_vel_vec = np.array(vessel_vel)
+        vessel_vel_unit = vessel_vel_vec / np.linalg.norm(vessel_vel_vec)
+        up = self.kinematics.up
+        vessel_srfvel_vec = vessel_vel_vec - up * np.dot(vessel_vel_vec, up)
+        vessel_srfvel_unit = vessel_srfvel_vec / np.linalg.norm(vessel_srfvel_vec)
+        surface_vessel_vel_lat = self.kinematics.surface_lateral * self.kinematics.lateral_speed
+
+        vessel_streams.draw_vessel_pos_unit.start = vessel_pos
+        vessel_streams.draw_vessel_pos_unit.end = vessel_pos_vec + (up * 10.0)
+        vessel_streams.draw_vessel_vel_unit.start = vessel_pos
+        vessel_streams.draw_vessel_vel_unit.end = vessel_pos_vec + (vessel_vel_unit * 10.0)
+        vessel_streams.draw_vessel_srfvel_unit.start = vessel_pos
+        vessel_streams.draw_vessel_srfvel_unit.end = vessel_pos_vec + (vessel_srfvel_unit * 10.0)
+        vessel_streams.draw_vessel_fwd_unit.start = vessel_pos
+        vessel_streams.draw_vessel_fwd_unit.end = vessel_pos_vec + (surface_vessel_vel_lat * 10.0)
+
     def __increase_retry_interval(self) -> None:
         self.retry_interval_ms = self.retry_interval_ms * 2
         if self.retry_interval_ms > self.MAX_RETRY_INTERVAL_MS:
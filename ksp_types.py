@@ -10,6 +10,13 @@ class VesselAttitude:
     fPitch: float
     fRoll: float
 
+@dataclass
+class CelestialBody:
+    bIsDataValid: bool
+    sName: str
+    fMass: float
+    fGravitationalParameter: float
+
 @dataclass
 class VesselOrbitalParameters:
     bIsDataValid: bool
@@ -18,24 +25,32 @@ class VesselOrbitalParameters:
     fPeriod: float
     fTimeToApoapsis: float
     fTimeToPeriapsis: float
+    fTrueAnomaly: float
+
+@dataclass
+class ResourceAmount:
+    sName: str
+    fAmount: float
+    fMax: float
 
 @dataclass
 class VesselResources:
     bIsDataValid: bool
-    fWater: float
-    fWaterMax: float
-    fFood: float
-    fFoodMax: float
-    fOxygen: float
-    fOxygenMax: float
-    fAtmo: float
-    fAtmoMax: float
-    fWasteAtmo: float
-    fWasteAtmoMax: float
+    fUniversalTime: float
+    lResources: list # list of ResourceAmount, in tracked resource order
+
+@dataclass
+class ResourceForecast:
+    bIsDataValid: bool
+    sName: str
+    fRate: float # units per second of universal time, negative when consumed
+    fTimeToEmpty: float # seconds of universal time, inf if not being consumed
+    fTimeToFull: float # seconds of universal time, inf if not being produced
 
 @dataclass
 class VesselFlightState:
     bIsDataValid: bool
+    fUniversalTime: float
     iSituation: int
     fWeight: float
     fThrustMax: float
@@ -49,9 +64,41 @@ class VesselFlightState:
     fYawTorqueMax: float
     fYawMomentOfInertia: float
 
+@dataclass
+class VesselTrajectoryState:
+    bIsDataValid: bool
+    fUniversalTime: float
+    fRadius: float # distance to the body's center
+    fRadialSpeed: float # positive away from the body's center
+    fAngularMomentum: float # specific angular momentum, i.e. radius times tangential speed
+    fGroundRadius: float # distance from the body's center to the terrain under the vessel
+    fGravitationalParameter: float
+    fMass: float
+    fThrustMax: float
+
+@dataclass
+class ImpactPrediction:
+    bIsDataValid: bool
+    bIsImpactPredicted: bool # False when the vessel doesn't hit the ground within the prediction horizon
+    fTimeToImpact: float
+    fImpactSpeed: float # surface-relative
+    fTimeToBurnStart: float # latest start of a full-thrust retrograde burn that stops at the ground, 0 when due, inf when no burn can
+
 @dataclass
 class VesselFlightControl:
     bIsInputValid: bool
     fThrottle: float
     fPitch: float
     fYaw: float
+
+@dataclass
+class ExternalControlInput:
+    bIsInputValid: bool
+    bIsThrottleOverridden: bool
+    bIsPitchOverridden: bool
+    bIsYawOverridden: bool
+    fThrottle: float
+    fPitch: float
+    fYaw: float
+    sControlProgram: str # empty when the external device doesn't select a program
+    fControlProgramData: float
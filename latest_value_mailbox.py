@@ -0,0 +1,35 @@
+class LatestValueMailbox:
+    """ Hands the latest value from a producer thread over to a consumer that polls at its own rate.
+
+        Each put() overwrites the previous value, whether it was taken or not: the mailbox holds a
+        single value, and the consumer is never more than one poll behind the producer. Values are
+        handed over by reference, so the producer must not modify a value once it's put. Meant for
+        one producer and one consumer. """
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.slot = (0, None) # (sequence, value), replaced as a whole so that a take() never sees a torn pair
+        self.taken_sequence = 0
+        self.taken_count = 0
+
+    #
+    # Public Methods
+    #
+    def put(self, value) -> None:
+        self.slot = (self.slot[0] + 1, value)
+
+    def take(self):
+        """ Returns the latest value if it's new since the last take(), or else None. """
+        (sequence, value) = self.slot
+        if sequence == self.taken_sequence:
+            return None
+        self.taken_sequence = sequence
+        self.taken_count += 1
+        return value
+
+    def get_stats_str(self) -> str:
+        put_count = self.slot[0]
+        return "put={0} taken={1} overwritten={2}".format(
+            put_count, self.taken_count, self.taken_sequence - self.taken_count)
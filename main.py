@@ -1,29 +1,82 @@
-from config import KRPC_IP_ADDRESS, KRPC_RPC_PORT, KRPC_STREAM_PORT, KBALL_MMAP_INTERFACE_FILE
+from config import KRPC_IP_ADDRESS, KRPC_RPC_PORT, KRPC_STREAM_PORT, KRPC_POOL_SIZE, KBALL_MMAP_INTERFACE_FILE, TRACKED_RESOURCES, TRACKED_VESSELS, CONTROL_WRITE_DEADBAND, CONTROL_WRITE_MAX_RATE_HZ, SUPPLIES_FORECAST_WINDOW_S, IS_RPC_ACCOUNTING_ENABLED, RPC_ACCOUNTING_REPORT_FILE, \
+    UDP_TELEMETRY_ADDRESS, UDP_TELEMETRY_PORT, UDP_TELEMETRY_RATES_HZ
 from ksp_interface import KspInterface
 from app import KmiffedApp
 from mmap_interface import MemMapInterface
+from telemetry_recorder import TelemetryRecorder
+from telemetry_replay import KspReplay
+from udp_telemetry import UdpTelemetryBroadcaster
+import argparse, sys
+
+#
+# Command Line
+#
+parser = argparse.ArgumentParser(description="Flight computer for Kerbal Space Program.")
+parser.add_argument("--record", metavar="FILE", help="append the telemetry of every control tick to FILE")
+parser.add_argument("--replay", metavar="FILE", help="play back a telemetry recording instead of connecting to kRPC")
+parser.add_argument("--replay-speed", type=float, default=1.0, help="replay speed multiplier, 0 for as fast as possible")
+parser.add_argument("--mmap-file", default=KBALL_MMAP_INTERFACE_FILE, help="path of the shared-memory telemetry block")
+parser.add_argument("--udp-address", default=UDP_TELEMETRY_ADDRESS, help="send UDP telemetry to this unicast or multicast address")
+parser.add_argument("--rpc-accounting", action="store_true", default=IS_RPC_ACCOUNTING_ENABLED, help="count the RPCs made to kRPC, shown with the 'p' key")
+args = parser.parse_args()
 
 #
 # KRPC Interface
 #
-krpc = KspInterface(
-    ip_address=KRPC_IP_ADDRESS,
-    rpc_port=KRPC_RPC_PORT,
-    stream_port=KRPC_STREAM_PORT)
+if args.replay:
+    krpc = KspReplay(args.replay, speed=args.replay_speed)
+else:
+    krpc = KspInterface(
+        ip_address=KRPC_IP_ADDRESS,
+        rpc_port=KRPC_RPC_PORT,
+        stream_port=KRPC_STREAM_PORT,
+        tracked_resources=TRACKED_RESOURCES,
+        is_rpc_accounting_enabled=args.rpc_accounting,
+        pool_size=KRPC_POOL_SIZE,
+        tracked_vessel_names=TRACKED_VESSELS,
+        control_write_deadband=CONTROL_WRITE_DEADBAND,
+        control_write_max_rate_hz=CONTROL_WRITE_MAX_RATE_HZ)
+
+#
+# UDP Telemetry
+#
+telemetry_broadcaster = None
+if args.udp_address:
+    try:
+        telemetry_broadcaster = UdpTelemetryBroadcaster(args.udp_address, UDP_TELEMETRY_PORT, UDP_TELEMETRY_RATES_HZ)
+    except OSError as e:
+        print("Failed to set up UDP telemetry to {0}".format(args.udp_address))
+        print("Exception type    : ", type(e).__name__)
+        print("Exception message : ", str(e))
+        sys.exit(1)
 
 #
 # Memory-Mapped Interface
 #
-mmap_filename = KBALL_MMAP_INTERFACE_FILE
+mmap_filename = args.mmap_file
 mem_map = MemMapInterface(mmap_filename)
 mem_map.init_mapping()
 
+#
+# Telemetry Recorder
+#
+recorder = None
+if args.record:
+    recorder = TelemetryRecorder(args.record)
+    recorder.open()
+
 
 #
 # Entry Point Routine
 #
-app = KmiffedApp(krpc, mem_map)
+app = KmiffedApp(krpc, mem_map, recorder, telemetry_broadcaster, SUPPLIES_FORECAST_WINDOW_S)
 app.run()
 
 krpc.deinit_connection()
 mem_map.deinit_mapping()
+if recorder is not None:
+    recorder.close()
+if telemetry_broadcaster is not None:
+    telemetry_broadcaster.close()
+if (krpc.rpc_accounting is not None) and RPC_ACCOUNTING_REPORT_FILE:
+    krpc.rpc_accounting.dump_report(RPC_ACCOUNTING_REPORT_FILE)
@@ -0,0 +1,57 @@
+""" Reference writer of the external input record of the shared-memory telemetry block.
+    Publishes the given overrides until interrupted; the flight computer drops them as stale
+    within INPUT_STALE_TIMEOUT_S once this stops.
+
+    Usage: python mmap_input_writer.py [--mmap-file FILE] [--throttle T] [--pitch P] [--yaw Y]
+                                       [--program NAME --program-data X] [--rate-hz N]
+"""
+from config import KBALL_MMAP_INTERFACE_FILE
+from mmap_interface import HEADER_STRUCT, MMAP_MAGIC, MMAP_VERSION, MMAP_SIZE, RECORD_EXTERNAL_INPUT, EXTERNAL_INPUT_STRUCT, \
+    EXTERNAL_INPUT_THROTTLE_FLAG, EXTERNAL_INPUT_PITCH_FLAG, EXTERNAL_INPUT_YAW_FLAG, EXTERNAL_INPUT_PROGRAM_FLAG, write_record
+import argparse, mmap, time
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Publish external control input to the flight computer.")
+    parser.add_argument("--mmap-file", default=KBALL_MMAP_INTERFACE_FILE)
+    parser.add_argument("--throttle", type=float)
+    parser.add_argument("--pitch", type=float)
+    parser.add_argument("--yaw", type=float)
+    parser.add_argument("--program")
+    parser.add_argument("--program-data", type=float, default=0.0)
+    parser.add_argument("--rate-hz", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with open(args.mmap_file, "r+b") as mmap_fd:
+        mapped_memory = mmap.mmap(mmap_fd.fileno(), MMAP_SIZE)
+
+    (magic, version, block_size, num_records) = HEADER_STRUCT.unpack_from(mapped_memory, 0)
+    if (magic != MMAP_MAGIC) or (version != MMAP_VERSION) or (block_size != MMAP_SIZE):
+        print("Unsupported telemetry block: magic={0:#010x} version={1} size={2}".format(magic, version, block_size))
+        return
+
+    flags = 0
+    if args.throttle is not None:
+        flags |= EXTERNAL_INPUT_THROTTLE_FLAG
+    if args.pitch is not None:
+        flags |= EXTERNAL_INPUT_PITCH_FLAG
+    if args.yaw is not None:
+        flags |= EXTERNAL_INPUT_YAW_FLAG
+    if args.program is not None:
+        flags |= EXTERNAL_INPUT_PROGRAM_FLAG
+    program_bytes = (args.program or "").encode()
+
+    try:
+        while True:
+            write_record(mapped_memory, RECORD_EXTERNAL_INPUT, EXTERNAL_INPUT_STRUCT,
+                flags,
+                args.throttle or 0.0,
+                args.pitch or 0.0,
+                args.yaw or 0.0,
+                program_bytes,
+                args.program_data)
+            time.sleep(1.0 / args.rate_hz)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,273 @@
-from ksp_types import VesselAttitude
-import mmap, os, struct
+from ksp_types import ExternalControlInput, VesselAttitude, VesselFlightState, VesselOrbitalParameters, VesselResources
+import math, mmap, struct, time
 
-class MemMapInterface:
-    #
-    # Constants
-    #
-    __VESSEL_ATTITUDE_STRUCT_FMT = "<IIfff" # '<' denotes little-endian byte order
-    __VESSEL_ATTITUDE_STRUCT_SIZE = struct.calcsize(__VESSEL_ATTITUDE_STRUCT_FMT)
-    __VESSEL_ATTITUDE_STRUCT_MAGIC = 0x00CD0186
+#
+# Shared Memory Layout
+#
+# All values are little-endian. The block starts with a header, followed by a directory of
+# (offset, size) entries, one per record, then the records themselves at those offsets.
+#
+# Each record begins with a 32-bit sequence counter (seqlock). The writer makes the counter
+# odd before touching the payload and even again once done. Readers copy the payload, and
+# retry if the counter was odd or changed in the meantime: see read_record().
+#
+# The external input record goes the other way: an external process (e.g. a hardware control
+# panel) writes it with write_record(), and the flight computer reads it. The writer must keep
+# republishing it, at least every INPUT_STALE_TIMEOUT_S, or the input is dropped as stale.
+#
+MMAP_MAGIC = 0x00CD0186
+MMAP_VERSION = 3
+
+RECORD_VESSEL_ATTITUDE = 0
+RECORD_VESSEL_FLIGHT_STATE = 1
+RECORD_VESSEL_ORBITAL_PARAMETERS = 2
+RECORD_VESSEL_RESOURCES = 3
+RECORD_EXTERNAL_INPUT = 4
+NUM_RECORDS = 5
+
+MAX_RESOURCES = 8
+
+HEADER_STRUCT = struct.Struct("<IIII") # magic, version, block size, record count
+DIRECTORY_ENTRY_STRUCT = struct.Struct("<II") # record offset, record size
+SEQUENCE_STRUCT = struct.Struct("<I")
+SEQUENCE_SIZE = 8 # the counter is padded so that payloads are 8-byte aligned
+
+VESSEL_ATTITUDE_STRUCT = struct.Struct("<ddd") # heading, pitch, roll
+VESSEL_FLIGHT_STATE_STRUCT = struct.Struct("<di11d") # universal time, situation, then the other VesselFlightState floats in order
+VESSEL_ORBITAL_PARAMETERS_STRUCT = struct.Struct("<16sddddd") # body name, body mass, period, time to Ap, time to Pe, true anomaly
+VESSEL_RESOURCES_STRUCT = struct.Struct("<I") # resource count, followed by MAX_RESOURCES slots
+RESOURCE_SLOT_STRUCT = struct.Struct("<16sdd") # name, amount, max
+EXTERNAL_INPUT_STRUCT = struct.Struct("<I4xddd16sd") # flags, throttle, pitch, yaw, control program name, control program data
+
+EXTERNAL_INPUT_THROTTLE_FLAG = 0x1
+EXTERNAL_INPUT_PITCH_FLAG = 0x2
+EXTERNAL_INPUT_YAW_FLAG = 0x4
+EXTERNAL_INPUT_PROGRAM_FLAG = 0x8
+INPUT_STALE_TIMEOUT_S = 0.5
+
+def _align8(size: int) -> int:
+    return (size + 7) & ~7
 
+RECORD_SIZES = (
+    SEQUENCE_SIZE + _align8(VESSEL_ATTITUDE_STRUCT.size),
+    SEQUENCE_SIZE + _align8(VESSEL_FLIGHT_STATE_STRUCT.size),
+    SEQUENCE_SIZE + _align8(VESSEL_ORBITAL_PARAMETERS_STRUCT.size),
+    SEQUENCE_SIZE + _align8(VESSEL_RESOURCES_STRUCT.size) + MAX_RESOURCES * _align8(RESOURCE_SLOT_STRUCT.size),
+    SEQUENCE_SIZE + _align8(EXTERNAL_INPUT_STRUCT.size))
+
+def _record_offsets() -> tuple:
+    offset = _align8(HEADER_STRUCT.size + NUM_RECORDS * DIRECTORY_ENTRY_STRUCT.size)
+    offsets = []
+    for record_size in RECORD_SIZES:
+        offsets.append(offset)
+        offset += record_size
+    return (tuple(offsets), offset)
+
+(RECORD_OFFSETS, MMAP_SIZE) = _record_offsets()
+
+#
+# Functions
+#
+def read_record(buffer, record_id: int, max_attempts: int = 1000) -> bytes:
+    """ Returns a consistent copy of a record's payload, or None if the record was never written
+        or the writer kept it busy. """
+    offset = RECORD_OFFSETS[record_id]
+    payload_start = offset + SEQUENCE_SIZE
+    payload_end = offset + RECORD_SIZES[record_id]
+    for _ in range(max_attempts):
+        (sequence_before,) = SEQUENCE_STRUCT.unpack_from(buffer, offset)
+        if sequence_before == 0:
+            return None
+        if sequence_before & 1:
+            continue
+        payload = bytes(buffer[payload_start:payload_end])
+        (sequence_after,) = SEQUENCE_STRUCT.unpack_from(buffer, offset)
+        if sequence_before == sequence_after:
+            return payload
+    return None
+
+def write_record(buffer, record_id: int, payload_struct: struct.Struct, *values) -> None:
+    """ Writes a record's payload under its seqlock. The sequence counter is taken from the buffer,
+        so that the writer may restart at any time. Meant for external writers of RECORD_EXTERNAL_INPUT. """
+    offset = RECORD_OFFSETS[record_id]
+    (sequence,) = SEQUENCE_STRUCT.unpack_from(buffer, offset)
+    sequence |= 1 # odd: write in progress, also when taking over from a writer that died mid-write
+    SEQUENCE_STRUCT.pack_into(buffer, offset, sequence & 0xFFFFFFFF)
+    payload_struct.pack_into(buffer, offset + SEQUENCE_SIZE, *values)
+    SEQUENCE_STRUCT.pack_into(buffer, offset, (sequence + 1) & 0xFFFFFFFF)
+
+#
+# Types
+#
+class MemMapInterface:
     #
     # Constructor
     #
     def __init__(self, mmap_filename):
         self.mmap_filename = mmap_filename
-        self.vessel_attitude_struct = {
-            'uMagic': self.__VESSEL_ATTITUDE_STRUCT_MAGIC,
-            'uNonce': 0,
-            'fHeading': 0,
-            'fPitch': 0,
-            'fRoll': 0,
-        }
+        self.sequences = [0] * NUM_RECORDS
+        self.cbody_name = ""
+        self.cbody_name_bytes = b""
+        self.resource_name_bytes = {}
+
+        # External input, decoded in place on every read
+        self.external_input = ExternalControlInput(False, False, False, False, 0.0, 0.0, 0.0, "", 0.0)
+        self.external_input_sequence = 0
+        self.external_input_change_time = 0.0
+        self.external_input_program_bytes = b""
 
     #
     # Public Methods
     #
     def init_mapping(self):
-        # Check if the file exists
-        if os.path.exists(self.mmap_filename):
-            # Open the file in read and write binary mode
-            with open(self.mmap_filename, "r+b") as init_fd:
-                # Write data at offset zero
-                init_fd.seek(0)
-                init_fd.write(struct.pack(
-                    self.__VESSEL_ATTITUDE_STRUCT_FMT,
-                    self.vessel_attitude_struct['uMagic'],
-                    self.vessel_attitude_struct['uNonce'],
-                    self.vessel_attitude_struct['fHeading'],
-                    self.vessel_attitude_struct['fPitch'],
-                    self.vessel_attitude_struct['fRoll']))
-        else:
-            # Create the file and open it in write binary mode
-            with open(self.mmap_filename, "wb") as init_fd:
-                # Write data at offset zero
-                init_fd.write(struct.pack(
-                    self.__VESSEL_ATTITUDE_STRUCT_FMT,
-                    self.vessel_attitude_struct['uMagic'],
-                    self.vessel_attitude_struct['uNonce'],
-                    self.vessel_attitude_struct['fHeading'],
-                    self.vessel_attitude_struct['fPitch'],
-                    self.vessel_attitude_struct['fRoll']))
+        # Create the file if needed, and size it to the whole block
+        with open(self.mmap_filename, "ab") as init_fd:
+            pass
+        with open(self.mmap_filename, "r+b") as init_fd:
+            init_fd.truncate(MMAP_SIZE)
 
         # Map the file into memory
         self.mmap_file = open(self.mmap_filename, 'r+b')
-        self.mapped_memory = mmap.mmap(self.mmap_file.fileno(), self.__VESSEL_ATTITUDE_STRUCT_SIZE)
+        self.mapped_memory = mmap.mmap(self.mmap_file.fileno(), MMAP_SIZE)
+
+        # Clear the records, then write the header last so that readers only accept a complete layout
+        self.mapped_memory[0:MMAP_SIZE] = bytes(MMAP_SIZE)
+        for record_id in range(NUM_RECORDS):
+            DIRECTORY_ENTRY_STRUCT.pack_into(self.mapped_memory,
+                HEADER_STRUCT.size + record_id * DIRECTORY_ENTRY_STRUCT.size,
+                RECORD_OFFSETS[record_id],
+                RECORD_SIZES[record_id])
+        HEADER_STRUCT.pack_into(self.mapped_memory, 0, MMAP_MAGIC, MMAP_VERSION, MMAP_SIZE, NUM_RECORDS)
+
+        # Zero-copy view of the external input record
+        input_offset = RECORD_OFFSETS[RECORD_EXTERNAL_INPUT]
+        self.external_input_view = memoryview(self.mapped_memory)[input_offset:input_offset + RECORD_SIZES[RECORD_EXTERNAL_INPUT]]
 
     def deinit_mapping(self):
+        self.external_input_view.release()
         self.mapped_memory.close()
+        self.mmap_file.close()
 
     def set_vessel_attitude(self, attitude: VesselAttitude) -> None:
         if not attitude.bIsDataValid:
             return
 
-        self.vessel_attitude_struct['uNonce'] += 1
-        self.vessel_attitude_struct['fHeading'] = attitude.fHeading
-        self.vessel_attitude_struct['fPitch'] = attitude.fPitch
-        self.vessel_attitude_struct['fRoll'] = attitude.fRoll
-        self.mapped_memory[0:self.__VESSEL_ATTITUDE_STRUCT_SIZE] = \
-            struct.pack(self.__VESSEL_ATTITUDE_STRUCT_FMT,
-                self.vessel_attitude_struct['uMagic'],
-                self.vessel_attitude_struct['uNonce'],
-                self.vessel_attitude_struct['fHeading'],
-                self.vessel_attitude_struct['fPitch'],
-                self.vessel_attitude_struct['fRoll'])
+        offset = self.__begin_write(RECORD_VESSEL_ATTITUDE)
+        VESSEL_ATTITUDE_STRUCT.pack_into(self.mapped_memory, offset,
+            attitude.fHeading,
+            attitude.fPitch,
+            attitude.fRoll)
+        self.__end_write(RECORD_VESSEL_ATTITUDE)
+
+    def set_vessel_flight_state(self, state: VesselFlightState) -> None:
+        if not state.bIsDataValid:
+            return
+
+        offset = self.__begin_write(RECORD_VESSEL_FLIGHT_STATE)
+        VESSEL_FLIGHT_STATE_STRUCT.pack_into(self.mapped_memory, offset,
+            state.fUniversalTime,
+            state.iSituation,
+            state.fWeight,
+            state.fThrustMax,
+            state.fVerticalSpeed,
+            state.fForwardSpeed,
+            state.fLateralSpeed,
+            state.fPitchSpeed,
+            state.fPitchTorqueMax,
+            state.fPitchMomentOfInertia,
+            state.fYawSpeed,
+            state.fYawTorqueMax,
+            state.fYawMomentOfInertia)
+        self.__end_write(RECORD_VESSEL_FLIGHT_STATE)
+
+    def set_vessel_orbital_parameters(self, orbital_params: VesselOrbitalParameters) -> None:
+        if not orbital_params.bIsDataValid:
+            return
+
+        if orbital_params.sCelestialBodyName != self.cbody_name:
+            self.cbody_name = orbital_params.sCelestialBodyName
+            self.cbody_name_bytes = self.cbody_name.encode()
+
+        offset = self.__begin_write(RECORD_VESSEL_ORBITAL_PARAMETERS)
+        VESSEL_ORBITAL_PARAMETERS_STRUCT.pack_into(self.mapped_memory, offset,
+            self.cbody_name_bytes,
+            orbital_params.fCelestialBodyMass,
+            orbital_params.fPeriod,
+            orbital_params.fTimeToApoapsis,
+            orbital_params.fTimeToPeriapsis,
+            orbital_params.fTrueAnomaly)
+        self.__end_write(RECORD_VESSEL_ORBITAL_PARAMETERS)
+
+    def set_vessel_resources(self, resources: VesselResources) -> None:
+        if not resources.bIsDataValid:
+            return
+
+        num_resources = min(len(resources.lResources), MAX_RESOURCES)
+        offset = self.__begin_write(RECORD_VESSEL_RESOURCES)
+        VESSEL_RESOURCES_STRUCT.pack_into(self.mapped_memory, offset, num_resources)
+        offset += _align8(VESSEL_RESOURCES_STRUCT.size)
+        for idx in range(num_resources):
+            resource = resources.lResources[idx]
+            name_bytes = self.resource_name_bytes.get(resource.sName)
+            if name_bytes is None:
+                name_bytes = resource.sName.encode()
+                self.resource_name_bytes[resource.sName] = name_bytes
+            RESOURCE_SLOT_STRUCT.pack_into(self.mapped_memory, offset, name_bytes, resource.fAmount, resource.fMax)
+            offset += _align8(RESOURCE_SLOT_STRUCT.size)
+        self.__end_write(RECORD_VESSEL_RESOURCES)
+
+    def get_external_input(self) -> ExternalControlInput:
+        """ Reads the external input record. The returned object is reused by every call; it is only
+            valid if the record is consistent and was republished within INPUT_STALE_TIMEOUT_S. """
+        data = self.external_input
+        view = self.external_input_view
+        now = time.monotonic()
+
+        (sequence_before,) = SEQUENCE_STRUCT.unpack_from(view, 0)
+        if sequence_before != self.external_input_sequence:
+            self.external_input_sequence = sequence_before
+            self.external_input_change_time = now
+        if (sequence_before == 0) or ((now - self.external_input_change_time) > INPUT_STALE_TIMEOUT_S):
+            data.bIsInputValid = False
+            return data
+        if sequence_before & 1:
+            # mid-write, keep the previous input for this tick
+            return data
+
+        (flags, throttle, pitch, yaw, program_bytes, program_data) = EXTERNAL_INPUT_STRUCT.unpack_from(view, SEQUENCE_SIZE)
+        (sequence_after,) = SEQUENCE_STRUCT.unpack_from(view, 0)
+        if sequence_before != sequence_after:
+            return data
+        if not (math.isfinite(throttle) and math.isfinite(pitch) and math.isfinite(yaw) and math.isfinite(program_data)):
+            # broken writer: drop the input rather than pass NaN or infinity on to the controls
+            data.bIsInputValid = False
+            return data
+
+        data.bIsThrottleOverridden = (flags & EXTERNAL_INPUT_THROTTLE_FLAG) != 0
+        data.bIsPitchOverridden = (flags & EXTERNAL_INPUT_PITCH_FLAG) != 0
+        data.bIsYawOverridden = (flags & EXTERNAL_INPUT_YAW_FLAG) != 0
+        data.fThrottle = throttle
+        data.fPitch = pitch
+        data.fYaw = yaw
+        if not (flags & EXTERNAL_INPUT_PROGRAM_FLAG):
+            self.external_input_program_bytes = b""
+            data.sControlProgram = ""
+        elif program_bytes != self.external_input_program_bytes:
+            self.external_input_program_bytes = program_bytes
+            data.sControlProgram = program_bytes.rstrip(b"\0").decode(errors="replace")
+        data.fControlProgramData = program_data
+        data.bIsInputValid = True
+        return data
+
+    #
+    # Private Methods
+    #
+    def __begin_write(self, record_id: int) -> int:
+        """ Marks the record as being written, and returns the offset of its payload. """
+        self.sequences[record_id] = (self.sequences[record_id] + 1) & 0xFFFFFFFF
+        SEQUENCE_STRUCT.pack_into(self.mapped_memory, RECORD_OFFSETS[record_id], self.sequences[record_id])
+        return RECORD_OFFSETS[record_id] + SEQUENCE_SIZE
+
+    def __end_write(self, record_id: int) -> None:
+        self.sequences[record_id] = (self.sequences[record_id] + 1) & 0xFFFFFFFF
+        SEQUENCE_STRUCT.pack_into(self.mapped_memory, RECORD_OFFSETS[record_id], self.sequences[record_id])
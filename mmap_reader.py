@@ -0,0 +1,59 @@
+""" Reference reader of the shared-memory telemetry block written by MemMapInterface.
+
+    Usage: python mmap_reader.py [mmap_file] [--rate-hz N]
+"""
+from config import KBALL_MMAP_INTERFACE_FILE
+from mmap_interface import HEADER_STRUCT, MMAP_MAGIC, MMAP_VERSION, MMAP_SIZE, \
+    RECORD_VESSEL_ATTITUDE, RECORD_VESSEL_FLIGHT_STATE, RECORD_VESSEL_ORBITAL_PARAMETERS, RECORD_VESSEL_RESOURCES, \
+    VESSEL_ATTITUDE_STRUCT, VESSEL_FLIGHT_STATE_STRUCT, VESSEL_ORBITAL_PARAMETERS_STRUCT, VESSEL_RESOURCES_STRUCT, \
+    RESOURCE_SLOT_STRUCT, read_record
+import argparse, mmap, time
+
+def decode_resources(payload: bytes) -> list:
+    (num_resources,) = VESSEL_RESOURCES_STRUCT.unpack_from(payload, 0)
+    slot_size = (RESOURCE_SLOT_STRUCT.size + 7) & ~7
+    offset = (VESSEL_RESOURCES_STRUCT.size + 7) & ~7
+    resources = []
+    for idx in range(num_resources):
+        (name, amount, max) = RESOURCE_SLOT_STRUCT.unpack_from(payload, offset + idx * slot_size)
+        resources.append((name.rstrip(b"\0").decode(), amount, max))
+    return resources
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print the shared-memory telemetry block.")
+    parser.add_argument("mmap_file", nargs="?", default=KBALL_MMAP_INTERFACE_FILE)
+    parser.add_argument("--rate-hz", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with open(args.mmap_file, "rb") as mmap_fd:
+        mapped_memory = mmap.mmap(mmap_fd.fileno(), MMAP_SIZE, access=mmap.ACCESS_READ)
+
+    (magic, version, block_size, num_records) = HEADER_STRUCT.unpack_from(mapped_memory, 0)
+    if (magic != MMAP_MAGIC) or (version != MMAP_VERSION) or (block_size != MMAP_SIZE):
+        print("Unsupported telemetry block: magic={0:#010x} version={1} size={2}".format(magic, version, block_size))
+        return
+
+    while True:
+        payload = read_record(mapped_memory, RECORD_VESSEL_ATTITUDE)
+        if payload is not None:
+            print("attitude : heading={0:7.2f} pitch={1:7.2f} roll={2:7.2f}".format(*VESSEL_ATTITUDE_STRUCT.unpack_from(payload)))
+
+        payload = read_record(mapped_memory, RECORD_VESSEL_FLIGHT_STATE)
+        if payload is not None:
+            state = VESSEL_FLIGHT_STATE_STRUCT.unpack_from(payload)
+            print("flight   : ut={0:.2f} situation={1} vspeed={4:.2f} fwd={5:.2f} lat={6:.2f}".format(*state))
+
+        payload = read_record(mapped_memory, RECORD_VESSEL_ORBITAL_PARAMETERS)
+        if payload is not None:
+            (name, mass, period, tta, ttp, true_anomaly) = VESSEL_ORBITAL_PARAMETERS_STRUCT.unpack_from(payload)
+            print("orbit    : {0} period={1:.1f} tta={2:.1f} ttp={3:.1f}".format(name.rstrip(b"\0").decode(), period, tta, ttp))
+
+        payload = read_record(mapped_memory, RECORD_VESSEL_RESOURCES)
+        if payload is not None:
+            print("resources: " + "  ".join("{0}={1:.1f}/{2:.1f}".format(*resource) for resource in decode_resources(payload)))
+
+        print()
+        time.sleep(1.0 / args.rate_hz)
+
+if __name__ == "__main__":
+    main()
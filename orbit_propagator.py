@@ -0,0 +1,86 @@
+import math
+import numpy as np
+
+#
+# Constants
+#
+TWO_PI = 2.0 * math.pi
+KEPLER_SOLVER_MAX_ITERATIONS = 16
+KEPLER_SOLVER_TOLERANCE = 1e-12
+
+#
+# Functions
+#
+def solve_kepler_equation(mean_anomaly, eccentricity: float) -> np.ndarray:
+    """ Solves Kepler's equation M = E - e*sin(E) for the eccentric anomaly E of an elliptical orbit.
+        Accepts a scalar or an array of mean anomalies [rad] and solves them all at once with Newton's method. """
+    m = np.remainder(np.asarray(mean_anomaly, dtype=np.float64), TWO_PI)
+    e = eccentricity
+
+    # starting guess which converges for all eccentricities below 1
+    ecc_anomaly = m + e * np.sin(m) if e < 0.8 else np.full_like(m, math.pi)
+    for _ in range(KEPLER_SOLVER_MAX_ITERATIONS):
+        delta = (ecc_anomaly - e * np.sin(ecc_anomaly) - m) / (1.0 - e * np.cos(ecc_anomaly))
+        ecc_anomaly -= delta
+        if np.max(np.abs(delta)) < KEPLER_SOLVER_TOLERANCE:
+            break
+    return ecc_anomaly
+
+def true_anomaly_from_eccentric_anomaly(ecc_anomaly, eccentricity: float) -> np.ndarray:
+    """ Converts eccentric anomaly [rad] to true anomaly [rad], in the range [0, 2*pi). """
+    e = eccentricity
+    true_anomaly = 2.0 * np.arctan2(
+        math.sqrt(1.0 + e) * np.sin(ecc_anomaly / 2.0),
+        math.sqrt(1.0 - e) * np.cos(ecc_anomaly / 2.0))
+    return np.remainder(true_anomaly, TWO_PI)
+
+#
+# Types
+#
+class OrbitPropagator:
+    """ Propagates an elliptical Keplerian orbit locally from a set of orbital elements,
+        so that the orbital parameters can be computed from the universal time alone. """
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.invalidate()
+
+    #
+    # Public Methods
+    #
+    def set_elements(self, semi_major_axis: float, eccentricity: float, mean_anomaly_at_epoch: float,
+                     epoch: float, gravitational_parameter: float) -> None:
+        self.semi_major_axis = semi_major_axis
+        self.eccentricity = eccentricity
+        self.mean_anomaly_at_epoch = mean_anomaly_at_epoch
+        self.epoch = epoch
+        self.has_elements = True
+
+        # only closed orbits are propagated, hyperbolic ones fall back to the server values
+        self.is_elliptical = (0.0 <= eccentricity < 1.0) and (semi_major_axis > 0.0) and (gravitational_parameter > 0.0)
+        if self.is_elliptical:
+            self.mean_motion = math.sqrt(gravitational_parameter / semi_major_axis ** 3)
+            self.period = TWO_PI / self.mean_motion
+
+    def invalidate(self) -> None:
+        """ Discards the orbital elements, e.g. after a burn or a sphere-of-influence change. """
+        self.has_elements = False
+        self.is_elliptical = False
+        self.mean_motion = 0.0
+        self.period = 0.0
+
+    def propagate(self, ut) -> tuple:
+        """ Returns (period, time to apoapsis, time to periapsis, true anomaly) at the given universal time(s).
+            The times and anomalies are arrays when ut is an array. """
+        mean_anomaly = np.remainder(
+            self.mean_anomaly_at_epoch + self.mean_motion * (np.asarray(ut, dtype=np.float64) - self.epoch),
+            TWO_PI)
+        time_to_apoapsis = np.remainder(math.pi - mean_anomaly, TWO_PI) / self.mean_motion
+        time_to_periapsis = np.remainder(-mean_anomaly, TWO_PI) / self.mean_motion
+        ecc_anomaly = solve_kepler_equation(mean_anomaly, self.eccentricity)
+        true_anomaly = true_anomaly_from_eccentric_anomaly(ecc_anomaly, self.eccentricity)
+        if np.ndim(ut) == 0:
+            return (self.period, float(time_to_apoapsis), float(time_to_periapsis), float(true_anomaly))
+        return (self.period, time_to_apoapsis, time_to_periapsis, true_anomaly)
@@ -1,3 +1,5 @@
+from latest_value_mailbox import LatestValueMailbox
+
 from textual.containers import Container
 
 class KMiffedPanel(Container):
@@ -5,14 +7,25 @@ class KMiffedPanel(Container):
     # Constants
     #
     PANEL_TITLE = ""
+    UI_REFRESH_RATE_HZ = 10.0 # rate at which the panel polls its mailbox
 
     #
     # Constructor
     #
     def __init__(self, panel_title, classes=None, id=None):
         self.PANEL_TITLE = panel_title
+
+        # Latest data from the kRPC monitor thread, shown at the panel's own refresh rate
+        self.mailbox = LatestValueMailbox()
         super().__init__(classes=classes, id=id)
 
+    #
+    # Public Methods
+    #
+    def set_data(self, data) -> None:
+        """ Shows the data taken from the mailbox. """
+        pass
+
     #
     # Event Handlers
     #
@@ -20,6 +33,9 @@ class KMiffedPanel(Container):
         # assign title to panel
         self.border_title = self.PANEL_TITLE
 
+        # pull the latest data at the UI's pace, however fast the monitor thread puts it
+        self.set_interval(1.0 / self.UI_REFRESH_RATE_HZ, self._poll_mailbox)
+
     def on_panel_enter(self) -> None:
         pass
 
@@ -40,3 +56,11 @@ class KMiffedPanel(Container):
 
     def on_panel_key_increment(self) -> None:
         pass
+
+    #
+    # Private Methods
+    #
+    def _poll_mailbox(self) -> None:
+        data = self.mailbox.take()
+        if data is not None:
+            self.set_data(data)
@@ -1,3 +1,4 @@
+from control_programs import CONTROL_PROGRAMS
 from panel import KMiffedPanel
 
 from textual.app import ComposeResult
@@ -8,11 +9,6 @@ class PanelControlProgram(KMiffedPanel):
     #
     # Types
     #
-    class SetDataMsg(Message):
-        """Set widget data message."""
-        def __init__(self) -> None:
-            super().__init__()
-
     class SetControlProgramMsg(Message):
         def __init__(self, program: str, program_data: float) -> None:
             self.control_program = program
@@ -26,11 +22,7 @@ class PanelControlProgram(KMiffedPanel):
         self.hovered_item_idx = -1
         self.hovered_item_idx_last = 0
         self.selected_item_idx = 0
-        self.programs = [
-            "manual",
-            "vspeed",
-            "attitude",
-        ]
+        self.programs = [program_class.NAME for program_class in CONTROL_PROGRAMS]
         self.program_data = 0.0
         super().__init__("Program", classes=classes, id=id)
 
@@ -38,12 +30,11 @@ class PanelControlProgram(KMiffedPanel):
     # Public Methods
     #
     def compose(self) -> ComposeResult:
-        yield Label("Manual", classes="item-label")
-        yield Label("Maintain VSpeed", classes="item-label")
-        yield Label("Maintain Attitude", classes="item-label")
+        for program_class in CONTROL_PROGRAMS:
+            yield Label(program_class.TITLE, classes="item-label")
         yield Label("Program Data", id="item-program-data")
 
-    def set_data(self) -> None:
+    def set_data(self, data) -> None:
         pass
 
     def on_panel_enter(self) -> None:
@@ -78,12 +69,6 @@ class PanelControlProgram(KMiffedPanel):
         self._update_items()
 
         self.post_message(self.SetControlProgramMsg(self.programs[self.selected_item_idx], self.program_data))
-        # if self.selected_item_idx == 0:
-        #     self.post_message(self.SetControlProgramMsg("manual", 0.0))
-        # elif self.selected_item_idx == 1:
-        #     self.post_message(self.SetControlProgramMsg("vspeed", 0.0))
-        # elif self.selected_item_idx == 2:
-        #     self.post_message(self.SetControlProgramMsg("attitude", 0.0))
 
     def on_panel_key_decrement(self) -> None:
         self.program_data -= 1.0
@@ -104,11 +89,6 @@ class PanelControlProgram(KMiffedPanel):
         self.items = self.query(".item-label")
         self._update_items()
         super().on_mount()
-    #
-    # Message Handlers
-    #
-    def on_panel_control_program_set_data_msg(self, message: SetDataMsg) -> None:
-        self.set_data()
 
     #
     # Private Methods
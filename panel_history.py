@@ -0,0 +1,104 @@
+from panel import KMiffedPanel
+import numpy as np
+
+from rich.segment import Segment
+from textual import events
+from textual.app import ComposeResult
+from textual.strip import Strip
+from textual.widget import Widget
+
+class SparklineView(Widget):
+    """ One sparkline per line, each scaled to its own range, with its name and latest value. """
+
+    #
+    # Constants
+    #
+    SPARK_CHARS = " ▁▂▃▄▅▆▇█"
+    NAME_WIDTH = 15
+    VALUE_WIDTH = 10
+
+    #
+    # Constructor
+    #
+    def __init__(self, classes=None, id=None):
+        self.series = []
+        self.row_strips = []
+        self.spark_width = 0
+        super().__init__(classes=classes, id=id)
+
+    #
+    # Public Methods
+    #
+    def set_series(self, series: list) -> None:
+        """ Sets the series to draw from a list of tuples: (name, values, last_value) """
+        self.series = series
+        self.row_strips = [None] * len(series)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        if y >= len(self.series):
+            return Strip.blank(width, self.rich_style)
+
+        strip = self.row_strips[y]
+        if (strip is None) or (strip.cell_length != width):
+            (name, values, last_value) = self.series[y]
+            style = self.rich_style
+            strip = Strip([
+                Segment(name[:self.NAME_WIDTH].ljust(self.NAME_WIDTH), style),
+                Segment(self.__format_sparkline(values), style),
+                Segment(format(last_value, ".2f").rjust(self.VALUE_WIDTH), style),
+            ]).adjust_cell_length(width, style)
+            self.row_strips[y] = strip
+        return strip
+
+    #
+    # Event Handlers
+    #
+    def on_resize(self, event: events.Resize) -> None:
+        self.spark_width = max(event.size.width - self.NAME_WIDTH - self.VALUE_WIDTH, 0)
+
+    #
+    # Private Methods
+    #
+    def __format_sparkline(self, values: np.ndarray) -> str:
+        """ Draws the last spark_width values, one character per value. """
+        values = values[-self.spark_width:] if self.spark_width > 0 else values[:0]
+        if len(values) == 0:
+            return " " * self.spark_width
+        lo = values.min()
+        hi = values.max()
+        num_levels = len(self.SPARK_CHARS) - 1
+        if hi > lo:
+            levels = 1 + ((values - lo) * ((num_levels - 1) / (hi - lo))).astype(np.intp)
+        else:
+            levels = np.full(len(values), (num_levels + 1) // 2, dtype=np.intp)
+        return "".join(self.SPARK_CHARS[level] for level in levels).ljust(self.spark_width)
+
+class PanelHistory(KMiffedPanel):
+    """ Sparklines of the recent flight history. The data comes downsampled to get_num_points() per
+        series, so drawing costs the same whatever the length of the history. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, classes=None, id=None):
+        self.sparkline_view = None
+        super().__init__("History", classes=classes, id=id)
+
+    #
+    # Public Methods
+    #
+    def compose(self) -> ComposeResult:
+        self.sparkline_view = SparklineView(classes="sparkline-view")
+        yield self.sparkline_view
+
+    def get_num_points(self) -> int:
+        """ Returns the number of points drawn per series, 0 until the panel is laid out.
+            Safe to call from any thread. """
+        if self.sparkline_view is None:
+            return 0
+        return self.sparkline_view.spark_width
+
+    def set_data(self, series: list) -> None:
+        self.sparkline_view.set_series(series)
@@ -0,0 +1,76 @@
+from panel import KMiffedPanel
+
+from rich.segment import Segment
+from textual.app import ComposeResult
+from textual.geometry import Region
+from textual.strip import Strip
+from textual.widget import Widget
+
+class TableView(Widget):
+    """ A name/value table drawn as a single widget, one line per row. The rendered line of each row
+        is cached, and setting a value repaints its row only if the text changed. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, field_names: list, name_column_fraction: float = 0.5, classes=None, id=None):
+        self.field_names = list(field_names)
+        self.field_values = [""] * len(self.field_names)
+        self.name_column_fraction = name_column_fraction
+        self.row_strips = [None] * len(self.field_names)
+        self.row_strips_width = 0
+        self.repaint_count = 0
+        super().__init__(classes=classes, id=id)
+
+    #
+    # Public Methods
+    #
+    def set_value(self, row: int, value_str: str) -> None:
+        if value_str == self.field_values[row]:
+            return
+        self.field_values[row] = value_str
+        self.row_strips[row] = None
+        self.refresh(Region(0, row, self.size.width, 1))
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        if width != self.row_strips_width:
+            self.row_strips = [None] * len(self.field_names)
+            self.row_strips_width = width
+        if y >= len(self.field_names):
+            return Strip.blank(width, self.rich_style)
+
+        strip = self.row_strips[y]
+        if strip is None:
+            style = self.rich_style
+            name_width = int(width * self.name_column_fraction)
+            strip = Strip([
+                Segment(self.field_names[y][:name_width].ljust(name_width), style),
+                Segment(self.field_values[y], style),
+            ]).adjust_cell_length(width, style)
+            self.row_strips[y] = strip
+            self.repaint_count += 1
+        return strip
+
+class KMiffedTablePanel(KMiffedPanel):
+    """ A panel showing a name/value table in a single TableView. Fields are given as a dict of
+        field id to field name, in display order, and set by id with set_field(). """
+
+    #
+    # Constructor
+    #
+    def __init__(self, panel_title, table_entries: dict, name_column_fraction: float = 0.5, classes=None, id=None):
+        self.table_entries = dict(table_entries)
+        self.table_rows = {field_id: row for (row, field_id) in enumerate(self.table_entries)}
+        self.name_column_fraction = name_column_fraction
+        super().__init__(panel_title, classes=classes, id=id)
+
+    #
+    # Public Methods
+    #
+    def compose(self) -> ComposeResult:
+        self.table_view = TableView(list(self.table_entries.values()), self.name_column_fraction, classes="table-view")
+        yield self.table_view
+
+    def set_field(self, field_id: str, value_str: str) -> None:
+        self.table_view.set_value(self.table_rows[field_id], value_str)
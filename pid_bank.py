@@ -0,0 +1,155 @@
+import time
+import numpy as np
+
+class PidBank:
+    """ A bank of PID loops backed by NumPy arrays, updated together with a single shared timestamp.
+        Each loop follows the PidController semantics: derivative on measurement, output clamped to
+        [output_min, output_max], and the integral term clamped to the same range. With conditional
+        anti-windup enabled, a loop's integral is also frozen while its output is saturated in the
+        direction of its error. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, num_loops: int, kp=0.0, ki=0.0, kd=0.0, output_min=-1.0, output_max=1.0,
+                 set_point=0.0, is_conditional_integration=False):
+        self.num_loops = num_loops
+        self.kp = np.full(num_loops, kp, dtype=np.float64)
+        self.ki = np.full(num_loops, ki, dtype=np.float64)
+        self.kd = np.full(num_loops, kd, dtype=np.float64)
+        self.output_min = np.full(num_loops, output_min, dtype=np.float64)
+        self.output_max = np.full(num_loops, output_max, dtype=np.float64)
+        self.set_point = np.full(num_loops, set_point, dtype=np.float64)
+        self.is_conditional_integration = is_conditional_integration
+        self.output = np.zeros(num_loops)
+        self._integral = np.zeros(num_loops)
+        self._prev_value = np.zeros(num_loops)
+        self._previous_time = np.full(num_loops, time.time())
+
+        # scratch buffers, so that updates don't allocate
+        self._error = np.zeros(num_loops)
+        self._dt = np.zeros(num_loops)
+        self._v = np.zeros(num_loops)
+        self._tmp = np.zeros(num_loops)
+        self._mask = np.zeros(num_loops, dtype=bool)
+        self._mask_tmp = np.zeros(num_loops, dtype=bool)
+        self._mask_tmp2 = np.zeros(num_loops, dtype=bool)
+        self._values = np.zeros(num_loops)
+        self._all_loops = PidLoopGroup(self, 0, num_loops, self._values)
+
+    #
+    # Public Methods
+    #
+    def configure_loop(self, idx: int, kp: float, ki: float, kd: float, output_min: float, output_max: float, set_point: float) -> None:
+        self.kp[idx] = kp
+        self.ki[idx] = ki
+        self.kd[idx] = kd
+        self.output_min[idx] = output_min
+        self.output_max[idx] = output_max
+        self.set_point[idx] = set_point
+
+    def create_group(self, start: int, stop: int, values: np.ndarray) -> "PidLoopGroup":
+        """ Returns a group of the loops from start to stop (excluded), measured by values[start:stop],
+            values being an array of one value per loop of the bank that the caller fills in. """
+        return PidLoopGroup(self, start, stop, values)
+
+    def reset(self, timestamp: float = None) -> None:
+        self._integral.fill(0.0)
+        self._prev_value.fill(0.0)
+        self._previous_time.fill(time.time() if timestamp is None else timestamp)
+        self.output.fill(0.0)
+
+    def set_time(self, timestamp: float) -> None:
+        """ Sets the time of the previous update of every loop, without touching the loop state.
+            Used to resynchronize after skipped time, so that it doesn't show up as one long step. """
+        self._previous_time.fill(timestamp)
+
+    def update(self, values: np.ndarray, timestamp: float = None) -> np.ndarray:
+        """ Updates all the loops with the measured values (one per loop) and returns the output array.
+            To update only some of the loops, use a group from create_group(). """
+        if timestamp is None:
+            timestamp = time.time()
+        np.copyto(self._values, values)
+        self._all_loops.update(timestamp)
+        return self.output
+
+class PidLoopGroup:
+    """ A contiguous range of loops of a PidBank, updated together without allocating: the group holds
+        views of the bank's arrays and scratch buffers over its range, and of the measured values. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, bank: PidBank, start: int, stop: int, values: np.ndarray):
+        loops = slice(start, stop)
+        self.kp = bank.kp[loops]
+        self.ki = bank.ki[loops]
+        self.kd = bank.kd[loops]
+        self.output_min = bank.output_min[loops]
+        self.output_max = bank.output_max[loops]
+        self.set_point = bank.set_point[loops]
+        self.is_conditional_integration = bank.is_conditional_integration
+        self.output = bank.output[loops]
+        self.values = values[loops]
+        self._integral = bank._integral[loops]
+        self._prev_value = bank._prev_value[loops]
+        self._previous_time = bank._previous_time[loops]
+        self._error = bank._error[loops]
+        self._dt = bank._dt[loops]
+        self._v = bank._v[loops]
+        self._tmp = bank._tmp[loops]
+        self._mask = bank._mask[loops]
+        self._mask_tmp = bank._mask_tmp[loops]
+        self._mask_tmp2 = bank._mask_tmp2[loops]
+
+    #
+    # Public Methods
+    #
+    def update(self, timestamp: float) -> np.ndarray:
+        """ Updates the loops of the group with the current values, and returns their outputs. """
+        values = self.values
+        error = self._error
+        dt = self._dt
+        v = self._v
+        tmp = self._tmp
+        is_dt_valid = self._mask
+
+        np.subtract(timestamp, self._previous_time, out=dt)
+        np.subtract(self.set_point, values, out=error)
+
+        # output signal: p + i + d, with the derivative taken on the measurement
+        np.multiply(self.kp, error, out=v)
+        np.add(v, self._integral, out=v)
+        np.subtract(values, self._prev_value, out=tmp)
+        np.multiply(tmp, self.kd, out=tmp)
+        np.greater(dt, 0.0, out=is_dt_valid)
+        np.divide(tmp, dt, out=tmp, where=is_dt_valid)
+        np.multiply(tmp, is_dt_valid, out=tmp)
+        np.subtract(v, tmp, out=v)
+        np.maximum(v, self.output_min, out=self.output)
+        np.minimum(self.output, self.output_max, out=self.output)
+
+        # integral term
+        np.multiply(self.ki, error, out=tmp)
+        np.multiply(tmp, dt, out=tmp)
+        if self.is_conditional_integration:
+            # hold the integral of loops that are saturated and still being pushed further out
+            is_held = self._mask
+            is_pushed = self._mask_tmp
+            is_pushed_low = self._mask_tmp2
+            np.greater(v, self.output_max, out=is_held)
+            np.greater(error, 0.0, out=is_pushed)
+            np.logical_and(is_held, is_pushed, out=is_held)
+            np.less(v, self.output_min, out=is_pushed)
+            np.less(error, 0.0, out=is_pushed_low)
+            np.logical_and(is_pushed, is_pushed_low, out=is_pushed)
+            np.logical_or(is_held, is_pushed, out=is_held)
+            np.logical_not(is_held, out=is_held)
+            np.multiply(tmp, is_held, out=tmp)
+        np.add(self._integral, tmp, out=self._integral)
+        np.maximum(self._integral, self.output_min, out=self._integral)
+        np.minimum(self._integral, self.output_max, out=self._integral)
+
+        np.copyto(self._prev_value, values)
+        self._previous_time.fill(timestamp)
+        return self.output
@@ -0,0 +1,153 @@
+from ksp_types import ResourceForecast, VesselResources
+import math
+import numpy as np
+
+class ResourceForecaster:
+    """ Estimates the rate of change of resources by a least-squares line over a sliding window of
+        universal time, and from it the time until each resource runs out or fills up.
+
+        Being keyed on universal time, the rates stay right under time warp. Samples closer together
+        than window_s / MAX_SAMPLES are left out of the regression, so that the window always spans
+        window_s in a fixed amount of memory. The regression sums are updated as samples enter and
+        leave the window, at O(1) per sample. """
+
+    #
+    # Constants
+    #
+    MAX_SAMPLES = 1024
+    MIN_SAMPLES = 3
+    MAX_AMOUNT_CHANGE_RATIO = 1e-6 # a change of the max amount larger than this resets the forecast
+
+    #
+    # Constructor
+    #
+    def __init__(self, resource_names: list, window_s: float):
+        self.resource_names = list(resource_names)
+        self.window_s = window_s
+        self.min_sample_interval_s = window_s / self.MAX_SAMPLES
+        num_resources = len(self.resource_names)
+
+        # Samples in the window, oldest at (head - count)
+        self.times = np.zeros(self.MAX_SAMPLES)
+        self.amounts = np.zeros((self.MAX_SAMPLES, num_resources))
+        self.head = 0
+        self.count = 0
+
+        # Regression sums over the window. Times are relative to time_origin, which is moved up to the
+        # oldest sample every MAX_SAMPLES samples, when the sums are recomputed from scratch to shed
+        # the rounding errors of the running updates.
+        self.time_origin = 0.0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_y = np.zeros(num_resources)
+        self.sum_ty = np.zeros(num_resources)
+        self.samples_since_rebase = 0
+
+        # Latest sample, whether it went into the regression or not
+        self.last_time = None
+        self.last_amounts = np.zeros(num_resources)
+        self.last_maxes = np.zeros(num_resources)
+
+    #
+    # Public Methods
+    #
+    def reset(self) -> None:
+        self.head = 0
+        self.count = 0
+        self.samples_since_rebase = 0
+        self.last_time = None
+
+    def add_sample(self, resources: VesselResources) -> None:
+        if not resources.bIsDataValid:
+            return
+        ut = resources.fUniversalTime
+        if (self.last_time is not None) and (ut < self.last_time):
+            # game time went backwards (revert, quickload)
+            self.reset()
+
+        is_max_changed = False
+        for (idx, resource) in enumerate(resources.lResources):
+            self.last_amounts[idx] = resource.fAmount
+            if abs(resource.fMax - self.last_maxes[idx]) > self.MAX_AMOUNT_CHANGE_RATIO * max(abs(resource.fMax), 1.0):
+                is_max_changed = True
+            self.last_maxes[idx] = resource.fMax
+        if is_max_changed:
+            # docking, undocking, staging: the trend so far doesn't apply to the new vessel
+            self.reset()
+        self.last_time = ut
+
+        if (self.count > 0) and ((ut - self.times[self.head - 1]) < self.min_sample_interval_s):
+            return
+
+        # drop the samples that left the window, and make room for the new one
+        while (self.count > 0) and (((ut - self.times[self.head - self.count]) > self.window_s) or (self.count == self.MAX_SAMPLES)):
+            self.__remove_oldest()
+        self.__append(ut, self.last_amounts)
+
+        self.samples_since_rebase += 1
+        if self.samples_since_rebase >= self.MAX_SAMPLES:
+            self.__rebase()
+
+    def get_forecasts(self) -> list:
+        """ Returns a ResourceForecast per resource, in resource name order. """
+        forecasts = [ResourceForecast(False, resource_name, 0.0, math.inf, math.inf) for resource_name in self.resource_names]
+        n = self.count
+        if n < self.MIN_SAMPLES:
+            return forecasts
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 0.0:
+            return forecasts
+
+        rates = (n * self.sum_ty - self.sum_t * self.sum_y) / denominator
+        for (idx, forecast) in enumerate(forecasts):
+            rate = float(rates[idx])
+            forecast.fRate = rate
+            if rate < 0.0:
+                forecast.fTimeToEmpty = max(self.last_amounts[idx], 0.0) / -rate
+            elif rate > 0.0:
+                forecast.fTimeToFull = max(self.last_maxes[idx] - self.last_amounts[idx], 0.0) / rate
+            forecast.bIsDataValid = True
+        return forecasts
+
+    #
+    # Private Methods
+    #
+    def __append(self, ut: float, amounts: np.ndarray) -> None:
+        if self.count == 0:
+            self.time_origin = ut
+            self.sum_t = 0.0
+            self.sum_tt = 0.0
+            self.sum_y[:] = 0.0
+            self.sum_ty[:] = 0.0
+        idx = self.head
+        self.times[idx] = ut
+        self.amounts[idx] = amounts
+        t = ut - self.time_origin
+        self.sum_t += t
+        self.sum_tt += t * t
+        self.sum_y += amounts
+        self.sum_ty += t * amounts
+        self.head = idx + 1 if (idx + 1) < self.MAX_SAMPLES else 0
+        self.count += 1
+
+    def __remove_oldest(self) -> None:
+        idx = self.head - self.count # negative indices wrap around
+        t = self.times[idx] - self.time_origin
+        amounts = self.amounts[idx]
+        self.sum_t -= t
+        self.sum_tt -= t * t
+        self.sum_y -= amounts
+        self.sum_ty -= t * amounts
+        self.count -= 1
+
+    def __rebase(self) -> None:
+        """ Recomputes the regression sums from the samples in the window, relative to the oldest one. """
+        self.samples_since_rebase = 0
+        window_idx = (np.arange(self.head - self.count, self.head)) % self.MAX_SAMPLES
+        self.time_origin = self.times[window_idx[0]]
+        t = self.times[window_idx] - self.time_origin
+        amounts = self.amounts[window_idx]
+        self.sum_t = float(t.sum())
+        self.sum_tt = float(np.dot(t, t))
+        self.sum_y = amounts.sum(axis=0)
+        self.sum_ty = t @ amounts
@@ -0,0 +1,157 @@
+from collections import deque
+import os, sys, threading, time
+
+class RpcStats:
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total_latency_s = 0.0
+        self.max_latency_s = 0.0
+
+    #
+    # Public Methods
+    #
+    def add_call(self, latency_s: float) -> None:
+        self.count += 1
+        self.total_latency_s += latency_s
+        if latency_s > self.max_latency_s:
+            self.max_latency_s = latency_s
+
+class RpcAccounting:
+    """ Counts the RPC round trips made over a kRPC connection, with bytes and latency,
+        per calling method and per monitor tick. Stream reads are local and are not counted. """
+
+    #
+    # Constants
+    #
+    TICK_HISTORY_LENGTH = 300
+    __KRPC_PACKAGE_DIR = None
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread_state = threading.local()
+        self.reset()
+
+    #
+    # Public Methods
+    #
+    def attach(self, krpc_connection) -> None:
+        """ Wraps the connection so that every RPC it makes is accounted for. """
+        import krpc
+        RpcAccounting.__KRPC_PACKAGE_DIR = os.path.dirname(krpc.__file__)
+
+        invoke = krpc_connection._invoke
+        def accounted_invoke(service, procedure, *args, **kwargs):
+            method_name = self.__get_calling_method_name()
+            stats = RpcStats()
+            self.thread_state.stats = stats
+            start_time = time.perf_counter()
+            try:
+                return invoke(service, procedure, *args, **kwargs)
+            finally:
+                stats.add_call(time.perf_counter() - start_time)
+                self.thread_state.stats = None
+                self.__record(method_name, stats)
+        krpc_connection._invoke = accounted_invoke
+
+        rpc_connection = krpc_connection._rpc_connection
+        send = rpc_connection.send
+        receive = rpc_connection.receive
+        partial_receive = rpc_connection.partial_receive
+        def accounted_send(data):
+            self.__add_bytes(len(data), 0)
+            return send(data)
+        def accounted_receive(length):
+            data = receive(length)
+            self.__add_bytes(0, len(data))
+            return data
+        def accounted_partial_receive(length, *args, **kwargs):
+            data = partial_receive(length, *args, **kwargs)
+            self.__add_bytes(0, len(data))
+            return data
+        rpc_connection.send = accounted_send
+        rpc_connection.receive = accounted_receive
+        rpc_connection.partial_receive = accounted_partial_receive
+
+    def reset(self) -> None:
+        with self.lock:
+            self.method_stats = {}
+            self.tick_stats = RpcStats()
+            self.tick_rpc_counts = deque(maxlen=self.TICK_HISTORY_LENGTH)
+            self.total_stats = RpcStats()
+
+    def end_tick(self) -> RpcStats:
+        """ Closes the current monitor tick, and returns its stats. """
+        with self.lock:
+            tick_stats = self.tick_stats
+            self.tick_rpc_counts.append(tick_stats.count)
+            self.tick_stats = RpcStats()
+        return tick_stats
+
+    def get_method_stats(self) -> dict:
+        """ Returns a snapshot of the RpcStats of each calling method, keyed by "module.method". """
+        with self.lock:
+            return dict(self.method_stats)
+
+    def get_tick_rpc_counts(self) -> tuple:
+        """ Returns the RPC count per tick over the recent ticks as a tuple: (last, mean, max). """
+        with self.lock:
+            if not self.tick_rpc_counts:
+                return (0, 0.0, 0)
+            counts = list(self.tick_rpc_counts)
+        return (counts[-1], sum(counts) / len(counts), max(counts))
+
+    def get_report_str(self) -> str:
+        (tick_last, tick_mean, tick_max) = self.get_tick_rpc_counts()
+        method_stats = self.get_method_stats()
+        report_str = "RPCs per tick: last={0} mean={1:.1f} max={2}\n".format(tick_last, tick_mean, tick_max)
+        report_str += "{0:48s} {1:>8s} {2:>10s} {3:>10s} {4:>9s} {5:>9s}\n".format(
+            "method", "calls", "sent [B]", "recv [B]", "avg [ms]", "max [ms]")
+        for (method_name, stats) in sorted(method_stats.items(), key=lambda item: -item[1].count):
+            report_str += "{0:48s} {1:8d} {2:10d} {3:10d} {4:9.3f} {5:9.3f}\n".format(
+                method_name, stats.count, stats.bytes_sent, stats.bytes_received,
+                stats.total_latency_s / stats.count * 1000.0 if stats.count > 0 else 0.0,
+                stats.max_latency_s * 1000.0)
+        return report_str
+
+    def dump_report(self, filename: str) -> None:
+        with open(filename, "w") as report_fd:
+            report_fd.write(self.get_report_str())
+
+    #
+    # Private Methods
+    #
+    def __add_bytes(self, bytes_sent: int, bytes_received: int) -> None:
+        stats = getattr(self.thread_state, "stats", None)
+        if stats is not None:
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+
+    def __record(self, method_name: str, call_stats: RpcStats) -> None:
+        with self.lock:
+            if method_name not in self.method_stats:
+                self.method_stats[method_name] = RpcStats()
+            for stats in (self.method_stats[method_name], self.tick_stats, self.total_stats):
+                stats.count += call_stats.count
+                stats.bytes_sent += call_stats.bytes_sent
+                stats.bytes_received += call_stats.bytes_received
+                stats.total_latency_s += call_stats.total_latency_s
+                stats.max_latency_s = max(stats.max_latency_s, call_stats.max_latency_s)
+
+    def __get_calling_method_name(self) -> str:
+        """ Returns the first caller outside of the krpc package and of this module. """
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if (not filename.startswith(RpcAccounting.__KRPC_PACKAGE_DIR)) and (filename != __file__):
+                module_name = os.path.splitext(os.path.basename(filename))[0]
+                return "{0}.{1}".format(module_name, frame.f_code.co_name)
+            frame = frame.f_back
+        return "unknown"
@@ -0,0 +1,103 @@
+import time
+
+class ScheduledTask:
+    #
+    # Constructor
+    #
+    def __init__(self, name: str, rate_hz: float, callback):
+        self.name = name
+        self.rate_hz = rate_hz
+        self.period_s = 1.0 / rate_hz
+        self.callback = callback
+        self.next_deadline = 0.0
+        self.run_count = 0
+        self.overrun_count = 0
+        self.skipped_slot_count = 0
+        self.achieved_rate_hz = 0.0
+        self.last_exec_time_s = 0.0
+        self._window_start_time = 0.0
+        self._window_run_count = 0
+
+class MonotonicScheduler:
+    """ Runs periodic tasks at their own rates against absolute deadlines on the monotonic clock.
+        A task that falls behind skips the slots it missed instead of running them back-to-back. """
+
+    #
+    # Constants
+    #
+    MAX_SLEEP_S = 0.1 # upper bound on a sleep, so that termination requests are noticed promptly
+    RATE_WINDOW_S = 1.0
+
+    #
+    # Constructor
+    #
+    def __init__(self):
+        self.tasks = []
+        self.is_running = False
+
+    #
+    # Public Methods
+    #
+    def add_task(self, name: str, rate_hz: float, callback) -> ScheduledTask:
+        """ Registers a task. Tasks that are due at the same time run in registration order. """
+        task = ScheduledTask(name, rate_hz, callback)
+        task.next_deadline = time.monotonic()
+        task._window_start_time = task.next_deadline
+        self.tasks.append(task)
+        return task
+
+    def run(self, is_terminated) -> None:
+        """ Runs the tasks until is_terminated() returns True. """
+        self.is_running = True
+        now = time.monotonic()
+        for task in self.tasks:
+            task.next_deadline = now
+            task._window_start_time = now
+
+        while not is_terminated():
+            sleep_s = self.run_pending()
+            if sleep_s > 0.0:
+                time.sleep(min(sleep_s, self.MAX_SLEEP_S))
+        self.is_running = False
+
+    def run_pending(self) -> float:
+        """ Runs every task whose deadline has passed, and returns the time until the next deadline. """
+        for task in self.tasks:
+            now = time.monotonic()
+            if now < task.next_deadline:
+                continue
+
+            task.callback()
+            finish_time = time.monotonic()
+            task.last_exec_time_s = finish_time - now
+            task.run_count += 1
+            task._window_run_count += 1
+
+            # advance to the next absolute deadline, skipping any slots that have already passed
+            task.next_deadline += task.period_s
+            if finish_time >= task.next_deadline:
+                missed_slots = int((finish_time - task.next_deadline) // task.period_s) + 1
+                task.next_deadline += missed_slots * task.period_s
+                task.overrun_count += 1
+                task.skipped_slot_count += missed_slots
+
+            window_s = finish_time - task._window_start_time
+            if window_s >= self.RATE_WINDOW_S:
+                task.achieved_rate_hz = task._window_run_count / window_s
+                task._window_start_time = finish_time
+                task._window_run_count = 0
+
+        next_deadline = min(task.next_deadline for task in self.tasks) if self.tasks else (time.monotonic() + self.MAX_SLEEP_S)
+        return next_deadline - time.monotonic()
+
+    def get_task_rates(self) -> dict:
+        """ Returns the achieved rate of each task in Hz, keyed by task name. """
+        return {task.name: task.achieved_rate_hz for task in self.tasks}
+
+    def get_task_stats_str(self) -> str:
+        stats_str = ""
+        for task in self.tasks:
+            stats_str += "{0}: {1:5.1f}/{2:5.1f} Hz  exec={3:6.2f} ms  overruns={4} skipped={5}\n".format(
+                task.name, task.achieved_rate_hz, task.rate_hz, task.last_exec_time_s * 1000.0,
+                task.overrun_count, task.skipped_slot_count)
+        return stats_str
@@ -0,0 +1,103 @@
+from ksp_types import VesselFlightControl, VesselFlightState
+import numpy as np
+
+#
+# Constants
+#
+HISTORY_FIELDS = ("vertical_speed", "forward_speed", "lateral_speed", "pitch_rate", "yaw_rate", "throttle")
+VERTICAL_SPEED_IDX = 0
+FORWARD_SPEED_IDX = 1
+LATERAL_SPEED_IDX = 2
+PITCH_RATE_IDX = 3
+YAW_RATE_IDX = 4
+THROTTLE_IDX = 5
+NUM_FIELDS = len(HISTORY_FIELDS)
+
+#
+# Functions
+#
+def lttb_downsample(x: np.ndarray, ys: np.ndarray, num_out: int) -> np.ndarray:
+    """ Largest-Triangle-Three-Buckets downsampling of series sharing the same x, one row of ys per series.
+        Returns the indices of the num_out points of each series that best keep its shape, first and
+        last points included, as one row per series. All series are downsampled in the same pass. """
+    (num_series, n) = ys.shape
+    if (num_out >= n) or (num_out < 3):
+        return np.tile(np.arange(n), (num_series, 1))
+
+    # num_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, num_out - 1).astype(np.intp)
+    series_idx = np.arange(num_series)
+    selected = np.empty((num_series, num_out), dtype=np.intp)
+    selected[:, 0] = 0
+    selected[:, -1] = n - 1
+    a = np.zeros(num_series, dtype=np.intp)
+    for bucket in range(num_out - 2):
+        start = edges[bucket]
+        end = edges[bucket + 1]
+        # average of the next bucket, or the last point after the last bucket
+        next_end = edges[bucket + 2] if (bucket + 2) < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = ys[:, end:next_end].mean(axis=1)
+        # twice the area of the triangle each candidate makes with the previous point and that average
+        x_a = x[a][:, np.newaxis]
+        y_a = ys[series_idx, a][:, np.newaxis]
+        areas = np.abs((x_a - avg_x) * (ys[:, start:end] - y_a) - (x_a - x[start:end]) * (avg_y[:, np.newaxis] - y_a))
+        a = start + np.argmax(areas, axis=1)
+        selected[:, bucket + 1] = a
+    return selected
+
+#
+# Types
+#
+class TelemetryHistory:
+    """ Fixed-capacity ring buffers of flight state fields and of the throttle output, indexed by
+        universal time. Memory is allocated once; the oldest samples are overwritten when full. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((NUM_FIELDS, capacity))
+        self.head = 0 # next write index
+        self.count = 0
+
+    #
+    # Public Methods
+    #
+    def clear(self) -> None:
+        self.head = 0
+        self.count = 0
+
+    def record(self, state: VesselFlightState, control: VesselFlightControl) -> None:
+        idx = self.head
+        values = self.values
+        self.times[idx] = state.fUniversalTime
+        values[VERTICAL_SPEED_IDX, idx] = state.fVerticalSpeed
+        values[FORWARD_SPEED_IDX, idx] = state.fForwardSpeed
+        values[LATERAL_SPEED_IDX, idx] = state.fLateralSpeed
+        values[PITCH_RATE_IDX, idx] = state.fPitchSpeed
+        values[YAW_RATE_IDX, idx] = state.fYawSpeed
+        values[THROTTLE_IDX, idx] = control.fThrottle if control.bIsInputValid else 0.0
+        self.head = idx + 1 if (idx + 1) < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def get_samples(self) -> tuple:
+        """ Returns the samples in time order as a tuple: (times, values), values being one row per field. """
+        if self.count < self.capacity:
+            return (self.times[:self.count], self.values[:, :self.count])
+        head = self.head
+        return (np.concatenate((self.times[head:], self.times[:head])),
+                np.concatenate((self.values[:, head:], self.values[:, :head]), axis=1))
+
+    def get_downsampled(self, num_points: int) -> list:
+        """ Returns every field downsampled to at most num_points with LTTB, as a list of tuples:
+            (field_name, values, last_value) """
+        (times, values) = self.get_samples()
+        if len(times) == 0:
+            return [(field_name, values[field_idx], 0.0) for (field_idx, field_name) in enumerate(HISTORY_FIELDS)]
+        selected = lttb_downsample(times, values, num_points)
+        return [(field_name, values[field_idx, selected[field_idx]], float(values[field_idx, -1]))
+                for (field_idx, field_name) in enumerate(HISTORY_FIELDS)]
@@ -0,0 +1,183 @@
+from ksp_types import VesselAttitude, VesselFlightControl, VesselFlightState, VesselOrbitalParameters
+import numpy as np
+import os, struct, time
+
+#
+# Constants
+#
+RECORDING_MAGIC = b"KMIFFREC"
+RECORDING_VERSION = 1
+RECORDING_HEADER_STRUCT = struct.Struct("<8sII") # magic, version, record size
+RECORDING_HEADER_SIZE = 64 # the rest of the header is reserved
+RECORDING_SESSION_GAP_S = 1.0 # time between the last record of a recording and the first one appended to it
+
+# One record per control tick. Fields are packed, little-endian, so that the file can be
+# memory-mapped back as a NumPy structured array on any machine.
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),                    # seconds of monotonic clock since the start of the recording
+    ("control_program", "S16"),
+    ("control_program_data", "<f8"),
+
+    ("flight_state_valid", "?"),
+    ("universal_time", "<f8"),
+    ("situation", "<i4"),
+    ("weight", "<f8"),
+    ("thrust_max", "<f8"),
+    ("vertical_speed", "<f8"),
+    ("forward_speed", "<f8"),
+    ("lateral_speed", "<f8"),
+    ("pitch_speed", "<f8"),
+    ("pitch_torque_max", "<f8"),
+    ("pitch_moment_of_inertia", "<f8"),
+    ("yaw_speed", "<f8"),
+    ("yaw_torque_max", "<f8"),
+    ("yaw_moment_of_inertia", "<f8"),
+
+    ("attitude_valid", "?"),
+    ("heading", "<f8"),
+    ("pitch", "<f8"),
+    ("roll", "<f8"),
+
+    ("orbit_valid", "?"),
+    ("cbody_name", "S16"),
+    ("cbody_mass", "<f8"),
+    ("period", "<f8"),
+    ("time_to_apoapsis", "<f8"),
+    ("time_to_periapsis", "<f8"),
+    ("true_anomaly", "<f8"),
+
+    ("control_valid", "?"),
+    ("throttle", "<f8"),
+    ("control_pitch", "<f8"),
+    ("control_yaw", "<f8"),
+])
+
+#
+# Functions
+#
+def load_recording(filename: str) -> np.ndarray:
+    """ Memory-maps a recording as a read-only structured array of RECORD_DTYPE.
+        A partially written last record, e.g. after a crash, is left out. """
+    with open(filename, "rb") as recording_fd:
+        header = recording_fd.read(RECORDING_HEADER_SIZE)
+    if len(header) < RECORDING_HEADER_SIZE:
+        raise ValueError("Not a telemetry recording: {0}".format(filename))
+    (magic, version, record_size) = RECORDING_HEADER_STRUCT.unpack_from(header)
+    if magic != RECORDING_MAGIC:
+        raise ValueError("Not a telemetry recording: {0}".format(filename))
+    if (version != RECORDING_VERSION) or (record_size != RECORD_DTYPE.itemsize):
+        raise ValueError("Unsupported telemetry recording version {0} (record size {1})".format(version, record_size))
+
+    num_records = (os.path.getsize(filename) - RECORDING_HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if num_records == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(filename, dtype=RECORD_DTYPE, mode="r", offset=RECORDING_HEADER_SIZE, shape=(num_records,))
+
+#
+# Types
+#
+class TelemetryRecorder:
+    """ Appends one fixed-size record per control tick to a binary file: the flight state and the
+        flight controls of the tick, along with the latest attitude and orbital parameters. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.record_count = 0
+        self.recording_fd = None
+
+        # record times continue from the end of the recording when appending to it, whatever the clock
+        # did in between (reboot, other machine)
+        self.time_offset = 0.0
+
+        # the record being built, reused for every tick
+        self.record = np.zeros(1, dtype=RECORD_DTYPE)
+        self.row = self.record[0]
+
+    #
+    # Public Methods
+    #
+    def open(self) -> None:
+        """ Opens the recording for appending, and writes the header if the file is new. """
+        start_time = 0.0
+        self.recording_fd = open(self.filename, "ab")
+        if self.recording_fd.tell() == 0:
+            header = bytearray(RECORDING_HEADER_SIZE)
+            RECORDING_HEADER_STRUCT.pack_into(header, 0, RECORDING_MAGIC, RECORDING_VERSION, RECORD_DTYPE.itemsize)
+            self.recording_fd.write(header)
+        else:
+            # check that we're appending to a compatible recording, and pick up its clock
+            self.recording_fd.close()
+            records = load_recording(self.filename)
+            num_records = len(records)
+            if num_records > 0:
+                start_time = float(records["time"][-1]) + RECORDING_SESSION_GAP_S
+            del records
+            # drop a partially written last record, so that the new records stay aligned
+            os.truncate(self.filename, RECORDING_HEADER_SIZE + num_records * RECORD_DTYPE.itemsize)
+            self.recording_fd = open(self.filename, "ab")
+        self.time_offset = start_time - time.monotonic()
+
+    def close(self) -> None:
+        if self.recording_fd is not None:
+            self.recording_fd.close()
+            self.recording_fd = None
+
+    def set_vessel_attitude(self, attitude: VesselAttitude) -> None:
+        row = self.row
+        row["attitude_valid"] = attitude.bIsDataValid
+        row["heading"] = attitude.fHeading
+        row["pitch"] = attitude.fPitch
+        row["roll"] = attitude.fRoll
+
+    def set_vessel_orbital_parameters(self, orbital_params: VesselOrbitalParameters) -> None:
+        row = self.row
+        row["orbit_valid"] = orbital_params.bIsDataValid
+        row["cbody_name"] = orbital_params.sCelestialBodyName.encode()
+        row["cbody_mass"] = orbital_params.fCelestialBodyMass
+        row["period"] = orbital_params.fPeriod
+        row["time_to_apoapsis"] = orbital_params.fTimeToApoapsis
+        row["time_to_periapsis"] = orbital_params.fTimeToPeriapsis
+        row["true_anomaly"] = orbital_params.fTrueAnomaly
+
+    def record_control_tick(self, control_program: str, program_data: float,
+                            state: VesselFlightState, control: VesselFlightControl) -> None:
+        """ Appends the record of one control tick. """
+        if self.recording_fd is None:
+            return
+
+        row = self.row
+        row["time"] = time.monotonic() + self.time_offset
+        row["control_program"] = control_program.encode()
+        row["control_program_data"] = program_data
+
+        row["flight_state_valid"] = state.bIsDataValid
+        row["universal_time"] = state.fUniversalTime
+        row["situation"] = state.iSituation
+        row["weight"] = state.fWeight
+        row["thrust_max"] = state.fThrustMax
+        row["vertical_speed"] = state.fVerticalSpeed
+        row["forward_speed"] = state.fForwardSpeed
+        row["lateral_speed"] = state.fLateralSpeed
+        row["pitch_speed"] = state.fPitchSpeed
+        row["pitch_torque_max"] = state.fPitchTorqueMax
+        row["pitch_moment_of_inertia"] = state.fPitchMomentOfInertia
+        row["yaw_speed"] = state.fYawSpeed
+        row["yaw_torque_max"] = state.fYawTorqueMax
+        row["yaw_moment_of_inertia"] = state.fYawMomentOfInertia
+
+        row["control_valid"] = control.bIsInputValid
+        row["throttle"] = control.fThrottle
+        row["control_pitch"] = control.fPitch
+        row["control_yaw"] = control.fYaw
+
+        try:
+            self.recording_fd.write(self.record.data)
+            self.record_count += 1
+        except Exception as e:
+            print("Failed to write telemetry record")
+            print("Exception type    : ", type(e).__name__)
+            print("Exception message : ", str(e))
+            self.close()
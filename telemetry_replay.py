@@ -0,0 +1,213 @@
+from ksp_types import VesselAttitude, VesselFlightControl, VesselFlightState, VesselOrbitalParameters, VesselResources, VesselTrajectoryState
+from telemetry_recorder import load_recording
+import numpy as np
+import time
+
+#
+# Functions
+#
+def flight_state_from_record(row) -> VesselFlightState:
+    return VesselFlightState(
+        bool(row["flight_state_valid"]),
+        float(row["universal_time"]),
+        int(row["situation"]),
+        float(row["weight"]),
+        float(row["thrust_max"]),
+        float(row["vertical_speed"]),
+        float(row["forward_speed"]),
+        float(row["lateral_speed"]),
+        float(row["pitch_speed"]),
+        float(row["pitch_torque_max"]),
+        float(row["pitch_moment_of_inertia"]),
+        float(row["yaw_speed"]),
+        float(row["yaw_torque_max"]),
+        float(row["yaw_moment_of_inertia"]))
+
+def attitude_from_record(row) -> VesselAttitude:
+    return VesselAttitude(
+        bool(row["attitude_valid"]),
+        float(row["heading"]),
+        float(row["pitch"]),
+        float(row["roll"]))
+
+def orbital_parameters_from_record(row) -> VesselOrbitalParameters:
+    return VesselOrbitalParameters(
+        bool(row["orbit_valid"]),
+        row["cbody_name"].decode(),
+        float(row["cbody_mass"]),
+        float(row["period"]),
+        float(row["time_to_apoapsis"]),
+        float(row["time_to_periapsis"]),
+        float(row["true_anomaly"]))
+
+def flight_control_from_record(row) -> VesselFlightControl:
+    return VesselFlightControl(
+        bool(row["control_valid"]),
+        float(row["throttle"]),
+        float(row["control_pitch"]),
+        float(row["control_yaw"]))
+
+#
+# Types
+#
+class KspReplay:
+    """ Plays back a telemetry recording through the KspInterface read API, in place of a kRPC connection.
+
+        With a positive speed, the record shown is the one due at that multiple of the recording's own
+        clock. With a speed of zero, playback runs as fast as possible: each get_vessel_flight_state()
+        call moves to the next record, so whoever drives the control tick sets the pace. Flight controls
+        are not sent anywhere; the last ones set are kept in last_flight_control. """
+
+    #
+    # Constants
+    #
+    REPLAY_VESSEL_NAME = "replay"
+
+    #
+    # Constructor
+    #
+    def __init__(self, recording_filename: str, speed: float = 1.0):
+        self.recording_filename = recording_filename
+        self.speed = speed
+        self.tracked_resources = []
+        self.rpc_accounting = None
+        self.selected_vessel_idx = 0 # a recording holds a single vessel
+        self.is_connected = False
+        self.is_data_streaming = False
+        self.is_finished = False
+        self.records = None
+        self.record_idx = 0
+        self.is_streaming_started = False
+        self.start_time = 0.0
+        self.last_flight_control = VesselFlightControl(False, 0.0, 0.0, 0.0)
+
+    #
+    # Public Methods
+    #
+    def init_connection(self) -> bool:
+        if self.is_connected:
+            return True
+
+        try:
+            self.records = load_recording(self.recording_filename)
+            self.record_idx = 0
+            self.is_streaming_started = False
+            self.is_finished = (len(self.records) == 0)
+            self.start_time = time.monotonic()
+            self.is_connected = True
+        except Exception as e:
+            print("Failed to open telemetry recording")
+            print("Exception type    : ", type(e).__name__)
+            print("Exception message : ", str(e))
+            self.is_connected = False
+        return self.is_connected
+
+    def deinit_connection(self) -> None:
+        self.is_connected = False
+        self.is_data_streaming = False
+        self.records = None
+
+    def setup_connection_if_needed(self) -> bool:
+        return self.init_connection()
+
+    def setup_data_streams_if_needed(self) -> bool:
+        self.is_data_streaming = self.is_connected
+        return self.is_data_streaming
+
+    def check_connection_health(self) -> bool:
+        return self.is_connected
+
+    def get_krpc_status(self) -> str:
+        if not self.is_connected:
+            return "no recording"
+        if self.is_finished:
+            return "replay finished ({0} records)".format(len(self.records))
+        speed_str = "{0:g}x".format(self.speed) if self.speed > 0.0 else "max speed"
+        return "replay {0}/{1}  {2}".format(self.record_idx + 1, len(self.records), speed_str)
+
+    def get_vessel_names(self) -> list:
+        return [self.REPLAY_VESSEL_NAME] if self.is_data_streaming else []
+
+    def get_selected_vessel_name(self) -> str:
+        return self.REPLAY_VESSEL_NAME if self.is_data_streaming else ""
+
+    def select_vessel(self, vessel_name: str) -> None:
+        pass
+
+    def get_vessel_attitude(self) -> VesselAttitude:
+        row = self.__get_current_record(is_advancing=False)
+        if row is None:
+            return VesselAttitude(False, 0, 0, 0)
+        return attitude_from_record(row)
+
+    def get_vessel_flight_state(self) -> VesselFlightState:
+        row = self.__get_current_record(is_advancing=True)
+        if row is None:
+            return VesselFlightState(False, 0.0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return flight_state_from_record(row)
+
+    def get_fleet_flight_states(self) -> list:
+        if not self.is_data_streaming:
+            return []
+        return [self.get_vessel_flight_state()]
+
+    def get_vessel_trajectory_state(self) -> VesselTrajectoryState:
+        # positions and velocities are not recorded
+        return VesselTrajectoryState(False, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def get_vessel_orbital_parameters(self) -> VesselOrbitalParameters:
+        row = self.__get_current_record(is_advancing=False)
+        if row is None:
+            return VesselOrbitalParameters(False, "", 0.0, 0.0, 0.0, 0.0, 0.0)
+        return orbital_parameters_from_record(row)
+
+    def get_vessel_resources(self) -> VesselResources:
+        # resources are not recorded
+        return VesselResources(False, 0.0, [])
+
+    def get_recorded_flight_control(self) -> VesselFlightControl:
+        """ Returns the flight controls that were sent during the current record. """
+        row = self.__get_current_record(is_advancing=False)
+        if row is None:
+            return VesselFlightControl(False, 0.0, 0.0, 0.0)
+        return flight_control_from_record(row)
+
+    def get_recorded_control_program(self) -> tuple:
+        """ Returns the control program that was active during the current record as a tuple: (program, program_data) """
+        row = self.__get_current_record(is_advancing=False)
+        if row is None:
+            return ("manual", 0.0)
+        return (row["control_program"].decode(), float(row["control_program_data"]))
+
+    def set_flight_controls(self, control: VesselFlightControl) -> None:
+        if control.bIsInputValid:
+            self.last_flight_control = control
+
+    def set_vessel_flight_controls(self, vessel_idx: int, control: VesselFlightControl) -> None:
+        self.set_flight_controls(control)
+
+    def invalidate_flight_controls(self, vessel_idx: int) -> None:
+        pass
+
+    #
+    # Private Methods
+    #
+    def __get_current_record(self, is_advancing: bool):
+        if (not self.is_data_streaming) or self.is_finished:
+            return None
+
+        records = self.records
+        if self.speed > 0.0:
+            replay_time = records["time"][0] + (time.monotonic() - self.start_time) * self.speed
+            self.record_idx = max(int(np.searchsorted(records["time"], replay_time, side="right")) - 1, 0)
+            if replay_time > records["time"][-1]:
+                self.is_finished = True
+                return None
+        elif is_advancing:
+            if self.is_streaming_started:
+                self.record_idx += 1
+            self.is_streaming_started = True
+            if self.record_idx >= len(records):
+                self.is_finished = True
+                return None
+        return records[self.record_idx]
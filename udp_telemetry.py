@@ -0,0 +1,129 @@
+from ksp_types import VesselAttitude, VesselFlightState
+from mmap_interface import VESSEL_ATTITUDE_STRUCT, VESSEL_FLIGHT_STATE_STRUCT
+import ipaddress, socket, struct, time
+
+#
+# Constants
+#
+# Every frame is a single datagram: a little-endian header followed by the channel's payload,
+# packed the same way as the corresponding record of the shared-memory block.
+#
+FRAME_MAGIC = b"KMTL"
+FRAME_VERSION = 1
+FRAME_HEADER_STRUCT = struct.Struct("<4sBBHId") # magic, version, channel, payload size, sequence, sender monotonic time
+
+CHANNEL_VESSEL_ATTITUDE = 0
+CHANNEL_VESSEL_FLIGHT_STATE = 1
+CHANNEL_NAMES = ("attitude", "flight_state")
+CHANNEL_PAYLOAD_STRUCTS = (VESSEL_ATTITUDE_STRUCT, VESSEL_FLIGHT_STATE_STRUCT)
+
+#
+# Types
+#
+class UdpTelemetryBroadcaster:
+    """ Sends telemetry frames over UDP, to a unicast or a multicast address. Each channel has its
+        own rate limit and sequence number. The socket is non-blocking: a frame that can't be sent
+        right away is dropped and counted, it never holds up the caller. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, address: str, port: int, channel_rates_hz: dict, multicast_ttl: int = 1):
+        # resolved once here, so that sending never waits on a name lookup; raises OSError if it can't be
+        self.address = address
+        address_infos = socket.getaddrinfo(address, port, socket.AF_INET, socket.SOCK_DGRAM)
+        self.destination = address_infos[0][4] # (IP address, port)
+        self.channel_periods_s = [1.0 / channel_rates_hz.get(name, 0.0) if channel_rates_hz.get(name, 0.0) > 0.0 else None
+                                  for name in CHANNEL_NAMES]
+        self.channel_next_send_time = [0.0] * len(CHANNEL_NAMES)
+        self.channel_sequences = [0] * len(CHANNEL_NAMES)
+        self.channel_frames = [bytearray(FRAME_HEADER_STRUCT.size + payload_struct.size) for payload_struct in CHANNEL_PAYLOAD_STRUCTS]
+        self.sent_count = 0
+        self.dropped_count = 0
+
+        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.udp_socket.setblocking(False)
+            if ipaddress.ip_address(self.destination[0]).is_multicast:
+                self.udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, multicast_ttl)
+        except Exception:
+            self.udp_socket.close()
+            raise
+
+    #
+    # Public Methods
+    #
+    def close(self) -> None:
+        self.udp_socket.close()
+
+    def publish_vessel_attitude(self, attitude: VesselAttitude) -> None:
+        if not attitude.bIsDataValid:
+            return
+        frame = self.__begin_frame(CHANNEL_VESSEL_ATTITUDE)
+        if frame is None:
+            return
+        VESSEL_ATTITUDE_STRUCT.pack_into(frame, FRAME_HEADER_STRUCT.size,
+            attitude.fHeading,
+            attitude.fPitch,
+            attitude.fRoll)
+        self.__send_frame(frame)
+
+    def publish_vessel_flight_state(self, state: VesselFlightState) -> None:
+        if not state.bIsDataValid:
+            return
+        frame = self.__begin_frame(CHANNEL_VESSEL_FLIGHT_STATE)
+        if frame is None:
+            return
+        VESSEL_FLIGHT_STATE_STRUCT.pack_into(frame, FRAME_HEADER_STRUCT.size,
+            state.fUniversalTime,
+            state.iSituation,
+            state.fWeight,
+            state.fThrustMax,
+            state.fVerticalSpeed,
+            state.fForwardSpeed,
+            state.fLateralSpeed,
+            state.fPitchSpeed,
+            state.fPitchTorqueMax,
+            state.fPitchMomentOfInertia,
+            state.fYawSpeed,
+            state.fYawTorqueMax,
+            state.fYawMomentOfInertia)
+        self.__send_frame(frame)
+
+    def get_stats_str(self) -> str:
+        return "UDP telemetry to {0} ({1}:{2})  sent={3} dropped={4}".format(
+            self.address, self.destination[0], self.destination[1], self.sent_count, self.dropped_count)
+
+    #
+    # Private Methods
+    #
+    def __begin_frame(self, channel: int) -> bytearray:
+        """ Returns the channel's frame buffer with its header filled in, or None if the channel
+            is disabled or rate limited right now. """
+        period_s = self.channel_periods_s[channel]
+        if period_s is None:
+            return None
+        now = time.monotonic()
+        if now < self.channel_next_send_time[channel]:
+            return None
+        # keep to the rate on average, without bursting after a stall
+        self.channel_next_send_time[channel] = max(self.channel_next_send_time[channel] + period_s, now)
+
+        self.channel_sequences[channel] = (self.channel_sequences[channel] + 1) & 0xFFFFFFFF
+        frame = self.channel_frames[channel]
+        FRAME_HEADER_STRUCT.pack_into(frame, 0,
+            FRAME_MAGIC,
+            FRAME_VERSION,
+            channel,
+            CHANNEL_PAYLOAD_STRUCTS[channel].size,
+            self.channel_sequences[channel],
+            now)
+        return frame
+
+    def __send_frame(self, frame: bytearray) -> None:
+        try:
+            self.udp_socket.sendto(frame, self.destination)
+            self.sent_count += 1
+        except OSError:
+            # includes BlockingIOError when the socket buffer is full
+            self.dropped_count += 1
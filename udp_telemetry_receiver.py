@@ -0,0 +1,52 @@
+""" Reference receiver of the UDP telemetry frames sent by UdpTelemetryBroadcaster.
+    Prints every frame, and reports sequence gaps per channel.
+
+    Usage: python udp_telemetry_receiver.py [--address A] [--port N]
+"""
+from config import UDP_TELEMETRY_ADDRESS, UDP_TELEMETRY_PORT
+from udp_telemetry import FRAME_HEADER_STRUCT, FRAME_MAGIC, FRAME_VERSION, CHANNEL_NAMES, CHANNEL_PAYLOAD_STRUCTS
+import argparse, ipaddress, socket, struct
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Print UDP telemetry frames.")
+    parser.add_argument("--address", default=UDP_TELEMETRY_ADDRESS or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=UDP_TELEMETRY_PORT)
+    args = parser.parse_args()
+
+    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if ipaddress.ip_address(args.address).is_multicast:
+        udp_socket.bind(("", args.port))
+        membership = struct.pack("4s4s", socket.inet_aton(args.address), socket.inet_aton("0.0.0.0"))
+        udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    else:
+        udp_socket.bind((args.address, args.port))
+
+    last_sequences = [None] * len(CHANNEL_NAMES)
+    lost_counts = [0] * len(CHANNEL_NAMES)
+    while True:
+        frame = udp_socket.recv(2048)
+        if len(frame) < FRAME_HEADER_STRUCT.size:
+            continue
+        (magic, version, channel, payload_size, sequence, sender_time) = FRAME_HEADER_STRUCT.unpack_from(frame)
+        if (magic != FRAME_MAGIC) or (version != FRAME_VERSION) or (channel >= len(CHANNEL_NAMES)):
+            continue
+        payload_struct = CHANNEL_PAYLOAD_STRUCTS[channel]
+        if (payload_size != payload_struct.size) or (len(frame) < FRAME_HEADER_STRUCT.size + payload_size):
+            continue
+
+        last_sequence = last_sequences[channel]
+        if last_sequence is not None:
+            gap = (sequence - last_sequence - 1) & 0xFFFFFFFF
+            if gap >= 0x80000000:
+                # late, out-of-order frame
+                continue
+            lost_counts[channel] += gap
+        last_sequences[channel] = sequence
+
+        values = payload_struct.unpack_from(frame, FRAME_HEADER_STRUCT.size)
+        print("{0:12s} #{1:<8d} lost={2:<4d} {3}".format(
+            CHANNEL_NAMES[channel], sequence, lost_counts[channel], " ".join("{0:.3f}".format(value) for value in values)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+from ksp_types import CelestialBody, VesselFlightControl
+import math, time
+
+class VesselStreams:
+    """ The kRPC streams of one monitored vessel, along with its celestial body cache and its
+        control handle. Everything here is set up once; reading it afterwards issues no RPCs. """
+
+    #
+    # Constructor
+    #
+    def __init__(self, krpc_connection, vessel, vessel_name: str, tracked_resources: list, is_drawing_debug_markers=False):
+        self.krpc_connection = krpc_connection
+        self.vessel = vessel
+        self.name = vessel_name
+        self.tracked_resources = tracked_resources
+        self.is_drawing_debug_markers = is_drawing_debug_markers
+
+        # Celestial body cache, refreshed only on sphere-of-influence changes
+        self.cbody = CelestialBody(False, "", 0.0, 0.0)
+        self.cbody_remote = None
+        self.cbody_refframe = None
+        self.cbody_frame_streams = []
+        self.cbody_frame_drawings = []
+
+        # Control values last sent through the control handle, None when unknown
+        self.written_throttle = None
+        self.written_pitch = None
+        self.written_yaw = None
+        self.last_control_write_time = -math.inf
+
+    #
+    # Public Methods
+    #
+    def setup(self) -> None:
+        krpc_connection = self.krpc_connection
+        vessel = self.vessel
+        self.control = vessel.control
+        self.invalidate_written_controls()
+        self.stream_vessel_orbit = krpc_connection.add_stream(getattr, vessel, 'orbit')
+        self.stream_cbody = krpc_connection.add_stream(getattr, self.stream_vessel_orbit(), 'body')
+        vessel_flight = vessel.flight() # surface reference frame
+
+        # Vessel attitude
+        self.stream_heading = krpc_connection.add_stream(getattr, vessel_flight, 'heading')
+        self.stream_pitch = krpc_connection.add_stream(getattr, vessel_flight, 'pitch')
+        self.stream_roll = krpc_connection.add_stream(getattr, vessel_flight, 'roll')
+        self.stream_surface_altitude = krpc_connection.add_stream(getattr, vessel_flight, 'surface_altitude')
+
+        # Vessel flight state
+        self.stream_throttle = krpc_connection.add_stream(getattr, self.control, 'throttle')
+        self.stream_situation = krpc_connection.add_stream(getattr, vessel, 'situation')
+        self.stream_max_thrust = krpc_connection.add_stream(getattr, vessel, 'max_thrust')
+        self.stream_mass = krpc_connection.add_stream(getattr, vessel, 'mass')
+        self.stream_max_torque = krpc_connection.add_stream(getattr, vessel, 'available_torque')
+        self.stream_moi = krpc_connection.add_stream(getattr, vessel, 'moment_of_inertia')
+
+        # Vessel resources, totalled over all parts by the server
+        vessel_resources = vessel.resources
+        self.resource_streams = {}
+        for resource_name in self.tracked_resources:
+            self.resource_streams[resource_name] = (
+                krpc_connection.add_stream(vessel_resources.amount, resource_name),
+                krpc_connection.add_stream(vessel_resources.max, resource_name))
+
+        # Celestial body cache and the streams relative to its reference frame
+        self.cbody_remote = None
+        self.cbody_frame_streams = []
+        self.cbody_frame_drawings = []
+        self.update_cbody_cache_if_needed()
+
+    def get_streams(self) -> list:
+        """ Returns all the streams of the vessel. """
+        streams = [
+            self.stream_vessel_orbit,
+            self.stream_cbody,
+            self.stream_heading,
+            self.stream_pitch,
+            self.stream_roll,
+            self.stream_surface_altitude,
+            self.stream_throttle,
+            self.stream_situation,
+            self.stream_max_thrust,
+            self.stream_mass,
+            self.stream_max_torque,
+            self.stream_moi,
+        ]
+        for (stream_amount, stream_max) in self.resource_streams.values():
+            streams.append(stream_amount)
+            streams.append(stream_max)
+        return streams + self.cbody_frame_streams
+
+    def update_cbody_cache_if_needed(self) -> bool:
+        """ Refreshes the celestial body cache when the vessel has changed sphere of influence, and
+            returns True if it did. Costs nothing but a stream read while the vessel stays in the same SOI. """
+        cbody_remote = self.stream_cbody()
+        if cbody_remote == self.cbody_remote:
+            return False
+
+        self.cbody = CelestialBody(
+            True,
+            cbody_remote.name,
+            cbody_remote.mass,
+            cbody_remote.gravitational_parameter)
+        self.cbody_refframe = cbody_remote.reference_frame
+        self.cbody_remote = cbody_remote
+        self.__setup_cbody_frame_streams()
+        return True
+
+    def invalidate_written_controls(self) -> None:
+        """ Has every axis sent on the next write_controls(), when the controls may have been changed
+            from elsewhere. """
+        self.written_throttle = None
+        self.written_pitch = None
+        self.written_yaw = None
+        self.last_control_write_time = -math.inf
+
+    def write_controls(self, control: VesselFlightControl, deadband: float, min_write_interval_s: float) -> None:
+        """ Sends the axes that moved by more than deadband since they were last sent, one RPC each. The
+            throttle is also sent when its streamed value is off by more than deadband, e.g. after the pilot
+            moved it. Within min_write_interval_s of the last write nothing is sent; the changes go out on a later call. """
+        current_time = time.monotonic()
+        if current_time - self.last_control_write_time < min_write_interval_s:
+            return
+
+        vessel_control = self.control
+        is_written = False
+        is_throttle_moved = abs(self.stream_throttle() - control.fThrottle) > deadband
+        if is_throttle_moved or self.__is_control_changed(self.written_throttle, control.fThrottle, deadband):
+            vessel_control.throttle = control.fThrottle
+            self.written_throttle = control.fThrottle
+            is_written = True
+        if self.__is_control_changed(self.written_pitch, control.fPitch, deadband):
+            vessel_control.pitch = control.fPitch
+            self.written_pitch = control.fPitch
+            is_written = True
+        if self.__is_control_changed(self.written_yaw, control.fYaw, deadband):
+            vessel_control.yaw = control.fYaw
+            self.written_yaw = control.fYaw
+            is_written = True
+        if is_written:
+            self.last_control_write_time = current_time
+
+    def get_total_resource(self, resource_name: str) -> tuple:
+        """ Returns the total amount of a tracked resource in the vessel as a tuple: (amount, max)"""
+        (stream_amount, stream_max) = self.resource_streams[resource_name]
+        return (stream_amount(), stream_max())
+
+    #
+    # Private Methods
+    #
+    @staticmethod
+    def __is_control_changed(written_value, value: float, deadband: float) -> bool:
+        """ Changes within the deadband are held back, except onto the ends and the center of the
+            range, so that full throttle, cut-off and neutral are always reached exactly. """
+        if written_value is None:
+            return True
+        if value == written_value:
+            return False
+        return (abs(value - written_value) > deadband) or (value == 0.0) or (abs(value) == 1.0)
+
+    def __setup_cbody_frame_streams(self) -> None:
+        """ (Re)creates the streams and drawings that are relative to the celestial body reference frame. """
+        for stream in self.cbody_frame_streams:
+            stream.remove()
+        for drawing in self.cbody_frame_drawings:
+            drawing.remove()
+
+        krpc_connection = self.krpc_connection
+        vessel = self.vessel
+        vessel_cbody_refframe = self.cbody_refframe
+        vessel_flight_cbody = vessel.flight(vessel_cbody_refframe) # celestial body reference frame
+        self.stream_position = krpc_connection.add_stream(vessel.position, vessel_cbody_refframe)
+        self.stream_velocity = krpc_connection.add_stream(vessel.velocity, vessel_cbody_refframe)
+        self.stream_rotation = krpc_connection.add_stream(vessel.rotation, vessel_cbody_refframe)
+        self.stream_angular_velocity = krpc_connection.add_stream(vessel.angular_velocity, vessel_cbody_refframe)
+        self.stream_vertical_speed = krpc_connection.add_stream(getattr, vessel_flight_cbody, 'vertical_speed')
+        self.cbody_frame_streams = [
+            self.stream_position,
+            self.stream_velocity,
+            self.stream_rotation,
+            self.stream_angular_velocity,
+            self.stream_vertical_speed,
+        ]
+
+        # Visual debugging markers
+        self.cbody_frame_drawings = []
+        if self.is_drawing_debug_markers:
+            self.draw_vessel_pos_unit = krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), vessel_cbody_refframe)
+            self.draw_vessel_pos_unit.color = (0.0, 1.0, 0.0)
+            self.draw_vessel_vel_unit = krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), vessel_cbody_refframe)
+            self.draw_vessel_vel_unit.color = (0.0, 0.0, 1.0)
+            self.draw_vessel_srfvel_unit = krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), vessel_cbody_refframe)
+            self.draw_vessel_srfvel_unit.color = (1.0, 0.0, 0.0)
+            self.draw_vessel_fwd_unit = krpc_connection.drawing.add_line((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), vessel_cbody_refframe)
+            self.draw_vessel_fwd_unit.color = (1.0, 0.6, 0.1)
+            self.cbody_frame_drawings = [
+                self.draw_vessel_pos_unit,
+                self.draw_vessel_vel_unit,
+                self.draw_vessel_srfvel_unit,
+                self.draw_vessel_fwd_unit,
+            ]